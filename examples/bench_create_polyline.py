@@ -0,0 +1,105 @@
+"""
+Compare create_polyline() on Python lists with the NumPy array fast path.
+
+A polygon with --points vertices is drawn both ways into an editor that
+only records the arrays it is given, so that the timings measure hycohanz
+and not HFSS.  The script checks that both paths send the same vertices,
+for closed and open polylines, and that the array path is at least
+--min-speedup times faster.  It then draws the polygon into the simulated
+backend in chunks of --max-points vertices to check that the united,
+covered result has one face and one edge per vertex.
+
+Usage:
+
+    python bench_create_polyline.py [--points 100000] [--repeat 3] [--max-points 10000]
+                                    [--min-speedup 1.3]
+
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import os
+import sys
+import time
+
+# examples/copy.py would shadow the standard library module of that name.
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != _here]
+sys.path.insert(0, os.path.dirname(_here))
+
+import numpy as np
+
+import hycohanz as hfss
+
+class RecordingEditor(object):
+    def __init__(self):
+        self.calls = []
+
+    def CreatePolyline(self, parametersarray, attributesarray):
+        self.calls.append(parametersarray)
+        return 'Polyline1'
+
+def vertices(params):
+    points = params[5][1:]
+    return np.array([[float(p[0][k].replace('meter', '')) for k in (2, 4, 6)] for p in points])
+
+def best_of(repeat, function):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-points', type=int, default=10000)
+    parser.add_argument('--min-speedup', type=float, default=1.3)
+    args = parser.parse_args()
+
+    t = np.linspace(0, 2 * np.pi, args.points, endpoint=False)
+    x = 1e-3 * (10 + np.cos(7 * t)) * np.cos(t)
+    y = 1e-3 * (10 + np.cos(7 * t)) * np.sin(t)
+    z = np.zeros_like(t)
+
+    loop = RecordingEditor()
+    fast = RecordingEditor()
+    xl, yl, zl = x.tolist(), y.tolist(), z.tolist()
+    tloop = best_of(args.repeat, lambda: hfss.create_polyline(loop, xl, yl, zl))
+    tfast = best_of(args.repeat, lambda: hfss.create_polyline(fast, x, y, z))
+
+    print('{n} points:  lists {a:.3f} s, arrays {b:.3f} s, speedup {s:.1f}x'.format(
+          n=args.points, a=tloop, b=tfast, s=tloop / tfast))
+
+    failures = []
+    if tloop / tfast < args.min_speedup:
+        failures.append('speedup {s:.1f}x is below {m:.1f}x'.format(s=tloop / tfast, m=args.min_speedup))
+    if not np.allclose(vertices(loop.calls[-1]), vertices(fast.calls[-1]), rtol=1e-12, atol=0):
+        failures.append('the array path sends different vertices')
+    hfss.create_polyline(loop, xl[:10], yl[:10], zl[:10], IsPolylineClosed=False)
+    hfss.create_polyline(fast, x[:10], y[:10], z[:10], IsPolylineClosed=False)
+    if vertices(loop.calls[-1]).shape != vertices(fast.calls[-1]).shape:
+        failures.append('the array path sends different vertices for open polylines')
+
+    oAnsoftApp, oDesktop = hfss.setup_interface(backend='simulated')
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, 'HFSSDesign1', 'DrivenModal')
+    oEditor = hfss.set_active_editor(oDesign)
+    start = time.time()
+    name = hfss.create_polyline(oEditor, x, y, z, max_points=args.max_points)
+    tchunks = time.time() - start
+    print('simulated HFSS, chunks of {m} points:  {t:.3f} s, {c} CreatePolyline calls'.format(
+          m=args.max_points, t=tchunks, c=oAnsoftApp.call_counts['CreatePolyline']))
+    body = oEditor.objects[name]
+    if len(body.faces) != 1 or len(body.edges) != args.points:
+        failures.append('expected 1 face and {n} edges, got {f} and {e}'.format(
+                        n=args.points, f=len(body.faces), e=len(body.edges)))
+
+    for failure in failures:
+        print('FAIL: ' + failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
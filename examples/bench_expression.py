@@ -0,0 +1,59 @@
+"""
+Measure the cost of composing deep expressions.
+
+A sum of --terms terms is built one operator at a time, once by
+concatenating strings the way Expression used to, with every left operand
+in parentheses, and once with Expression.  The script reports the time
+taken and the length of the resulting string.
+
+Usage:
+
+    python bench_expression.py [--terms 20000]
+
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import os
+import sys
+import time
+
+# examples/copy.py would shadow the standard library module of that name.
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != _here]
+sys.path.insert(0, os.path.dirname(_here))
+
+from hycohanz.expression import Expression as Ex
+
+def concatenated(terms):
+    expr = 'w0'
+    for k in range(1, terms):
+        expr = '(' + expr + ') + ' + 'w{k} * 0.5mm'.format(k=k % 10)
+    return expr
+
+def composed(terms):
+    expr = Ex('w0')
+    for k in range(1, terms):
+        expr = expr + Ex('w{k}'.format(k=k % 10)) * '0.5mm'
+    return expr.expr
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--terms', type=int, default=20000)
+    args = parser.parse_args()
+
+    start = time.time()
+    text = concatenated(args.terms)
+    tconcat = time.time() - start
+
+    start = time.time()
+    expr = composed(args.terms)
+    tcomposed = time.time() - start
+
+    print('{n} terms:'.format(n=args.terms))
+    print('  string concatenation:  {t:.3f} s, {c} characters'.format(t=tconcat, c=len(text)))
+    print('  Expression:            {t:.3f} s, {c} characters'.format(t=tcomposed, c=len(expr)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Compare rebuilding a model from scratch with an incremental GeometryModel
+rebuild.
+
+A grid of --parts boxes is built in the simulated backend, which delays
+every command by --latency seconds.  Then --changed of the boxes are made
+taller, and the model is brought to the new geometry once by deleting and
+recreating everything, and once with GeometryModel.apply().  The script
+checks that both give the same bounding boxes.
+
+Usage:
+
+    python bench_geometry_diff.py [--parts 500] [--changed 5] [--latency 0.002]
+
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import os
+import sys
+import time
+
+# examples/copy.py would shadow the standard library module of that name.
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != _here]
+sys.path.insert(0, os.path.dirname(_here))
+
+import hycohanz as hfss
+
+def editor(latency):
+    oAnsoftApp, oDesktop = hfss.setup_interface(backend='simulated', latency=latency)
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, 'HFSSDesign1', 'DrivenModal')
+    return oAnsoftApp, hfss.set_active_editor(oDesign)
+
+def target(nparts, changed):
+    return [hfss.box_part('Cell{i}'.format(i=i), (2 * (i % 50), 2 * (i // 50), 0),
+                          (1, 1, 2 if i < changed else 1), 'copper')
+            for i in range(nparts)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parts', type=int, default=500)
+    parser.add_argument('--changed', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.002)
+    args = parser.parse_args()
+    hfss.enable_scene_graph()
+
+    app, full = editor(args.latency)
+    model = hfss.GeometryModel(full)
+    model.apply(target(args.parts, 0))
+    start = time.time()
+    hfss.delete(full, hfss.get_matched_object_name(full, '*'))
+    hfss.GeometryModel(full).apply(target(args.parts, args.changed))
+    tfull = time.time() - start
+
+    app, incremental = editor(args.latency)
+    model = hfss.GeometryModel(incremental)
+    model.apply(target(args.parts, 0))
+    start = time.time()
+    edits = model.apply(target(args.parts, args.changed))
+    tincremental = time.time() - start
+
+    print('{n} boxes, {c} changed:'.format(n=args.parts, c=args.changed))
+    print('  full rebuild:        {t:.2f} s'.format(t=tfull))
+    print('  incremental rebuild: {t:.2f} s, {e} edits'.format(t=tincremental, e=len(edits)))
+
+    for part in target(args.parts, args.changed):
+        if hfss.get_bounding_box(full, part.name) != hfss.get_bounding_box(incremental, part.name):
+            print('FAIL: {p} differs'.format(p=part.name))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Measure how long "import hycohanz" takes and check that it stays lazy.
+
+Each measurement imports hycohanz in a fresh interpreter.  The script exits
+with a non-zero status if the median import time exceeds --max-ms, if the
+import pulls in any of the heavy modules that hycohanz should only load on
+demand (NumPy, pywin32), or if the lazy flat namespace and the eager one,
+hycohanz.hycohanz, differ:  every public name of either must resolve to the
+same object in both.
+
+Usage:
+
+    python bench_import_time.py [--repeat 20] [--max-ms 50]
+
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['numpy', 'win32com', 'pythoncom']
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+import hycohanz
+stop = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+print(json.dumps({'ms': 1e3 * (stop - start),
+                  'modules': sorted(m for m in sys.modules if m.split('.')[0] in %r)}))
+'''
+
+_CONSISTENCY = '''
+import __future__, json, types
+import hycohanz
+import hycohanz.hycohanz as eager
+public = set(n for n, v in vars(eager).items() if not n.startswith('_') and
+             not isinstance(v, (types.ModuleType, __future__._Feature)))
+print(json.dumps(sorted(n for n in public | set(hycohanz.__all__)
+                        if not hasattr(eager, n) or getattr(hycohanz, n, None) is not getattr(eager, n))))
+'''
+
+def run(code, env):
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+
+    samples = []
+    loaded = set()
+    for i in range(args.repeat):
+        result = run(_PROBE % (HEAVY_MODULES,), env)
+        samples.append(result['ms'])
+        loaded.update(result['modules'])
+    samples.sort()
+    median = samples[len(samples) // 2]
+
+    print('import hycohanz: median {m:.2f} ms, min {a:.2f} ms, max {b:.2f} ms over {n} runs'.format(
+          m=median, a=samples[0], b=samples[-1], n=len(samples)))
+
+    failures = []
+    if median > args.max_ms:
+        failures.append('median import time {m:.2f} ms exceeds {x:.2f} ms'.format(m=median, x=args.max_ms))
+    if loaded:
+        failures.append('heavy modules imported eagerly: {l}'.format(l=', '.join(sorted(loaded))))
+    drift = run(_CONSISTENCY, env)
+    if drift:
+        failures.append('names not matching hycohanz.hycohanz: {d}'.format(d=', '.join(drift)))
+
+    for failure in failures:
+        print('FAIL: ' + failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
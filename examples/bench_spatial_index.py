@@ -0,0 +1,83 @@
+"""
+Measure how many face lookups the spatial index saves.
+
+A grid of --boxes boxes is drawn into the simulated backend, and the faces
+at --points random points on their sides are looked up with
+get_face_by_position(), once with the spatial index and once without.  The
+script checks that both give the same face IDs and reports the number of
+GetFaceByPosition calls made and the hit rate of the index.
+
+Usage:
+
+    python bench_spatial_index.py [--boxes 400] [--points 5000] [--latency 0.0005]
+
+"""
+from __future__ import division, print_function, absolute_import
+
+import argparse
+import os
+import sys
+import time
+
+# examples/copy.py would shadow the standard library module of that name.
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != _here]
+sys.path.insert(0, os.path.dirname(_here))
+
+import numpy as np
+
+import hycohanz as hfss
+
+def run(args, points, indexed):
+    hfss.enable_spatial_index(indexed)
+    hfss.enable_query_cache(False)
+    oAnsoftApp, oDesktop = hfss.setup_interface(backend='simulated', latency=args.latency)
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, 'HFSSDesign1', 'DrivenModal')
+    oEditor = hfss.set_active_editor(oDesign)
+    n = int(np.ceil(np.sqrt(args.boxes)))
+    k = np.arange(args.boxes)
+    boxes = np.column_stack([2 * (k % n), 2 * (k // n), np.zeros(args.boxes), np.ones((args.boxes, 3))])
+    names = hfss.create_boxes(oEditor, boxes)
+
+    hfss.reset_spatial_index_info()
+    start = time.time()
+    faces = [hfss.get_face_by_position(oEditor, names[body], x, y, z) for body, x, y, z in points]
+    elapsed = time.time() - start
+    return faces, elapsed, oAnsoftApp.call_counts['GetFaceByPosition'], hfss.get_spatial_index_info()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--boxes', type=int, default=400)
+    parser.add_argument('--points', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0005)
+    args = parser.parse_args()
+
+    # A random point in the interior of a random side of a random box.
+    rng = np.random.RandomState(0)
+    n = int(np.ceil(np.sqrt(args.boxes)))
+    body = rng.randint(args.boxes, size=args.points)
+    side = rng.randint(6, size=args.points)
+    local = rng.uniform(0.05, 0.95, size=(args.points, 3))
+    local[np.arange(args.points), side % 3] = side // 3
+    origin = np.column_stack([2 * (body % n), 2 * (body // n), np.zeros(args.points)])
+    xyz = origin + local
+    points = [(b, x, y, z) for b, (x, y, z) in zip(body.tolist(), xyz.tolist())]
+
+    plain, tplain, cplain, _ = run(args, points, False)
+    indexed, tindexed, cindexed, info = run(args, points, True)
+    hfss.enable_spatial_index(False)
+
+    print('{p} lookups on {b} boxes:'.format(p=args.points, b=args.boxes))
+    print('  without index:  {t:.3f} s, {c} GetFaceByPosition calls'.format(t=tplain, c=cplain))
+    print('  with index:     {t:.3f} s, {c} GetFaceByPosition calls'.format(t=tindexed, c=cindexed))
+    print('  hit rate {r:.1%}, {a} ambiguous'.format(
+          r=info.hits / max(1, info.hits + info.misses), a=info.ambiguous))
+
+    if plain != indexed:
+        print('FAIL: the index gives different face IDs')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,227 @@
-from .hycohanz import *
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+The flat hycohanz namespace.
+
+The names below are resolved on first access, so that "import hycohanz" does
+not import every submodule, and in particular does not import NumPy until a
+function needing it is used.  Python versions without module __getattr__
+support (before 3.7) import everything up front from hycohanz.hycohanz.
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import importlib
+import sys
+import warnings
+
+warnings.simplefilter('default')
+
+# Submodule -> names it contributes to the flat namespace.  Keep this in
+# sync with the imports in hycohanz.hycohanz.
+_EXPORTS = (
+    ('appobject', ('setup_interface',)),
+    ('backend', ('register_backend',
+                 'available_backends')),
+    ('instrument', ('enable_instrumentation',
+                    'disable_instrumentation',
+                    'get_recorder')),
+    ('desktop', ('quit_application',
+                 'new_project',
+                 'open_project',
+                 'close_project_byname',
+                 'get_active_project',
+                 'close_project_byhandle',
+                 'close_current_project',
+                 'get_projects',
+                 'close_all_projects',
+                 'close_all_projects_except_current',
+                 'save_as_project')),
+    ('project', ('get_project_name',
+                 'set_active_design',
+                 'insert_design',
+                 'get_design',
+                 'delete_design',
+                 'get_top_design_list')),
+    ('property', ('add_property',
+                  'set_variable',
+                  'add_property_project')),
+    ('design', ('get_module',
+                'invalidate_module_cache',
+                'get_module_cache_info',
+                'reset_module_cache_info',
+                'set_active_editor',
+                'solve_optimetrics',
+                'solve')),
+    ('expression', ('Expression',
+                    'as_expr',
+                    'parse_expression',
+                    'get_parse_cache_info',
+                    'reset_parse_cache_info')),
+    ('attributes', ('Attributes',
+                    'MATERIAL_NAME')),
+    ('units', ('format_values',)),
+    ('box', ('Box',
+             'BoxArray',
+             'RectangleArray',
+             'SphereArray',
+             'CylinderArray')),
+    ('modeler3d', ('Ex',
+                   'get_matched_object_name',
+                   'assign_material',
+                   'create_rectangle',
+                   'create_EQbasedcurve',
+                   'create_circle',
+                   'create_ellipse',
+                   'create_sphere',
+                   'create_box',
+                   'create_box_new',
+                   'create_polyline',
+                   'get_selections',
+                   'move',
+                   'get_object_name',
+                   'copy',
+                   'get_object_id_by_name',
+                   'paste',
+                   'duplicate_along_line',
+                   'duplicate_around_axis',
+                   'imprint',
+                   'mirror',
+                   'sweep_along_vector',
+                   'rotate',
+                   'subtract',
+                   'unite',
+                   'intersect',
+                   'scale',
+                   'get_object_name_by_faceid',
+                   'import_model',
+                   'get_edge_by_position',
+                   'fillet',
+                   'separate_body',
+                   'delete',
+                   'split',
+                   'get_face_by_position',
+                   'uncover_faces',
+                   'connect',
+                   'cover_lines',
+                   'rename_part',
+                   'get_face_ids')),
+    ('querycache', ('query_cache',
+                    'enable_query_cache',
+                    'invalidate_query_cache',
+                    'get_query_cache_info',
+                    'reset_query_cache_info')),
+    ('scenegraph', ('scene_graph',
+                    'enable_scene_graph',
+                    'clear_scene_graph',
+                    'get_scene',
+                    'get_bounding_box',
+                    'get_face_centers')),
+    ('spatialindex', ('spatial_index',
+                      'enable_spatial_index',
+                      'locate_faces',
+                      'locate_edges',
+                      'get_spatial_index_info',
+                      'reset_spatial_index_info')),
+    ('importcache', ('import_cache',
+                     'enable_import_cache',
+                     'invalidate_import_cache',
+                     'get_import_cache_info',
+                     'reset_import_cache_info')),
+    ('chunking', ('selection_chunker',
+                  'split_selection',
+                  'enable_chunking',
+                  'get_chunk_stats',
+                  'get_chunking_info',
+                  'reset_chunking_info')),
+    ('materialqueue', ('material_queue',
+                       'DeferredMaterials',
+                       'enable_deferred_materials',
+                       'flush_materials',
+                       'get_material_queue_info',
+                       'reset_material_queue_info')),
+    ('material', ('add_material',
+                  'does_material_exist')),
+    ('analysis_setup', ('insert_frequency_sweep_linear_discrete',
+                        'insert_analysis_setup',
+                        'insert_frequency_sweep_linear_interpolating')),
+    ('optimetrics', ('insert_optimetrics_setup',)),
+    ('boundarysetup', ('assign_perfect_e',
+                       'assign_radiation',
+                       'assign_perfect_h',
+                       'assign_waveport_multimode',
+                       'assign_master',
+                       'assign_slave',
+                       'assign_floquet',
+                       'assign_lumpedRLC',
+                       'assign_box_master_and_slave',
+                       'assign_box_floquet')),
+    ('fieldscalculator', ('enter_vol',
+                          'calc_op',
+                          'clc_eval',
+                          'enter_qty',
+                          'get_top_entry_value',
+                          'get_top_entry_values')),
+    ('report_and_export', ('create_report',
+                           'export_to_file')),
+    ('batch', ('BatchEditor',)),
+    ('bulk', ('create_boxes',
+              'create_rectangles',
+              'create_circles',
+              'create_spheres')),
+    ('booleans', ('plan_unite',
+                  'unite_many',
+                  'subtract_many',
+                  'get_boolean_info',
+                  'reset_boolean_info')),
+    ('evaluator', ('Evaluator',
+                   'evaluate_expression',
+                   'evaluate_grid')),
+    ('eqcurve', ('EquationCurve',)),
+    ('geometrydiff', ('Part',
+                      'Edit',
+                      'box_part',
+                      'sphere_part',
+                      'rectangle_part',
+                      'circle_part',
+                      'diff_geometry',
+                      'GeometryModel')),
+    ('lattice', ('plan_duplication',
+                 'linear_array',
+                 'rectangular_array',
+                 'circular_array')),
+    ('executor', ('ComExecutor',)),
+    ('pool', ('DesktopPool',
+              'Lease')),
+    ('contextmanagers', ('App',
+                         'OpenProject',
+                         'NewProject',
+                         'SetActiveEditor',
+                         'SetActiveDesign',
+                         'InsertDesign',
+                         'GetActiveProject',
+                         'GetProjects',
+                         'GetModule')),
+)
+
+_lazy = dict((name, modulename) for modulename, names in _EXPORTS for name in names)
+
+__all__ = [str(name) for modulename, names in _EXPORTS for name in names]
+
+_submodules = set(modulename for modulename, names in _EXPORTS)
+_submodules.update(['hycohanz', 'simulator'])
+
+if sys.version_info < (3, 7):
+    from hycohanz.hycohanz import *
+else:
+    def __getattr__(name):
+        if name in _submodules:
+            return importlib.import_module('hycohanz.' + name)
+        try:
+            modulename = _lazy[name]
+        except KeyError:
+            raise AttributeError('module {m!r} has no attribute {n!r}'.format(m=__name__, n=name))
+        value = getattr(importlib.import_module('hycohanz.' + modulename), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
@@ -7,6 +7,8 @@ At last count there were 2 functions implemented out of 20.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+from hycohanz.design import get_module
+
 
 def insert_frequency_sweep_linear_discrete(oDesign,
                                            setupname,
@@ -60,7 +62,7 @@ def insert_frequency_sweep_linear_discrete(oDesign,
     None
 
     """
-    oAnalysisSetup = oDesign.GetModule("AnalysisSetup")
+    oAnalysisSetup = get_module(oDesign, "AnalysisSetup")
     return oAnalysisSetup.InsertFrequencySweep(setupname,
                                                ["NAME:" + sweepname,
                                                 "IsEnabled:=", IsEnabled,
@@ -101,7 +103,7 @@ def insert_analysis_setup(oDesign,
     """
     Insert an HFSS analysis setup.
     """
-    oAnalysisSetup = oDesign.GetModule("AnalysisSetup")
+    oAnalysisSetup = get_module(oDesign, "AnalysisSetup")
     oAnalysisSetup.InsertSetup("HfssDriven",
                                ["NAME:" + Name,
                                 "Frequency:=", str(Frequency) + "GHz",
@@ -156,7 +158,7 @@ def insert_frequency_sweep_linear_interpolating(oDesign,
                                                 InterpDerivTolerance=0.2,
                                                 UseFullBasis=True,
                                                 EnforcePassivity=False):
-    oAnalysisSetup = oDesign.GetModule("AnalysisSetup")
+    oAnalysisSetup = get_module(oDesign, "AnalysisSetup")
     return oAnalysisSetup.InsertFrequencySweep(setupname,
                                                ["NAME:" + sweepname,
                                                 "IsEnabled:=", IsEnabled,
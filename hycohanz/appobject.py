@@ -8,12 +8,22 @@ At last count there were 1 functions implemented out of 15.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
-import win32com.client
+from hycohanz.backend import create_app
+from hycohanz.instrument import instrument
 
-def setup_interface():
+def setup_interface(backend=None, **options):
     """
     Set up the COM interface to the running HFSS process.
     
+    Parameters
+    ----------
+    backend : str or None
+        Name of the backend providing the application object, for example 
+        "com" or "simulated".  See hycohanz.backend for details.
+    **options
+        Backend-specific options, for example latency=0.01 for the 
+        "simulated" backend.
+    
     Returns
     -------
     oAnsoftApp : pywin32 COMObject
@@ -27,11 +37,11 @@ def setup_interface():
     >>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
     
     """
-    # I'm still looking for a better way to do this.  This attaches to an 
-    # existing HFSS process instead of creating a new one.  I would highly 
-    # prefer that a new process is created.  Apparently 
+    # I'm still looking for a better way to do this.  With the "com" backend 
+    # this attaches to an existing HFSS process instead of creating a new 
+    # one.  I would highly prefer that a new process is created.  Apparently 
     # win32com.client.DispatchEx() doesn't work here either.
-    oAnsoftApp = win32com.client.Dispatch('AnsoftHfss.HfssScriptInterface')
+    oAnsoftApp = instrument(create_app(backend, **options))
 
     oDesktop = oAnsoftApp.GetAppDesktop()
 
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Attributes of 3D Modeler primitives.
+
+Every primitive creator sends an "NAME:Attributes" array along with its
+parameters.  Apart from the object name, that array is usually identical
+for thousands of objects.  An Attributes object holds the style of a
+primitive (color, material, ...) and serializes everything but the name
+once.  Attributes objects are immutable and interned: constructing one
+with the same values, of the same types, returns the same object, so they
+can be compared, hashed and used as dict keys cheaply.  Values that are
+equal but serialize differently, such as 0, 0.0 and False, make different
+objects.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> copper = hfss.Attributes(Color=(255, 128, 0), MaterialValue='"copper"')
+>>> for i in range(1000):
+...     hfss.create_box(oEditor, 2*i, 0, 0, 1, 1, 1, attributes=copper)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+# Serialization schemas: (array key, field, whether to convert to str).
+# Circles and ellipses use the MaterialName/Solveinside spelling and
+# send the transparency as a string.
+MATERIAL_VALUE = 'MaterialValue'
+MATERIAL_NAME = 'MaterialName'
+
+_SCHEMAS = {
+    MATERIAL_VALUE: (("Flags:=", 'Flags', False),
+                     ("Color:=", 'Color', False),
+                     ("Transparency:=", 'Transparency', False),
+                     ("PartCoordinateSystem:=", 'PartCoordinateSystem', False),
+                     ("UDMId:=", 'UDMId', False),
+                     ("MaterialValue:=", 'MaterialValue', False),
+                     ("SolveInside:=", 'SolveInside', False)),
+    MATERIAL_NAME: (("Flags:=", 'Flags', False),
+                    ("Color:=", 'Color', False),
+                    ("Transparency:=", 'Transparency', True),
+                    ("PartCoordinateSystem:=", 'PartCoordinateSystem', False),
+                    ("MaterialName:=", 'MaterialValue', False),
+                    ("Solveinside:=", 'SolveInside', False)),
+}
+
+_FIELDS = ('Flags', 'Color', 'Transparency', 'PartCoordinateSystem', 'UDMId',
+           'MaterialValue', 'SolveInside')
+
+# Interned Attributes by their values, and by the arguments they were
+# constructed from, so that repeated construction is a dict lookup.  Keys
+# are typed, see _typed().
+_interned = {}
+_MAX_INTERNED = 4096
+
+def _typed(value):
+    """
+    Return a key of a value that tells apart equal values of different
+    types, e.g. 0, 0.0 and False, which HFSS is sent differently.
+    """
+    if isinstance(value, (tuple, list)):
+        return (type(value), tuple(_typed(v) for v in value))
+    return (type(value), value)
+
+def format_color(Color):
+    """
+    Format an RGB color the way HFSS expects it.
+
+    Parameters
+    ----------
+    Color : tuple of length=3 or str
+        RGB components, or an already formatted "(r g b)" string.
+
+    Returns
+    -------
+    str
+        The color as "(r g b)".
+
+    """
+    if isinstance(Color, string_types):
+        return Color
+    return "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2])
+
+class Attributes(object):
+    """
+    The style of a 3D Modeler primitive.
+
+    Parameters
+    ----------
+    Flags : str
+        Flags associated with the object.  See HFSS Scripting Guide for
+        details.
+    Color : tuple of length=3 or str
+        RGB components of the object color.
+    Transparency : float between 0 and 1
+        Fractional transparency.  0 is opaque and 1 is transparent.
+    PartCoordinateSystem : str
+        The name of the coordinate system in which the object is drawn.
+    UDMId : str
+        See HFSS documentation for explanation.
+    MaterialValue : str
+        Name of the material to assign to the object.  Name must be
+        surrounded by double quotes.
+    SolveInside : bool
+        Whether to mesh the interior of the object and solve for the fields
+        inside.
+
+    """
+    __slots__ = _FIELDS + ('_key', '_typed', '_hash', '_tails')
+
+    def __new__(cls, Flags='',
+                Color=(132, 132, 193),
+                Transparency=0,
+                PartCoordinateSystem='Global',
+                UDMId='',
+                MaterialValue='"vacuum"',
+                SolveInside=True):
+        args = _typed((Flags, Color, Transparency, PartCoordinateSystem, UDMId,
+                       MaterialValue, SolveInside))
+        try:
+            return _interned[args]
+        except (KeyError, TypeError):
+            pass
+
+        key = (Flags, format_color(Color), Transparency, PartCoordinateSystem, UDMId,
+               MaterialValue, SolveInside)
+        typed = _typed(key)
+        self = _interned.get(typed)
+        if self is None:
+            self = object.__new__(cls)
+            for field, value in zip(_FIELDS, key):
+                object.__setattr__(self, field, value)
+            object.__setattr__(self, '_key', key)
+            object.__setattr__(self, '_typed', typed)
+            object.__setattr__(self, '_hash', hash(typed))
+            object.__setattr__(self, '_tails', {})
+        if len(_interned) >= _MAX_INTERNED:
+            _interned.clear()
+        _interned[typed] = self
+        try:
+            _interned[args] = self
+        except TypeError:
+            # Unhashable arguments, e.g. a value that is a dict.
+            pass
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Attributes objects are immutable; use replace()')
+
+    def __eq__(self, other):
+        return isinstance(other, Attributes) and self._typed == other._typed
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (Attributes, self._key)
+
+    def __repr__(self):
+        return 'Attributes({a})'.format(a=', '.join('{f}={v!r}'.format(f=f, v=v)
+                                                    for f, v in zip(_FIELDS, self._key)))
+
+    def replace(self, **changes):
+        """
+        Return the Attributes with some fields changed.
+        """
+        values = dict(zip(_FIELDS, self._key))
+        values.update(changes)
+        return Attributes(**values)
+
+    def tail(self, schema=MATERIAL_VALUE):
+        """
+        Return the serialized attributes following the name.
+
+        The list is built once per schema and shared; do not modify it.
+
+        Parameters
+        ----------
+        schema : str
+            MATERIAL_VALUE, or MATERIAL_NAME for circles and ellipses.
+
+        Returns
+        -------
+        list
+
+        """
+        try:
+            return self._tails[schema]
+        except KeyError:
+            pass
+        tail = []
+        for arraykey, field, as_str in _SCHEMAS[schema]:
+            value = getattr(self, field)
+            tail += [arraykey, str(value) if as_str else value]
+        self._tails[schema] = tail
+        return tail
+
+    def array(self, Name, schema=MATERIAL_VALUE):
+        """
+        Return the "NAME:Attributes" array of an object.
+
+        Parameters
+        ----------
+        Name : str
+            The requested name of the object.
+        schema : str
+            MATERIAL_VALUE, or MATERIAL_NAME for circles and ellipses.
+
+        Returns
+        -------
+        list
+
+        """
+        return ["NAME:Attributes", "Name:=", Name] + self.tail(schema)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Selection of the object that stands behind the HFSS application handle.
+
+Every hycohanz function talks to HFSS through the handles returned by
+setup_interface().  Normally those are pywin32 COM objects, but any object
+exposing the same methods works.  A backend is simply a callable that
+returns such an application object.  Two backends are registered:
+
+- "com" dispatches the real HFSS through pywin32 (Windows only).
+- "simulated" returns the in-process stand-in from hycohanz.simulator,
+  which makes it possible to run and profile scripts without HFSS.
+
+The default backend is "com", unless the HYCOHANZ_BACKEND environment
+variable names another one.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface(backend='simulated', latency=0.001)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import os
+
+from hycohanz.instrument import unwrap
+
+DEFAULT_BACKEND = 'com'
+
+_backends = {}
+
+def register_backend(name, factory):
+    """
+    Register a backend under the given name.
+
+    Parameters
+    ----------
+    name : str
+        Name by which the backend is selected.
+    factory : callable
+        Called with the keyword options given to setup_interface(), it must
+        return an application object providing GetAppDesktop().
+
+    Returns
+    -------
+    None
+
+    """
+    _backends[name] = factory
+
+def available_backends():
+    """
+    Return the names of the registered backends.
+
+    Returns
+    -------
+    list of str
+        Sorted backend names.
+
+    """
+    return sorted(_backends)
+
+def backend_name(name=None):
+    """
+    Return the name of the backend that get_backend() would select.
+
+    Parameters
+    ----------
+    name : str or None
+        Backend name.  If None, the HYCOHANZ_BACKEND environment variable
+        is consulted, falling back to DEFAULT_BACKEND.
+
+    Returns
+    -------
+    str
+        The backend name.
+
+    """
+    if name is None:
+        name = os.environ.get('HYCOHANZ_BACKEND', DEFAULT_BACKEND)
+    return name
+
+def get_backend(name=None):
+    """
+    Look up a backend factory.
+
+    Parameters
+    ----------
+    name : str or None
+        Backend name.  If None, the HYCOHANZ_BACKEND environment variable
+        is consulted, falling back to DEFAULT_BACKEND.
+
+    Returns
+    -------
+    callable
+        The backend factory.
+
+    Raises
+    ------
+    ValueError
+        If no backend is registered under that name.
+
+    """
+    name = backend_name(name)
+
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError('Unknown backend {n!r}.  Available backends: {a}'.format(
+                         n=name, a=', '.join(available_backends())))
+
+def create_app(name=None, **options):
+    """
+    Create an application object using the given backend.
+
+    Parameters
+    ----------
+    name : str or None
+        Backend name, see get_backend().
+    **options
+        Passed to the backend factory.
+
+    Returns
+    -------
+    oAnsoftApp
+        The application object.
+
+    """
+    return get_backend(name)(**options)
+
+def handle_key(handle):
+    """
+    Return a hashable key identifying the HFSS object behind a handle.
+
+    pywin32 may return a different Python wrapper each time the same COM
+    object is obtained, but all wrappers share the underlying _oleobj_.
+    Proxies such as instrumented handles and BatchEditor are looked through.
+
+    Parameters
+    ----------
+    handle : pywin32 COMObject
+        The handle to identify.
+
+    Returns
+    -------
+    object
+        A key that compares equal for handles of the same HFSS object.
+
+    """
+    handle = unwrap(handle)
+    return getattr(handle, '_oleobj_', handle)
+
+def _com_backend(progid='AnsoftHfss.HfssScriptInterface', new_process=False):
+    # Imported here so that hycohanz can be imported where pywin32 is not
+    # installed.
+    import win32com.client
+
+    if new_process:
+        return win32com.client.DispatchEx(progid)
+    else:
+        return win32com.client.Dispatch(progid)
+
+def _simulated_backend(**options):
+    from hycohanz.simulator import SimulatedApp
+
+    return SimulatedApp(**options)
+
+register_backend('com', _com_backend)
+register_backend('simulated', _simulated_backend)
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Batched execution of 3D Modeler commands.
+
+Every hycohanz modeler function makes one cross-process COM call.  Inside a
+BatchEditor, the same functions only record the command and its argument
+arrays.  When the batch is run, the recorded commands are compiled into one
+IronPython script that HFSS executes through a single oDesktop.RunScript()
+call, and the values returned by the commands (mostly object names) are
+read back into Python.
+
+While the batch is pending, each command returns a BatchResult placeholder.
+Placeholders are strings, so they can be passed on to later commands, e.g.
+as part of a selection list; they are replaced by the actual values when
+the script runs.  After the batch has run, BatchEditor.resolve() turns
+placeholders into values.
+
+Query commands (those whose name starts with "Get") need the model to be
+up to date: they run the pending batch first and are then passed straight
+to the editor.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> with hfss.BatchEditor(oDesktop, oEditor) as oBatch:
+...     boxes = [hfss.create_box(oBatch, 2*i, 0, 0, 1, 1, 1) for i in range(1000)]
+...     hfss.move(oBatch, boxes, 0, 0, 5)
+>>> names = oBatch.resolve(boxes)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import ast
+import io
+import itertools
+import json
+import os
+import re
+import tempfile
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+_batch_ids = itertools.count(1)
+
+_TOKEN = re.compile(r'@@hycohanz(\d+):(\d+)@@')
+
+class BatchResult(str):
+    """
+    Placeholder for the value returned by a batched command.
+
+    The string value is a token that the generated script replaces by the
+    actual value.  Once the batch has run, the value is available as the
+    value attribute.
+    """
+    def __new__(cls, batch, index):
+        self = str.__new__(cls, '@@hycohanz{b}:{i}@@'.format(b=batch.id, i=index))
+        self.batch = batch
+        self.index = index
+        return self
+
+    @property
+    def value(self):
+        try:
+            return self.batch.results[self.index]
+        except KeyError:
+            raise RuntimeError('The batch containing {r} has not been run yet'.format(r=str(self)))
+
+def _literal(value):
+    """
+    Return IronPython source code for an HFSS command argument.
+    """
+    if isinstance(value, bool) or value is None:
+        return repr(value)
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, string_types):
+        text = json.dumps(value)
+        if any(ord(c) > 127 for c in value):
+            return 'u' + text
+        return text
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_literal(item) for item in value) + ']'
+    raise TypeError('Cannot batch an argument of type {t}'.format(t=type(value).__name__))
+
+# The generated script must run both under the IronPython 2.7 embedded in
+# HFSS and under CPython, which executes it for the simulated backend.
+_PROLOGUE = '''\
+# Generated by hycohanz.batch
+import re
+try:
+    oDesktop
+except NameError:
+    import ScriptEnv
+    ScriptEnv.Initialize("Ansoft.ElectronicsDesktop")
+oProject = {project}
+oDesign = {design}
+oEditor = oDesign.SetActiveEditor("3D Modeler")
+_results = {{}}
+_token = re.compile(r"@@hycohanz{batch}:(\\d+)@@")
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        return ",".join([str(item) for item in value])
+    return str(value)
+
+def _sub(value):
+    if isinstance(value, list):
+        return [_sub(item) for item in value]
+    if isinstance(value, type("")) and "@@" in value:
+        return _token.sub(lambda m: _text(_results[int(m.group(1))]), value)
+    return value
+
+def _encode(value):
+    if isinstance(value, (list, tuple)) or type(value).__name__.endswith("[]"):
+        return "[" + ", ".join([_encode(item) for item in value]) + "]"
+    if value is None or isinstance(value, (bool, int, float)):
+        return repr(value)
+    return repr(str(value))
+
+def _call(index, method, *args):
+    _results[index] = getattr(oEditor, method)(*[_sub(arg) for arg in args])
+
+try:
+'''
+
+_EPILOGUE = '''\
+finally:
+    _out = open({path}, "w")
+    for _index in sorted(_results):
+        _out.write(str(_index) + "\\t" + _encode(_results[_index]) + "\\n")
+    _out.close()
+'''
+
+class BatchEditor(object):
+    """
+    Context manager that batches 3D Modeler commands into one script.
+
+    Pass the BatchEditor instead of oEditor to hycohanz modeler functions.
+    The pending commands are run when the with-block exits normally, when
+    run() is called, before any query command, and whenever max_commands
+    commands are pending.
+
+    Parameters
+    ----------
+    oDesktop : pywin32 COMObject
+        The HFSS desktop object used to run the script.
+    oEditor : pywin32 COMObject
+        The HFSS editor that the commands apply to.  Query commands are
+        sent to it directly.
+    projectname : str or None
+        Name of the project containing the editor.  If None, the script
+        uses the active project.
+    designname : str or None
+        Name of the design containing the editor.  If None, the script
+        uses the active design.
+    max_commands : int or None
+        Run the batch automatically once this many commands are pending.
+    scriptdir : str or None
+        Directory for the generated script and its results file.  Defaults
+        to the system temporary directory.
+    keep_script : bool
+        If True, the generated scripts are not deleted after they run.
+
+    Attributes
+    ----------
+    results : dict
+        Values returned by the commands that have run, by command index.
+    scripts_run : int
+        Number of RunScript() round-trips made so far.
+
+    """
+    def __init__(self, oDesktop, oEditor,
+                 projectname=None,
+                 designname=None,
+                 max_commands=None,
+                 scriptdir=None,
+                 keep_script=False):
+        self.oDesktop = oDesktop
+        self.oEditor = oEditor
+        self.projectname = projectname
+        self.designname = designname
+        self.max_commands = max_commands
+        self.scriptdir = scriptdir
+        self.keep_script = keep_script
+        self.id = next(_batch_ids)
+        self.results = {}
+        self.scripts_run = 0
+        self._pending = []
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        if typ is None:
+            self.run()
+        else:
+            self._pending = []
+
+    def __getattr__(self, method):
+        if not method[:1].isupper():
+            raise AttributeError(method)
+
+        if method.startswith('Get'):
+            def query(*args):
+                self.run()
+                return getattr(self.oEditor, method)(*self.resolve(list(args)))
+            return query
+
+        def command(*args):
+            index = self._count
+            self._count += 1
+            self._pending.append((index, method, self.resolve(list(args))))
+            result = BatchResult(self, index)
+            if self.max_commands is not None and len(self._pending) >= self.max_commands:
+                self.run()
+            return result
+
+        return command
+
+    @property
+    def _hycohanz_target_(self):
+        return self.oEditor
+
+    @property
+    def pending(self):
+        """
+        Number of recorded commands that have not been run yet.
+        """
+        return len(self._pending)
+
+    def resolve(self, value):
+        """
+        Replace placeholders of commands that have run by their values.
+
+        Parameters
+        ----------
+        value : str, BatchResult, list, or tuple
+            A value possibly containing placeholders.  Lists and tuples are
+            processed recursively.
+
+        Returns
+        -------
+        The value with the placeholders of commands that have run replaced.
+        Placeholders of pending commands are left as they are.
+
+        """
+        if isinstance(value, BatchResult) and value.batch is self and value.index in self.results:
+            return self.results[value.index]
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self.resolve(item) for item in value)
+        if isinstance(value, string_types) and '@@' in value:
+            return _TOKEN.sub(self._token_text, value)
+        return value
+
+    def _token_text(self, match):
+        batch, index = int(match.group(1)), int(match.group(2))
+        if batch != self.id or index not in self.results:
+            return match.group(0)
+        value = self.results[index]
+        if isinstance(value, (list, tuple)):
+            return ','.join(str(item) for item in value)
+        return str(value)
+
+    def compile(self, resultspath, commands=None):
+        """
+        Generate the IronPython script for the pending commands.
+
+        Parameters
+        ----------
+        resultspath : str
+            File to which the script writes the command results.
+        commands : list or None
+            (index, method, arguments) tuples to compile.  Defaults to the
+            pending commands.
+
+        Returns
+        -------
+        str
+            The script source.
+
+        """
+        if self.projectname is None:
+            project = 'oDesktop.GetActiveProject()'
+        else:
+            project = 'oDesktop.SetActiveProject({n})'.format(n=_literal(self.projectname))
+        if self.designname is None:
+            design = 'oProject.GetActiveDesign()'
+        else:
+            design = 'oProject.SetActiveDesign({n})'.format(n=_literal(self.designname))
+
+        lines = [_PROLOGUE.format(project=project, design=design, batch=self.id)]
+        if commands is None:
+            commands = self._pending
+        for index, method, args in commands:
+            lines.append('    _call({i}, {m}{a})\n'.format(
+                         i=index, m=_literal(method),
+                         a=''.join(', ' + _literal(arg) for arg in args)))
+        lines.append(_EPILOGUE.format(path=_literal(resultspath)))
+        return ''.join(lines)
+
+    def run(self):
+        """
+        Run the pending commands in one RunScript() call.
+
+        Returns
+        -------
+        list
+            The values returned by the commands that were run.
+
+        """
+        if not self._pending:
+            return []
+
+        pending, self._pending = self._pending, []
+        fd, scriptpath = tempfile.mkstemp(prefix='hycohanz_batch_', suffix='.py', dir=self.scriptdir)
+        os.close(fd)
+        resultspath = scriptpath[:-3] + '_results.txt'
+
+        try:
+            source = self.compile(resultspath, pending)
+            with io.open(scriptpath, 'w', encoding='utf-8') as f:
+                f.write(source)
+
+            self.scripts_run += 1
+            try:
+                self.oDesktop.RunScript(scriptpath)
+            finally:
+                if os.path.exists(resultspath):
+                    with io.open(resultspath, encoding='utf-8') as f:
+                        for line in f:
+                            index, value = line.rstrip('\n').split('\t', 1)
+                            self.results[int(index)] = ast.literal_eval(value)
+        finally:
+            for path in (scriptpath, resultspath):
+                if os.path.exists(path) and not (self.keep_script and path == scriptpath):
+                    os.remove(path)
+
+        return [self.results.get(index) for index, method, args in pending]
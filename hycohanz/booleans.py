@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Boolean operations on many parts, planned to take few and balanced steps.
+
+Scripts that unite or subtract parts in a loop, e.g.
+
+>>> for part in parts[1:]:
+...     hfss.unite(oEditor, [parts[0], part])
+
+make HFSS re-evaluate an ever growing body, once per part.  The functions
+in this module plan the operations instead:
+
+- unite_many() unites all parts in one Unite command.  If the operands
+  have to be split up, because of max_operands or because the comma-joined
+  selection would be longer than max_length characters, the parts are
+  united as a balanced reduction tree:  groups of parts first, then groups
+  of the group results, and so on, so that every body is combined with
+  bodies of similar size.
+- subtract_many() unites the tool parts that way and subtracts the result
+  from the blank parts in a single Subtract command.
+
+Both count the commands they issue, and the commands the equivalent loop
+of pairwise operations would have issued; see get_boolean_info().
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> body = hfss.unite_many(oEditor, parts, max_operands=16)
+>>> hfss.get_boolean_info()
+BooleanInfo(operations=..., naive_operations=...)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+from collections import namedtuple
+
+from hycohanz.modeler3d import unite, subtract
+from hycohanz.chunking import MAX_SELECTION_LENGTH
+
+BooleanInfo = namedtuple('BooleanInfo', ['operations', 'naive_operations'])
+
+def _groups(partlist, max_operands, max_length):
+    """
+    Split parts into as few groups of nearly equal size as the limits
+    allow, keeping their order.
+    """
+    n = len(partlist)
+    total = sum(len(name) + 1 for name in partlist)
+    ngroups = 1
+    if max_operands is not None:
+        ngroups = max(ngroups, -(-n // max_operands))
+    if max_length is not None:
+        ngroups = max(ngroups, -(-total // (max_length + 1)))
+    while True:
+        bounds = [n * k // ngroups for k in range(ngroups + 1)]
+        groups = [partlist[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        if max_length is None or all(len(','.join(group)) <= max_length or len(group) == 1
+                                     for group in groups):
+            return groups
+        ngroups += 1
+
+def plan_unite(partlist, max_operands=None, max_length=MAX_SELECTION_LENGTH):
+    """
+    Plan the Unite commands that unite parts as a balanced reduction tree.
+
+    Parameters
+    ----------
+    partlist : list of str
+        Names of the parts to unite.
+    max_operands : int or None
+        Maximum number of parts per Unite command.  None means no limit.
+    max_length : int or None
+        Maximum length of the comma-joined selection of a command.  None
+        means no limit.
+
+    Returns
+    -------
+    list of list of str
+        The selections of the Unite commands, in the order they are to be
+        issued.  Each command leaves its result in its first part, and the
+        result of the last command is partlist[0].
+
+    """
+    if max_operands is not None and max_operands < 2:
+        raise ValueError('max_operands must be at least 2')
+
+    steps = []
+    level = list(partlist)
+    while len(level) > 1:
+        groups = _groups(level, max_operands, max_length)
+        if len(groups) == len(level):
+            raise ValueError('part names are too long for max_length')
+        steps += [group for group in groups if len(group) > 1]
+        level = [group[0] for group in groups]
+    return steps
+
+class BooleanPlanner(object):
+    """
+    Issue planned boolean operations and count them.
+
+    Attributes
+    ----------
+    max_operands : int or None
+        Default maximum number of parts per command.
+    max_length : int or None
+        Default maximum length of a comma-joined selection.
+    operations : int
+        Number of commands issued.
+    naive_operations : int
+        Number of commands the equivalent loops of pairwise operations
+        would have issued.
+
+    """
+    def __init__(self, max_operands=None, max_length=MAX_SELECTION_LENGTH):
+        self.max_operands = max_operands
+        self.max_length = max_length
+        self.operations = 0
+        self.naive_operations = 0
+
+    def _limits(self, max_operands, max_length):
+        return (self.max_operands if max_operands is None else max_operands,
+                self.max_length if max_length is None else max_length)
+
+    def unite(self, oEditor, partlist, KeepOriginals=False,
+              max_operands=None, max_length=None):
+        """
+        Unite parts; see unite_many().
+        """
+        partlist = list(partlist)
+        if not partlist:
+            raise ValueError('partlist must not be empty')
+        max_operands, max_length = self._limits(max_operands, max_length)
+        steps = plan_unite(partlist, max_operands, max_length)
+        united = set()
+        for step in steps:
+            # Only the commands on original parts have originals to keep.
+            keep = KeepOriginals and not united.intersection(step)
+            unite(oEditor, step, KeepOriginals=keep)
+            united.add(step[0])
+        self.operations += len(steps)
+        self.naive_operations += max(0, len(partlist) - 1)
+        return partlist[0]
+
+    def subtract(self, oEditor, blanklist, toollist, KeepOriginals=False,
+                 max_operands=None, max_length=None):
+        """
+        Subtract parts; see subtract_many().
+        """
+        blanklist = list(blanklist)
+        toollist = list(toollist)
+        if not blanklist:
+            raise ValueError('blanklist must not be empty')
+        if not toollist:
+            return blanklist[0]
+        max_operands, max_length = self._limits(max_operands, max_length)
+        if KeepOriginals:
+            # Uniting the tools would consume them; subtract them in groups.
+            tools = _groups(toollist, max_operands, max_length)
+        else:
+            tools = [[self.unite(oEditor, toollist, False, max_operands, max_length)]]
+            self.naive_operations -= max(0, len(toollist) - 1)
+        blanks = _groups(blanklist, max_operands, max_length)
+        for toolgroup in tools:
+            for j, blankgroup in enumerate(blanks):
+                # The tool is needed again for the next group of blanks.
+                last = j == len(blanks) - 1
+                subtract(oEditor, blankgroup, toolgroup,
+                         KeepOriginals=KeepOriginals or not last)
+                self.operations += 1
+        self.naive_operations += len(toollist)
+        return blanklist[0]
+
+    def info(self):
+        """
+        Return the counts of issued and naive commands.
+
+        Returns
+        -------
+        BooleanInfo
+            Named tuple (operations, naive_operations).
+
+        """
+        return BooleanInfo(self.operations, self.naive_operations)
+
+    def reset_info(self):
+        """
+        Reset the command counts.
+        """
+        self.operations = 0
+        self.naive_operations = 0
+
+boolean_planner = BooleanPlanner()
+
+def unite_many(oEditor, partlist, KeepOriginals=False, max_operands=None, max_length=None):
+    """
+    Unite many parts with as few and as balanced Unite commands as
+    possible.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    partlist : list of str
+        Names of the parts to unite.
+    KeepOriginals : bool
+        Whether to keep the original parts.
+    max_operands : int or None
+        Maximum number of parts per command.  If None, the default of the
+        planner (no limit) is used.
+    max_length : int or None
+        Maximum length of the comma-joined selection of a command.  If
+        None, the default of the planner, MAX_SELECTION_LENGTH, is used.
+
+    Returns
+    -------
+    objname : str
+        Name of the united part, partlist[0].
+
+    Raises
+    ------
+    ValueError
+        If partlist is empty.
+
+    """
+    return boolean_planner.unite(oEditor, partlist, KeepOriginals, max_operands, max_length)
+
+def subtract_many(oEditor, blanklist, toollist, KeepOriginals=False,
+                  max_operands=None, max_length=None):
+    """
+    Subtract many tool parts from blank parts by uniting the tools first
+    and subtracting them all at once.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    blanklist : list of str
+        Names of the parts to subtract from.
+    toollist : list of str
+        Names of the parts to subtract.
+    KeepOriginals : bool
+        Whether to keep the tool parts.  The tools cannot be united then,
+        and are subtracted in groups instead.
+    max_operands : int or None
+        Maximum number of parts per command.  If None, the default of the
+        planner (no limit) is used.
+    max_length : int or None
+        Maximum length of a comma-joined selection.  If None, the default
+        of the planner, MAX_SELECTION_LENGTH, is used.
+
+    Returns
+    -------
+    objname : str
+        Name of the first blank part.  Nothing is subtracted if toollist
+        is empty.
+
+    Raises
+    ------
+    ValueError
+        If blanklist is empty.
+
+    """
+    return boolean_planner.subtract(oEditor, blanklist, toollist, KeepOriginals,
+                                    max_operands, max_length)
+
+def get_boolean_info():
+    """
+    Return the number of boolean commands issued by unite_many() and
+    subtract_many(), and the number a loop of pairwise operations would
+    have issued:  one Unite per part after the first, and one Subtract per
+    tool part.
+
+    Returns
+    -------
+    BooleanInfo
+        Named tuple (operations, naive_operations).
+
+    """
+    return boolean_planner.info()
+
+def reset_boolean_info():
+    """
+    Reset the boolean command counts.
+
+    Returns
+    -------
+    None
+
+    """
+    boolean_planner.reset_info()
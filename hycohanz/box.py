@@ -2,6 +2,10 @@
 # author: JiemingWang
 """
 Build a class named box and it includes some points that could be used in HFSS scripts.
+
+BoxArray, RectangleArray, SphereArray and CylinderArray hold many shapes in
+contiguous NumPy arrays and compute the points of all of them at once;
+units are appended only when strings are returned.
 """
 
 import numpy as np
@@ -89,3 +93,421 @@ class Box():
         return npchar.add(edge_point.astype('str'), self.unit)
 
 
+# Corner offsets of the 8 vertexes, in the order of Box.vertexes.
+
+_CORNERS = np.right_shift(np.bitwise_and(np.arange(8)[:, None], np.array([1, 2, 4])),
+                          np.arange(3)).astype(float)
+
+# Box faces and the vertexes defining them, as in Box.get_face_point() and
+# Box.get_face_edge().
+
+BOX_FACES = ('left', 'right', 'up', 'down', 'front', 'rear')
+
+_FACE_DIAGONALS = np.array([(1, 4), (3, 6), (4, 7), (0, 3), (1, 7), (0, 6)])
+
+_FACE_EDGES = np.array([[5, 4, 5, 0],
+                        [7, 6, 7, 3],
+                        [4, 6, 4, 5],
+                        [0, 2, 0, 1],
+                        [5, 7, 5, 1],
+                        [4, 6, 4, 0]])
+
+# In-plane (u, v) axes of rectangles and the radial axes of cylinders, by
+# normal axis.
+
+_PLANES = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}
+
+_AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+
+def _format(values, unit):
+
+    # Imported here so that the arrays do not depend on the unit module
+    # until strings are needed.
+
+    from hycohanz.units import format_values
+    return format_values(values, unit)
+
+
+def _rows(values, columns):
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1 and columns == 1:
+        values = values[:, None]
+    values = np.atleast_2d(values)
+    if values.shape[1:] != (columns,):
+        raise ValueError('expected an array of shape (N, {c}), got {s}'.format(
+                         c=columns, s=values.shape))
+    return values
+
+
+def _face_index(faces, direction):
+    try:
+        return faces.index(direction)
+    except ValueError:
+        raise NameError(direction)
+
+
+class BoxArray(object):
+    def __init__(self, names, unit, start_points, box_sizes):
+
+        '''
+
+        Many boxes, stored as contiguous arrays.
+
+        :param names: sequence of str or None
+            The box names in HFSS, one per box.
+        :param unit: str
+            The unit of x,y and z axes.
+        :param start_points: a float array of shape (N, 3).
+        :param box_sizes: a float array of shape (N, 3).
+            The parameters of the N boxes, as for Box.
+        '''
+
+        # Get the left-rear-down point as start point,
+        # then the box sizes are all positive.
+
+        start_points = _rows(start_points, 3)
+        box_sizes = _rows(box_sizes, 3)
+        self.start = start_points + np.minimum(box_sizes, 0)
+        self.size = np.abs(box_sizes)
+        self.names = None if names is None else list(names)
+        self.unit = unit
+
+    def __len__(self):
+        return len(self.start)
+
+    @property
+    def vertexes(self):
+
+        '''
+        The 8 vertexes of every box, ordered as in Box.vertexes.
+        :return: a float numpy array, size=(N,8,3)
+        '''
+
+        return self.start[:, None, :] + _CORNERS * self.size[:, None, :]
+
+    def face_points(self):
+
+        '''
+        Get a point in every face of every box.
+        :return: a float numpy array, size=(N,6,3)
+            The face centers, in the order of BOX_FACES.
+        '''
+
+        offsets = _CORNERS[_FACE_DIAGONALS].mean(axis=1)
+        return self.start[:, None, :] + offsets * self.size[:, None, :]
+
+    def face_edges(self):
+
+        '''
+        Get the up and left edges of every face of every box.
+        :return: a float numpy array, size=(N,6,4,3)
+            For each face, the vertexes as in Box.get_face_edge(), in the
+            order of BOX_FACES.
+        '''
+
+        return self.start[:, None, None, :] + _CORNERS[_FACE_EDGES] * self.size[:, None, None, :]
+
+    def get_face_point(self, direction):
+
+        '''
+        Get a coordinate of a point in a face of every box.
+        :param direction: str
+            One of BOX_FACES.
+        :return: a numpy array of strings, size=(N,3)
+        '''
+
+        offset = _CORNERS[_FACE_DIAGONALS[_face_index(BOX_FACES, direction)]].mean(axis=0)
+        return _format(self.start + offset * self.size, self.unit)
+
+    def get_face_edge(self, direction):
+
+        '''
+        Get the up and left edges of a face of every box.
+        :param direction: str
+            One of BOX_FACES.
+        :return: a numpy array of strings, size=(N,4,3)
+        '''
+
+        corners = _CORNERS[_FACE_EDGES[_face_index(BOX_FACES, direction)]]
+        return _format(self.start[:, None, :] + corners * self.size[:, None, :], self.unit)
+
+    def create(self, oEditor, **options):
+
+        '''
+        Draw all boxes in HFSS with hycohanz.create_boxes().
+        :param options: keyword arguments of create_boxes(), e.g. MaterialValue.
+        :return: list of str
+            The actual names of the boxes.
+        '''
+
+        from hycohanz.bulk import create_boxes
+        if self.names is not None:
+            options.setdefault('Name', self.names)
+        return create_boxes(oEditor, np.hstack([self.start, self.size]), self.unit, **options)
+
+
+class RectangleArray(object):
+
+    FACES = ('face',)
+
+    def __init__(self, names, unit, start_points, widths, heights, which_axis='Z'):
+
+        '''
+
+        Many rectangles normal to the same axis, stored as contiguous arrays.
+
+        :param names: sequence of str or None
+            The rectangle names in HFSS, one per rectangle.
+        :param unit: str
+            The unit of x,y and z axes.
+        :param start_points: a float array of shape (N, 3).
+        :param widths: a float array of length N.
+        :param heights: a float array of length N.
+            The sizes along the first and second in-plane axes, i.e. X and
+            Y for which_axis='Z'.
+        :param which_axis: str
+            The normal axis, 'X', 'Y' or 'Z'.
+        '''
+
+        self.start = _rows(start_points, 3)
+        self.widths = np.broadcast_to(np.asarray(widths, dtype=float), len(self.start)).copy()
+        self.heights = np.broadcast_to(np.asarray(heights, dtype=float), len(self.start)).copy()
+        self.which_axis = which_axis
+        self.names = None if names is None else list(names)
+        self.unit = unit
+
+    def __len__(self):
+        return len(self.start)
+
+    def _sides(self):
+        u, v = _PLANES[self.which_axis]
+        du = np.zeros_like(self.start)
+        dv = np.zeros_like(self.start)
+        du[:, u] = self.widths
+        dv[:, v] = self.heights
+        return du, dv
+
+    @property
+    def vertexes(self):
+
+        '''
+        The 4 corners of every rectangle, counterclockwise from the start point.
+        :return: a float numpy array, size=(N,4,3)
+        '''
+
+        du, dv = self._sides()
+        p = self.start
+        return np.stack([p, p + du, p + du + dv, p + dv], axis=1)
+
+    def face_points(self):
+
+        '''
+        Get the center of every rectangle.
+        :return: a float numpy array, size=(N,1,3)
+        '''
+
+        du, dv = self._sides()
+        return (self.start + 0.5 * (du + dv))[:, None, :]
+
+    def face_edges(self):
+
+        '''
+        Get the start point and the two edges leaving it, as in Box.get_face_edge().
+        :return: a float numpy array, size=(N,1,4,3)
+        '''
+
+        du, dv = self._sides()
+        p = self.start
+        return np.stack([p, p + du, p, p + dv], axis=1)[:, None]
+
+    def get_face_point(self, direction='face'):
+
+        '''
+        Get the center of every rectangle.
+        :return: a numpy array of strings, size=(N,3)
+        '''
+
+        _face_index(self.FACES, direction)
+        return _format(self.face_points()[:, 0], self.unit)
+
+    def get_face_edge(self, direction='face'):
+
+        '''
+        Get the start point and the two edges leaving it for every rectangle.
+        :return: a numpy array of strings, size=(N,4,3)
+        '''
+
+        _face_index(self.FACES, direction)
+        return _format(self.face_edges()[:, 0], self.unit)
+
+    def create(self, oEditor, **options):
+
+        '''
+        Draw all rectangles in HFSS with hycohanz.create_rectangles().
+        :param options: keyword arguments of create_rectangles().
+        :return: list of str
+            The actual names of the rectangles.
+        '''
+
+        from hycohanz.bulk import create_rectangles
+        if self.names is not None:
+            options.setdefault('Name', self.names)
+        options.setdefault('WhichAxis', self.which_axis)
+        rectangles = np.column_stack([self.start, self.widths, self.heights])
+        return create_rectangles(oEditor, rectangles, self.unit, **options)
+
+
+class SphereArray(object):
+
+    FACES = ('surface',)
+
+    def __init__(self, names, unit, centers, radii):
+
+        '''
+
+        Many spheres, stored as contiguous arrays.
+
+        :param names: sequence of str or None
+            The sphere names in HFSS, one per sphere.
+        :param unit: str
+            The unit of x,y and z axes.
+        :param centers: a float array of shape (N, 3).
+        :param radii: a float array of length N.
+        '''
+
+        self.centers = _rows(centers, 3)
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), len(self.centers)).copy()
+        self.names = None if names is None else list(names)
+        self.unit = unit
+
+    def __len__(self):
+        return len(self.centers)
+
+    def face_points(self):
+
+        '''
+        Get a point on the surface of every sphere, its top (+z) pole.
+        :return: a float numpy array, size=(N,1,3)
+        '''
+
+        points = self.centers.copy()
+        points[:, 2] += self.radii
+        return points[:, None, :]
+
+    def get_face_point(self, direction='surface'):
+
+        '''
+        Get the top pole of every sphere.
+        :return: a numpy array of strings, size=(N,3)
+        '''
+
+        _face_index(self.FACES, direction)
+        return _format(self.face_points()[:, 0], self.unit)
+
+    def create(self, oEditor, **options):
+
+        '''
+        Draw all spheres in HFSS with hycohanz.create_spheres().
+        :param options: keyword arguments of create_spheres().
+        :return: list of str
+            The actual names of the spheres.
+        '''
+
+        from hycohanz.bulk import create_spheres
+        if self.names is not None:
+            options.setdefault('Name', self.names)
+        return create_spheres(oEditor, np.column_stack([self.centers, self.radii]),
+                              self.unit, **options)
+
+
+class CylinderArray(object):
+
+    FACES = ('bottom', 'top', 'side')
+
+    EDGES = ('bottom', 'top')
+
+    def __init__(self, names, unit, centers, radii, heights, which_axis='Z'):
+
+        '''
+
+        Many cylinders along the same axis, stored as contiguous arrays.
+
+        :param names: sequence of str or None
+            The cylinder names in HFSS, one per cylinder.
+        :param unit: str
+            The unit of x,y and z axes.
+        :param centers: a float array of shape (N, 3).
+            The centers of the bottom faces.
+        :param radii: a float array of length N.
+        :param heights: a float array of length N.
+        :param which_axis: str
+            The cylinder axis, 'X', 'Y' or 'Z'.
+        '''
+
+        self.centers = _rows(centers, 3)
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), len(self.centers)).copy()
+        self.heights = np.broadcast_to(np.asarray(heights, dtype=float), len(self.centers)).copy()
+        self.which_axis = which_axis
+        self.names = None if names is None else list(names)
+        self.unit = unit
+
+    def __len__(self):
+        return len(self.centers)
+
+    def _top(self):
+        top = self.centers.copy()
+        top[:, _AXES[self.which_axis]] += self.heights
+        return top
+
+    def _radial(self):
+        radial = np.zeros_like(self.centers)
+        radial[:, _PLANES[self.which_axis][0]] = self.radii
+        return radial
+
+    def face_points(self):
+
+        '''
+        Get a point in every face of every cylinder.
+        :return: a float numpy array, size=(N,3,3)
+            The centers of the bottom and top faces, and a point halfway up
+            the side, in the order of FACES.
+        '''
+
+        bottom = self.centers
+        top = self._top()
+        side = 0.5 * (bottom + top) + self._radial()
+        return np.stack([bottom, top, side], axis=1)
+
+    def edge_points(self):
+
+        '''
+        Get a point on every circular edge of every cylinder.
+        :return: a float numpy array, size=(N,2,3)
+            In the order of EDGES.
+        '''
+
+        radial = self._radial()
+        return np.stack([self.centers + radial, self._top() + radial], axis=1)
+
+    def get_face_point(self, direction):
+
+        '''
+        Get a coordinate of a point in a face of every cylinder.
+        :param direction: str
+            One of FACES.
+        :return: a numpy array of strings, size=(N,3)
+        '''
+
+        return _format(self.face_points()[:, _face_index(self.FACES, direction)], self.unit)
+
+    def get_edge_point(self, direction):
+
+        '''
+        Get a coordinate of a point on a circular edge of every cylinder.
+        :param direction: str
+            One of EDGES.
+        :return: a numpy array of strings, size=(N,3)
+        '''
+
+        return _format(self.edge_points()[:, _face_index(self.EDGES, direction)], self.unit)
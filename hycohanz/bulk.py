@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Array-oriented primitive creation.
+
+The functions in this module create many primitives of one kind from a
+NumPy array with one row per primitive, e.g. N x 6 positions and sizes for
+boxes.  All coordinates are formatted in one vectorized pass, all
+primitives share one Attributes object, and the parameter arrays are built
+without per-coordinate Python calls.
+
+If oDesktop is given, the creations are sent to HFSS in a BatchEditor,
+i.e. in one (or, with max_commands, a few) RunScript() calls instead of one
+COM call per primitive.  Passing a BatchEditor as oEditor batches them as
+part of that editor's batch.
+
+Example Usage
+-------------
+>>> import numpy as np
+>>> import hycohanz as hfss
+>>> ix, iy = np.meshgrid(np.arange(32), np.arange(32))
+>>> boxes = np.column_stack([2*ix.ravel(), 2*iy.ravel(), np.zeros(ix.size),
+...                          np.ones(ix.size), np.ones(ix.size), 0.1*np.ones(ix.size)])
+>>> names = hfss.create_boxes(oEditor, boxes, unit='mm', Name='Patch1',
+...                           MaterialValue='"copper"', oDesktop=oDesktop)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import numpy as np
+
+from hycohanz.attributes import Attributes, MATERIAL_VALUE, MATERIAL_NAME
+from hycohanz.batch import BatchEditor
+from hycohanz.materialqueue import material_queue
+from hycohanz.scenegraph import scene_graph
+from hycohanz.units import format_values
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+def _parameter_arrays(header, keys, values, unit, prefix=(), suffix=()):
+    """
+    Build one parameter array per row of values.
+
+    Parameters
+    ----------
+    header : str
+        First element of each array, e.g. "NAME:BoxParameters".
+    keys : tuple of str
+        Parameter keys, one per column of values.
+    values : array_like, shape (N, len(keys))
+        Parameter values.
+    unit : str
+        Unit appended to numeric values.
+    prefix, suffix : sequence
+        Key/value items placed before and after the columns.
+
+    Returns
+    -------
+    list of list
+
+    """
+    values = np.asarray(values)
+    if values.ndim != 2 or values.shape[1] != len(keys):
+        raise ValueError('expected an array of shape (N, {k}), got {s}'.format(
+                         k=len(keys), s=values.shape))
+
+    items = np.empty((values.shape[0], 2 * len(keys)), dtype=object)
+    items[:, 0::2] = keys
+    items[:, 1::2] = format_values(values, unit)
+
+    head = [header] + list(prefix)
+    tail = list(suffix)
+    return [head + row + tail for row in items.tolist()]
+
+def _names(Name, count):
+    if isinstance(Name, string_types):
+        return [Name] * count
+    Name = list(Name)
+    if len(Name) != count:
+        raise ValueError('expected {n} names, got {m}'.format(n=count, m=len(Name)))
+    return Name
+
+def _create_many(oEditor, method, parameterarrays, Name, attributes, schema,
+                 oDesktop, max_commands, solid=False):
+    names = _names(Name, len(parameterarrays))
+    # Solids are created with the placeholder material while creation
+    # materials are deferred, as by create_box() and create_sphere().
+    created = material_queue.attributes(oEditor, attributes) if solid else attributes
+    arrays = [(parameters, created.array(name, schema))
+              for parameters, name in zip(parameterarrays, names)]
+
+    if oDesktop is None or isinstance(oEditor, BatchEditor):
+        create = getattr(oEditor, method)
+        results = [create(*args) for args in arrays]
+    else:
+        with BatchEditor(oDesktop, oEditor, max_commands=max_commands) as oBatch:
+            create = getattr(oBatch, method)
+            results = [create(*args) for args in arrays]
+        results = oBatch.resolve(results)
+
+    if scene_graph.enabled:
+        for args, result in zip(arrays, results):
+            scene_graph.record(oEditor, method, args, result)
+    if solid:
+        for result in results:
+            material_queue.created(oEditor, result, attributes)
+    return results
+
+def _attributes(attributes, attributeoptions):
+    if attributes is None:
+        return Attributes(**attributeoptions)
+    if attributeoptions:
+        return attributes.replace(**attributeoptions)
+    return attributes
+
+def create_boxes(oEditor, boxes, unit='',
+                 Name='Box1',
+                 attributes=None,
+                 oDesktop=None,
+                 max_commands=None,
+                 **attributeoptions):
+    """
+    Create many boxes.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    boxes : array_like, shape (N, 6)
+        One row per box:  x, y, z of the base point, followed by the x-, y-,
+        and z-dimensions.
+    unit : str
+        Unit of the numbers in boxes, e.g. "mm".  If empty, HFSS interprets
+        them in the model units.
+    Name : str or sequence of str
+        The requested name of all boxes, which HFSS makes unique, or one
+        name per box.
+    attributes : Attributes or None
+        Style shared by all boxes.
+    oDesktop : pywin32 COMObject or None
+        If given, the boxes are created in one RunScript() call through a
+        BatchEditor.
+    max_commands : int or None
+        With oDesktop, the maximum number of boxes per RunScript() call.
+    **attributeoptions
+        Fields of Attributes, e.g. MaterialValue='"copper"', overriding
+        those of attributes.
+
+    Returns
+    -------
+    list of str
+        The actual names of the created boxes.
+
+    """
+    parameterarrays = _parameter_arrays("NAME:BoxParameters",
+                                        ("XPosition:=", "YPosition:=", "ZPosition:=",
+                                         "XSize:=", "YSize:=", "ZSize:="),
+                                        boxes, unit)
+    return _create_many(oEditor, 'CreateBox', parameterarrays, Name,
+                        _attributes(attributes, attributeoptions), MATERIAL_VALUE,
+                        oDesktop, max_commands, solid=True)
+
+def create_rectangles(oEditor, rectangles, unit='',
+                      WhichAxis='Z',
+                      IsCovered=True,
+                      Name='Rectangle1',
+                      attributes=None,
+                      oDesktop=None,
+                      max_commands=None,
+                      **attributeoptions):
+    """
+    Create many rectangles.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    rectangles : array_like, shape (N, 5)
+        One row per rectangle:  x, y, z of the start point, width and
+        height.
+    unit : str
+        Unit of the numbers in rectangles, e.g. "mm".  If empty, HFSS
+        interprets them in the model units.
+    WhichAxis : str
+        The axis normal to the rectangles.  Can be 'X', 'Y', or 'Z'.
+    IsCovered : bool
+        Whether the rectangles have a surface or have only edges.
+    Name : str or sequence of str
+        The requested name of all rectangles, which HFSS makes unique, or
+        one name per rectangle.
+    attributes : Attributes or None
+        Style shared by all rectangles.
+    oDesktop : pywin32 COMObject or None
+        If given, the rectangles are created in one RunScript() call
+        through a BatchEditor.
+    max_commands : int or None
+        With oDesktop, the maximum number of rectangles per RunScript()
+        call.
+    **attributeoptions
+        Fields of Attributes overriding those of attributes.
+
+    Returns
+    -------
+    list of str
+        The actual names of the created rectangles.
+
+    """
+    parameterarrays = _parameter_arrays("NAME:RectangleParameters",
+                                        ("XStart:=", "YStart:=", "ZStart:=",
+                                         "Width:=", "Height:="),
+                                        rectangles, unit,
+                                        prefix=("IsCovered:=", IsCovered),
+                                        suffix=("WhichAxis:=", WhichAxis))
+    return _create_many(oEditor, 'CreateRectangle', parameterarrays, Name,
+                        _attributes(attributes, attributeoptions), MATERIAL_VALUE,
+                        oDesktop, max_commands)
+
+def create_circles(oEditor, circles, unit='',
+                   WhichAxis='Z',
+                   NumSegments=0,
+                   Name='Circle1',
+                   attributes=None,
+                   oDesktop=None,
+                   max_commands=None,
+                   **attributeoptions):
+    """
+    Create many circles.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    circles : array_like, shape (N, 4)
+        One row per circle:  x, y, z of the center and the radius.
+    unit : str
+        Unit of the numbers in circles, e.g. "mm".  If empty, HFSS
+        interprets them in the model units.
+    WhichAxis : str
+        The axis normal to the circles.  Can be 'X', 'Y', or 'Z'.
+    NumSegments : int
+        If 0, the circles are not segmented.  Otherwise, they are segmented
+        into NumSegments sides.
+    Name : str or sequence of str
+        The requested name of all circles, which HFSS makes unique, or one
+        name per circle.
+    attributes : Attributes or None
+        Style shared by all circles.
+    oDesktop : pywin32 COMObject or None
+        If given, the circles are created in one RunScript() call through a
+        BatchEditor.
+    max_commands : int or None
+        With oDesktop, the maximum number of circles per RunScript() call.
+    **attributeoptions
+        Fields of Attributes overriding those of attributes.
+
+    Returns
+    -------
+    list of str
+        The actual names of the created circles.
+
+    """
+    parameterarrays = _parameter_arrays("NAME:CircleParameters",
+                                        ("XCenter:=", "YCenter:=", "ZCenter:=", "Radius:="),
+                                        circles, unit,
+                                        suffix=("WhichAxis:=", str(WhichAxis),
+                                                "NumSegments:=", str(NumSegments)))
+    return _create_many(oEditor, 'CreateCircle', parameterarrays, Name,
+                        _attributes(attributes, attributeoptions), MATERIAL_NAME,
+                        oDesktop, max_commands)
+
+def create_spheres(oEditor, spheres, unit='',
+                   Name='Sphere1',
+                   attributes=None,
+                   oDesktop=None,
+                   max_commands=None,
+                   **attributeoptions):
+    """
+    Create many spheres.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    spheres : array_like, shape (N, 4)
+        One row per sphere:  x, y, z of the center and the radius.
+    unit : str
+        Unit of the numbers in spheres, e.g. "mm".  If empty, HFSS
+        interprets them in the model units.
+    Name : str or sequence of str
+        The requested name of all spheres, which HFSS makes unique, or one
+        name per sphere.
+    attributes : Attributes or None
+        Style shared by all spheres.
+    oDesktop : pywin32 COMObject or None
+        If given, the spheres are created in one RunScript() call through a
+        BatchEditor.
+    max_commands : int or None
+        With oDesktop, the maximum number of spheres per RunScript() call.
+    **attributeoptions
+        Fields of Attributes overriding those of attributes.
+
+    Returns
+    -------
+    list of str
+        The actual names of the created spheres.
+
+    """
+    parameterarrays = _parameter_arrays("NAME:SphereParameters",
+                                        ("XCenter:=", "YCenter:=", "ZCenter:=", "Radius:="),
+                                        spheres, unit)
+    return _create_many(oEditor, 'CreateSphere', parameterarrays, Name,
+                        _attributes(attributes, attributeoptions), MATERIAL_VALUE,
+                        oDesktop, max_commands, solid=True)
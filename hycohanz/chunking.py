@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Splitting of huge selections into chunks.
+
+assign_material(), delete(), move(), scale(), separate_body() and
+uncover_faces() send their parts to HFSS as one comma-joined selection.
+With many thousands of parts that string grows to megabytes, which is slow
+to marshal and which HFSS sometimes refuses.  Selections longer than
+MAX_SELECTION_LENGTH characters are therefore split into chunks that are
+issued back to back, as commands on their own.
+
+The length of the chunks adapts to the measured time of the commands.
+Each command costs a fixed latency, the COM round-trip, plus a time per
+character of selection.  The chunker fits both to the chunks it has
+timed, per editor command, and makes the chunks as long as keeps the
+fixed latency to OVERHEAD_FRACTION of the time of a chunk, between
+MIN_CHUNK_LENGTH and MAX_CHUNK_LENGTH characters.
+
+copy() is not split:  every Copy command replaces the clipboard, so a
+chunked copy would paste only its last chunk.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> hfss.delete(oEditor, names)  # 20000 parts
+>>> hfss.get_chunk_stats()
+(ChunkStats(command='Delete', parts=745, length=8191, seconds=0.012), ...)
+>>> hfss.get_chunking_info()
+ChunkingInfo(operations=1, chunks=..., parts=20000, seconds=...)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import threading
+import time
+from collections import deque, namedtuple
+
+ChunkStats = namedtuple('ChunkStats', ['command', 'parts', 'length', 'seconds'])
+
+ChunkingInfo = namedtuple('ChunkingInfo', ['operations', 'chunks', 'parts', 'seconds'])
+
+# Longest comma-joined selection sent in one command, in characters.
+MAX_SELECTION_LENGTH = 8192
+
+# Bounds of the adapted chunk length, in characters.
+MIN_CHUNK_LENGTH = 1024
+MAX_CHUNK_LENGTH = 262144
+
+# Share of the time of a chunk that may go to the fixed latency of a command.
+OVERHEAD_FRACTION = 0.1
+
+# Number of timed chunks per command that the latency is fitted to.
+_SAMPLES = 32
+
+def split_selection(partlist, max_length):
+    """
+    Split parts into consecutive chunks whose comma-joined selections are at
+    most max_length characters long.
+
+    A part whose name alone is longer than max_length makes a chunk of its
+    own.
+
+    Parameters
+    ----------
+    partlist : list of str
+        Names of the parts.
+    max_length : int
+        Maximum length of the selection of a chunk.
+
+    Returns
+    -------
+    list of list of str
+        The chunks, in order.
+
+    """
+    chunks = []
+    chunk = []
+    length = -1
+    for name in partlist:
+        if chunk and length + 1 + len(name) > max_length:
+            chunks.append(chunk)
+            chunk = []
+            length = -1
+        chunk.append(name)
+        length += 1 + len(name)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def _selection_length(partlist):
+    return sum(len(name) + 1 for name in partlist) - 1
+
+class SelectionChunker(object):
+    """
+    Issue commands on large selections in chunks of adaptive length.
+
+    Attributes
+    ----------
+    enabled : bool
+        If False, every selection is sent in one command.
+    max_length : int
+        Selections up to this length are sent in one command; longer ones
+        start out in chunks of this length.
+    history : deque of ChunkStats
+        The most recent timed chunks, of all commands.
+    last : tuple of ChunkStats
+        The chunks of the most recent chunked operation.
+
+    """
+    def __init__(self, enabled=True, max_length=MAX_SELECTION_LENGTH):
+        self.enabled = enabled
+        self.max_length = max_length
+        self.history = deque(maxlen=1024)
+        self.last = ()
+        self.operations = 0
+        self.chunks = 0
+        self.parts = 0
+        self.seconds = 0.0
+        # command -> chunk length to use next
+        self._lengths = {}
+        # command -> recent (length, seconds) of its chunks
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def chunk_length(self, command):
+        """
+        Return the chunk length that the next selection for an editor
+        command will be split into.
+        """
+        with self._lock:
+            return self._lengths.get(command, self.max_length)
+
+    def _adapt(self, command, length, seconds):
+        """
+        Fit the latency and the time per character of a command to its
+        timed chunks, and choose the next chunk length.  Called with the
+        lock held.
+        """
+        samples = self._samples.setdefault(command, deque(maxlen=_SAMPLES))
+        samples.append((length, seconds))
+        current = self._lengths.get(command, self.max_length)
+        n = len(samples)
+        mean_x = sum(x for x, y in samples) / n
+        mean_y = sum(y for x, y in samples) / n
+        sxx = sum((x - mean_x) ** 2 for x, y in samples)
+        if sxx == 0:
+            # A single chunk length tells nothing about the latency; try a
+            # longer one.
+            new = 2 * current
+        else:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / sxx
+            latency = mean_y - slope * mean_x
+            if slope <= 0:
+                # The time does not grow with the length:  all latency.
+                new = 2 * current
+            elif latency <= 0:
+                new = current
+            else:
+                new = latency * (1 - OVERHEAD_FRACTION) / (OVERHEAD_FRACTION * slope)
+        self._lengths[command] = int(min(max(new, MIN_CHUNK_LENGTH), MAX_CHUNK_LENGTH))
+
+    def run(self, command, partlist, issue):
+        """
+        Issue an editor command on a selection, in chunks if it is long.
+
+        Parameters
+        ----------
+        command : str
+            Name of the editor command, which keys the adapted chunk length.
+        partlist : list of str
+            Names of the selected parts.
+        issue : callable
+            Called with a list of part names to issue the command on them.
+
+        Returns
+        -------
+        list
+            The results of the calls of issue, one per chunk.
+
+        """
+        partlist = list(partlist)
+        if not self.enabled or _selection_length(partlist) <= self.max_length:
+            return [issue(partlist)]
+
+        results = []
+        stats = []
+        start = 0
+        while start < len(partlist):
+            # The length adapts after every chunk, so split off one at a time,
+            # as split_selection() would.
+            max_length = self.chunk_length(command)
+            stop = start + 1
+            length = len(partlist[start])
+            while stop < len(partlist) and length + 1 + len(partlist[stop]) <= max_length:
+                length += 1 + len(partlist[stop])
+                stop += 1
+            chunk = partlist[start:stop]
+            start = stop
+            begin = time.time()
+            results.append(issue(chunk))
+            seconds = time.time() - begin
+            with self._lock:
+                self._adapt(command, length, seconds)
+            stats.append(ChunkStats(command, len(chunk), length, seconds))
+        with self._lock:
+            self.history.extend(stats)
+            self.last = tuple(stats)
+            self.operations += 1
+            self.chunks += len(stats)
+            self.parts += len(partlist)
+            self.seconds += sum(s.seconds for s in stats)
+        return results
+
+    def info(self):
+        """
+        Return the totals of the chunked operations.
+
+        Returns
+        -------
+        ChunkingInfo
+            Named tuple (operations, chunks, parts, seconds).
+
+        """
+        with self._lock:
+            return ChunkingInfo(self.operations, self.chunks, self.parts, self.seconds)
+
+    def reset_info(self):
+        """
+        Reset the totals and the timing history.  The adapted chunk lengths
+        are kept.
+        """
+        with self._lock:
+            self.history.clear()
+            self.last = ()
+            self.operations = 0
+            self.chunks = 0
+            self.parts = 0
+            self.seconds = 0.0
+
+selection_chunker = SelectionChunker()
+
+def enable_chunking(enabled=True, max_length=None):
+    """
+    Turn splitting of long selections on or off.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to split selections longer than max_length.
+    max_length : int or None
+        Longest selection sent in one command.  If None, it is left
+        unchanged; the default is MAX_SELECTION_LENGTH.
+
+    Returns
+    -------
+    bool
+        Whether splitting was enabled before.
+
+    """
+    previous = selection_chunker.enabled
+    selection_chunker.enabled = enabled
+    if max_length is not None:
+        selection_chunker.max_length = max_length
+    return previous
+
+def get_chunk_stats():
+    """
+    Return the timing of the chunks of the most recent chunked operation.
+
+    Returns
+    -------
+    tuple of ChunkStats
+        Named tuples (command, parts, length, seconds), one per chunk, with
+        the number of parts, the length of the selection and the time taken
+        by the command.  Empty if no selection has been split yet.
+
+    """
+    return selection_chunker.last
+
+def get_chunking_info():
+    """
+    Return the totals of all chunked operations.
+
+    Returns
+    -------
+    ChunkingInfo
+        Named tuple (operations, chunks, parts, seconds).
+
+    """
+    return selection_chunker.info()
+
+def reset_chunking_info():
+    """
+    Reset the totals and the chunk timing.
+
+    Returns
+    -------
+    None
+
+    """
+    selection_chunker.reset_info()
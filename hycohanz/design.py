@@ -7,10 +7,29 @@ At last count there were 2 functions implemented out of 27.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
-def get_module(oDesign, ModuleName):
+import collections
+import threading
+
+from hycohanz.backend import handle_key
+from hycohanz.instrument import instrument
+from hycohanz.ownership import adopt
+
+ModuleCacheInfo = collections.namedtuple('ModuleCacheInfo', ['hits', 'misses', 'currsize'])
+
+# Module handles by design, then by module name.
+_module_cache = {}
+_module_cache_stats = {'hits': 0, 'misses': 0}
+_module_cache_lock = threading.Lock()
+
+def get_module(oDesign, ModuleName, use_cache=True):
     """
     Get a module handle for the given module.
     
+    Module handles are cached per design, so that only the first request 
+    for a module of a design costs a GetModule() round-trip.  The cache is 
+    cleared when projects are closed or designs deleted through hycohanz; 
+    call invalidate_module_cache() after doing so by other means.
+    
     Parameters
     ----------
     oDesign : pywin32 COMObject
@@ -25,6 +44,9 @@ def get_module(oDesign, ModuleName):
             - "FieldsReporter"
             - "RadField"
             - "UserDefinedSolutionModule"
+            - "ReportSetup"
+    use_cache : bool
+        If False, always call GetModule() and leave the cache untouched.
         
     Returns
     -------
@@ -32,10 +54,72 @@ def get_module(oDesign, ModuleName):
         Handle to the given module
         
     """
-    oModule = oDesign.GetModule(ModuleName)
+    if not use_cache:
+        return instrument(oDesign.GetModule(ModuleName))
+    
+    key = handle_key(oDesign)
+    with _module_cache_lock:
+        oModule = _module_cache.get(key, {}).get(ModuleName)
+        if oModule is not None:
+            _module_cache_stats['hits'] += 1
+            return oModule
+    
+    oModule = instrument(oDesign.GetModule(ModuleName))
+    with _module_cache_lock:
+        _module_cache_stats['misses'] += 1
+        _module_cache.setdefault(key, {})[ModuleName] = oModule
     
     return oModule
 
+def invalidate_module_cache(oDesign=None):
+    """
+    Forget cached module handles.
+    
+    Parameters
+    ----------
+    oDesign : pywin32 COMObject or None
+        The design whose module handles are forgotten.  If None, the whole 
+        cache is cleared.
+        
+    Returns
+    -------
+    None
+    
+    """
+    with _module_cache_lock:
+        if oDesign is None:
+            _module_cache.clear()
+        else:
+            _module_cache.pop(handle_key(oDesign), None)
+
+def get_module_cache_info():
+    """
+    Report the effectiveness of the module handle cache.
+    
+    Returns
+    -------
+    ModuleCacheInfo
+        Named tuple of the number of cache hits and misses since the 
+        counters were last reset, and the number of cached handles.
+        
+    """
+    with _module_cache_lock:
+        return ModuleCacheInfo(_module_cache_stats['hits'], 
+                               _module_cache_stats['misses'], 
+                               sum(len(modules) for modules in _module_cache.values()))
+
+def reset_module_cache_info():
+    """
+    Reset the module handle cache hit and miss counters to zero.
+    
+    Returns
+    -------
+    None
+    
+    """
+    _module_cache_stats['hits'] = 0
+    _module_cache_stats['misses'] = 0
+
 def set_active_editor(oDesign, editorname="3D Modeler"):
     """
     Set the active editor.
@@ -54,7 +138,8 @@ def set_active_editor(oDesign, editorname="3D Modeler"):
         The HFSS Editor object.
         
     """
-    oEditor = oDesign.SetActiveEditor(editorname)
+    oEditor = instrument(oDesign.SetActiveEditor(editorname))
+    adopt(oDesign, oEditor, editor=True)
     
     return oEditor
 
@@ -90,6 +175,6 @@ def solve_optimetrics(oDesign, op_name):
         Optimetrics name.
     :return: None
     """
-    oOptimetricsSetup = oDesign.GetModule("Optimetrics")
+    oOptimetricsSetup = get_module(oDesign, "Optimetrics")
 
     return oOptimetricsSetup.SolveSetup(op_name)
@@ -8,6 +8,7 @@ At last count there were 10 functions implemented out of 31.
 from __future__ import division, print_function, unicode_literals, absolute_import
 
 from hycohanz.project import get_project_name
+from hycohanz.ownership import adopt, owned, forget
 
 def quit_application(oDesktop):
     """
@@ -30,6 +31,7 @@ def quit_application(oDesktop):
     
     """
     oDesktop.QuitApplication()
+    forget(oDesktop)
 
 def new_project(oDesktop):
     """
@@ -47,6 +49,7 @@ def new_project(oDesktop):
         
     """
     oProject = oDesktop.NewProject()
+    adopt(oDesktop, oProject)
     
     return oProject
 
@@ -66,7 +69,17 @@ def close_project_byname(oDesktop, projectname):
     None
     
     """
+    closed = []
+    for oProject in owned(oDesktop):
+        try:
+            if get_project_name(oProject) == projectname:
+                closed.append(oProject)
+        except Exception:
+            # The project was closed by other means.
+            closed.append(oProject)
     oDesktop.CloseProject(projectname)
+    for oProject in closed:
+        forget(oProject)
 
 def get_active_project(oDesktop):
     """
@@ -83,7 +96,9 @@ def get_active_project(oDesktop):
         The HFSS project object upon which to operate.
     
     """
-    return oDesktop.GetActiveProject()
+    oProject = oDesktop.GetActiveProject()
+    adopt(oDesktop, oProject)
+    return oProject
 
 def close_project_byhandle(oDesktop, oProject):
     """
@@ -102,6 +117,7 @@ def close_project_byhandle(oDesktop, oProject):
     
     """
     oDesktop.CloseProject(get_project_name(oProject))
+    forget(oProject)
 
 def close_current_project(oDesktop):
     """
@@ -120,6 +136,7 @@ def close_current_project(oDesktop):
     oProject = get_active_project(oDesktop)
     projectname = get_project_name(oProject)
     oDesktop.CloseProject(projectname)
+    forget(oProject)
 
 def get_projects(oDesktop):
     """
@@ -136,7 +153,10 @@ def get_projects(oDesktop):
         The HFSS desktop object upon which to operate.
         
     """
-    return oDesktop.GetProjects()
+    projects = oDesktop.GetProjects()
+    for oProject in projects:
+        adopt(oDesktop, oProject)
+    return projects
 
 def close_all_projects(oDesktop):
     """
@@ -195,7 +215,9 @@ def open_project(oDesktop, filename):
         An handle to the opened project.
     
     """
-    return oDesktop.OpenProject(filename)
+    oProject = oDesktop.OpenProject(filename)
+    adopt(oDesktop, oProject)
+    return oProject
 
 def save_as_project(oDesktop, filename,overwrite=True):
     """
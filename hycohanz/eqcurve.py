@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Local evaluation of equation based curves.
+
+create_EQbasedcurve() sends the x(_t), y(_t) and z(_t) equations to HFSS
+as strings, and mistakes such as a range that makes the curve blow up only
+show after the COM round-trip.  An EquationCurve evaluates the same
+equations with NumPy:
+
+- points() samples the curve at evenly spaced values of _t,
+- bounding_box() returns its extent,
+- validate() raises ValueError where the curve is not finite,
+- adaptive_points() samples it with as few points as keep the polyline
+  within a given distance of the curve, and create_polyline() draws that
+  polyline instead of the equation based curve.
+
+The equations use the HFSS syntax of hycohanz.evaluator with the
+parameter _t, and design variables, whose values are given in a dict.
+Lengths are in the model units.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> helix = hfss.EquationCurve('5*cos(_t)', '5*sin(_t)', '_t/pi', 0, '10*pi')
+>>> helix.bounding_box()
+((-5.0, -5.0, 0.0), (5.0, 5.0, 10.0))
+>>> len(helix.adaptive_points(tolerance=0.01))
+257
+>>> hfss.EquationCurve('sqrt(_t)', '0', '0', -1, 1).validate()
+Traceback (most recent call last):
+...
+ValueError: x(_t) is not finite at _t=-1
+
+create_EQbasedcurve() does the same check before drawing, given
+validate=True:
+
+>>> hfss.create_EQbasedcurve(oEditor, 'sqrt(_t)', '0', '0', '-1', '1', 0,
+...                          validate=True)  # doctest: +SKIP
+Traceback (most recent call last):
+...
+ValueError: x(_t) is not finite at _t=-1
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import numpy as np
+
+from hycohanz.evaluator import Evaluator, compile_expression
+
+# Intervals of adaptive_points() are probed at PROBES - 1 inner points.
+PROBES = 8
+
+class EquationCurve(object):
+    """
+    A curve given by HFSS equations, evaluated locally.
+
+    Parameters
+    ----------
+    xt, yt, zt : str or Expression
+        The equations of x, y and z as functions of _t.
+    tstart, tend : float, str or Expression
+        The range of _t.
+    variables : dict or None
+        Values of the design and project variables used in the equations,
+        e.g. {'r': 5, '$pitch': 2}.  Lengths are in the model units.
+    model_units : str
+        Model units of the design, "mm" unless changed.
+
+    """
+    def __init__(self, xt, yt, zt, tstart, tend, variables=None, model_units='mm'):
+        self.equations = (xt, yt, zt)
+        self.variables = dict(variables or {})
+        self.model_units = model_units
+        for equation in self.equations:
+            compile_expression(equation, model_units)
+        self._evaluator = Evaluator(self.variables, model_units)
+        self.tstart = self._scalar(tstart)
+        self.tend = self._scalar(tend)
+
+    def _scalar(self, equation):
+        return float(self._evaluator.evaluate(equation, {'_t': 0.0}))
+
+    def evaluate(self, t):
+        """
+        Return the points of the curve at the given values of _t.
+
+        Parameters
+        ----------
+        t : array_like
+            Values of _t, shape (N,).
+
+        Returns
+        -------
+        numpy.ndarray
+            The points, shape (N, 3), in the model units.
+
+        """
+        t = np.asarray(t, dtype=float)
+        return np.stack([np.broadcast_to(self._evaluator.evaluate(equation, {'_t': t}), t.shape)
+                         for equation in self.equations],
+                        axis=-1)
+
+    def points(self, numpoints=1001):
+        """
+        Return points at evenly spaced values of _t from tstart to tend.
+
+        Parameters
+        ----------
+        numpoints : int
+            The number of points.
+
+        Returns
+        -------
+        numpy.ndarray
+            The points, shape (numpoints, 3), in the model units.
+
+        """
+        return self.evaluate(np.linspace(self.tstart, self.tend, max(int(numpoints), 2)))
+
+    def validate(self, numpoints=1001):
+        """
+        Check that the range of _t is not empty and that the curve is
+        finite at numpoints evenly spaced values of _t.
+
+        Raises
+        ------
+        ValueError
+            If the check fails.
+
+        """
+        if not np.isfinite([self.tstart, self.tend]).all() or self.tstart == self.tend:
+            raise ValueError('invalid range of _t: {a} to {b}'.format(a=self.tstart, b=self.tend))
+        t = np.linspace(self.tstart, self.tend, max(int(numpoints), 2))
+        points = self.evaluate(t)
+        bad = ~np.isfinite(points)
+        if bad.any():
+            index, axis = np.argwhere(bad)[0]
+            raise ValueError('{a}(_t) is not finite at _t={t:.6g}'.format(a='xyz'[axis], t=t[index]))
+
+    def bounding_box(self, numpoints=1001):
+        """
+        Return the bounding box of the curve sampled at numpoints points.
+
+        Returns
+        -------
+        tuple
+            ((xmin, ymin, zmin), (xmax, ymax, zmax)) in the model units.
+
+        """
+        points = self.points(numpoints)
+        return tuple(points.min(axis=0).tolist()), tuple(points.max(axis=0).tolist())
+
+    def adaptive_points(self, tolerance, initial=16, max_depth=20):
+        """
+        Sample the curve with as few points as keep the polyline through
+        them within a distance of the curve.
+
+        Intervals of _t are halved until the curve lies within tolerance
+        of the chord of every interval:  the largest distance at PROBES - 1
+        evenly spaced points inside the interval, plus a bound on how much
+        the curve can stray between them, estimated from the second
+        differences of the probed points.  The estimate holds where the
+        curvature changes little between neighbouring probes; features
+        narrower than the probe spacing of an initial interval may be
+        missed.
+
+        Parameters
+        ----------
+        tolerance : float
+            The largest allowed distance, in the model units.
+        initial : int
+            The number of intervals to start from.
+        max_depth : int
+            The largest number of times an interval is halved.
+
+        Returns
+        -------
+        numpy.ndarray
+            The points, shape (N, 3), in the model units.
+
+        """
+        fractions = np.arange(1, PROBES) / PROBES
+        breaks = [np.linspace(self.tstart, self.tend, int(initial) + 1)]
+        a, b = breaks[0][:-1], breaks[0][1:]
+        for depth in range(max_depth):
+            if not len(a):
+                break
+            pa, pb = self.evaluate(a), self.evaluate(b)
+            chord = pb - pa
+            length2 = np.maximum((chord ** 2).sum(axis=1), np.finfo(float).tiny)
+            # All probes of all intervals in one evaluation, shape (M, PROBES - 1, 3).
+            p = self.evaluate((a[:, None] + fractions * (b - a)[:, None]).ravel())
+            p = p.reshape(len(a), len(fractions), 3) - pa[:, None]
+            s = np.clip((p * chord[:, None]).sum(axis=2) / length2[:, None], 0, 1)
+            distance = np.sqrt(((p - s[:, :, None] * chord[:, None]) ** 2).sum(axis=2))
+            # Between two neighbouring probes, the curve strays from the line
+            # through them by up to an eighth of its second difference, and
+            # that line is no farther from the chord than its ends.
+            q = np.concatenate([np.zeros((len(a), 1, 3)), p, chord[:, None]], axis=1)
+            second = q[:, :-2] - 2 * q[:, 1:-1] + q[:, 2:]
+            slack = np.sqrt((second ** 2).sum(axis=2)).max(axis=1) / 8
+            error = distance.max(axis=1) + slack
+            error = np.where(np.isfinite(error), error, np.inf)
+            bad = error > tolerance
+            m = 0.5 * (a[bad] + b[bad])
+            breaks.append(m)
+            a, b = np.concatenate([a[bad], m]), np.concatenate([m, b[bad]])
+        t = np.unique(np.concatenate(breaks))
+        if self.tend < self.tstart:
+            t = t[::-1]
+        return self.evaluate(t)
+
+    def create_polyline(self, oEditor, tolerance, Name='EQcurve1', **options):
+        """
+        Draw the curve as an open polyline of adaptively sampled points.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor in which the operation will be performed.
+        tolerance : float
+            The largest distance between the polyline and the curve, in the
+            model units.
+        Name : str
+            The requested name of the object.
+        **options
+            Further keyword arguments of create_polyline().
+
+        Returns
+        -------
+        str
+            The actual name of the created object.
+
+        """
+        # Imported here to avoid a circular import.
+        from hycohanz.modeler3d import create_polyline
+
+        points = self.adaptive_points(tolerance)
+        options.setdefault('IsPolylineClosed', False)
+        options.setdefault('IsPolylineCovered', False)
+        return create_polyline(oEditor, points[:, 0], points[:, 1], points[:, 2],
+                               Name=Name, unit=self.model_units, **options)
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Local numeric evaluation of HFSS expressions.
+
+Geometry is usually written in terms of design and project variables, e.g.
+"$L+0.8mm", and its numeric value is only known to HFSS.  The functions in
+this module evaluate such expressions with NumPy instead:
+
+- evaluate_expression() evaluates an expression for given values of its
+  variables.  Values may be numbers, NumPy arrays, or HFSS expression
+  strings that use other variables, as read back from a design.
+- evaluate_grid() evaluates an expression over the whole grid of a
+  parametric sweep in one call.
+- An Evaluator holds the variables of a design, for evaluating many
+  expressions.
+
+Expressions use the HFSS syntax:  the operators + - * / and ^, the
+constant pi, HFSS functions such as sin, atan2, ln, pow and if, numbers
+with units such as 2mm, 45deg or 10GHz, design variables, and project
+variables, whose names start with $.  Lengths are in the model units,
+angles in radians and frequencies in Hz.  Compiled expressions are cached
+by their text.
+
+Example Usage
+-------------
+>>> import numpy as np
+>>> import hycohanz as hfss
+>>> hfss.evaluate_expression('$L+0.8mm', {'$L': '2*w', 'w': np.array([1, 2, 3])})
+array([2.8, 4.8, 6.8])
+>>> hfss.evaluate_grid('w*h', [('w', [1, 2, 3]), ('h', ['1mm', '2mm'])]).shape
+(3, 2)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import ast
+import re
+
+import numpy as np
+
+from hycohanz.units import LENGTH_UNITS, UNITS
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+# HFSS functions and constants, by the names used in expressions.
+_FUNCTIONS = {'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+              'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+              'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+              'asinh': np.arcsinh, 'acosh': np.arccosh, 'atanh': np.arctanh,
+              'sqrt': np.sqrt, 'exp': np.exp, 'ln': np.log, 'log10': np.log10,
+              'pow': np.power, 'abs': np.abs, 'sign': np.sign, 'floor': np.floor,
+              'int': np.trunc, 'nint': np.rint, 'mod': np.mod,
+              'min': np.minimum, 'max': np.maximum, '_if': np.where}
+
+_CONSTANTS = {'pi': np.pi}
+
+_QUANTITY = re.compile(r'(?<![\w.$])((?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]+)\b')
+
+_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+          ast.Compare, ast.operator, ast.unaryop, ast.cmpop)
+
+try:
+    _NODES += (ast.Constant,)
+except AttributeError:
+    _NODES += (ast.Num,)
+
+# Compiled expressions by text and model units.
+_compiled = {}
+_MAX_COMPILED = 4096
+
+def _text(expr):
+    return str(getattr(expr, 'expr', expr))
+
+def _name(name):
+    return name.replace('$', '_dollar_')
+
+def _quantity(match, model_units):
+    number, unit = match.groups()
+    if unit not in UNITS:
+        return match.group(0)
+    value = float(number) * UNITS[unit]
+    if unit in LENGTH_UNITS:
+        value /= UNITS[model_units]
+    return '({v!r})'.format(v=value)
+
+def compile_expression(expr, model_units='mm'):
+    """
+    Compile an HFSS expression for evaluation.
+
+    Parameters
+    ----------
+    expr : str or Expression
+        The expression.
+    model_units : str
+        The length unit that lengths are expressed in.
+
+    Returns
+    -------
+    tuple
+        The code object and the set of variable names it uses, with the $
+        of project variables replaced by "_dollar_".
+
+    Raises
+    ------
+    ValueError
+        If the expression is not valid HFSS syntax.
+    NameError
+        If it calls a function that cannot be evaluated locally.
+
+    """
+    text = _text(expr)
+    key = (text, model_units)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+
+    source = _QUANTITY.sub(lambda match: _quantity(match, model_units), text)
+    source = re.sub(r'\bif\s*\(', '_if(', source)
+    source = _name(source.replace('^', '**'))
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError('cannot evaluate {e!r}'.format(e=text))
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _NODES):
+            raise ValueError('cannot evaluate {e!r}'.format(e=text))
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and
+                                               node.func.id in _FUNCTIONS):
+            raise NameError('unknown function in {e!r}'.format(e=text))
+        if isinstance(node, ast.Name) and node.id not in _FUNCTIONS and node.id not in _CONSTANTS:
+            names.add(node.id)
+    compiled = (compile(tree, '<expression>', 'eval'), frozenset(names))
+    if len(_compiled) >= _MAX_COMPILED:
+        _compiled.clear()
+    _compiled[key] = compiled
+    return compiled
+
+class Evaluator(object):
+    """
+    Evaluate HFSS expressions for given values of their variables.
+
+    Parameters
+    ----------
+    variables : dict or None
+        Values of design and project variables, by name, e.g.
+        {'w': 2, '$L': '10mm', 'gap': 'w/4'}.  Values are numbers, NumPy
+        arrays, or expressions that may use other variables.  Arrays are
+        broadcast against each other.
+    model_units : str
+        Model units of the design, "mm" unless changed.
+
+    """
+    def __init__(self, variables=None, model_units='mm'):
+        self.variables = dict((_name(name), value) for name, value in (variables or {}).items())
+        self.model_units = model_units
+
+    def _resolve(self, name, variables, resolved, pending):
+        """
+        Return the value of a variable, evaluating it if it is an
+        expression.
+        """
+        try:
+            return resolved[name]
+        except KeyError:
+            pass
+        if name not in variables:
+            raise NameError('undefined variable {n!r}'.format(n=name.replace('_dollar_', '$')))
+        value = variables[name]
+        if isinstance(value, string_types) or hasattr(value, 'expr'):
+            if name in pending:
+                raise ValueError('variable {n!r} is defined in terms of itself'.format(
+                                 n=name.replace('_dollar_', '$')))
+            pending.add(name)
+            value = self._evaluate(value, variables, resolved, pending)
+            pending.discard(name)
+        else:
+            value = np.asarray(value, dtype=float)
+        resolved[name] = value
+        return value
+
+    def _evaluate(self, expr, variables, resolved, pending):
+        code, names = compile_expression(expr, self.model_units)
+        namespace = dict(_FUNCTIONS)
+        namespace.update(_CONSTANTS)
+        try:
+            for name in names:
+                namespace[name] = self._resolve(name, variables, resolved, pending)
+        except NameError as error:
+            raise NameError('{m} in {e!r}'.format(m=error, e=_text(expr)))
+        with np.errstate(all='ignore'):
+            value = eval(code, {'__builtins__': {}}, namespace)
+        return np.asarray(value, dtype=float)
+
+    def evaluate(self, expr, values=None):
+        """
+        Evaluate an expression.
+
+        Parameters
+        ----------
+        expr : str, Expression or number
+            The expression.
+        values : dict or None
+            Values of variables that override or add to those of the
+            evaluator, e.g. the swept variables.
+
+        Returns
+        -------
+        float or numpy.ndarray
+            The value, an array of the broadcast shape of the variables it
+            depends on if any of them is an array.  Lengths are in the
+            model units.
+
+        Raises
+        ------
+        NameError
+            If a variable is undefined or a function unknown.
+        ValueError
+            If the expression is not valid, or variables are defined in
+            terms of each other.
+
+        """
+        variables = self.variables
+        if values:
+            variables = dict(variables)
+            variables.update((_name(name), value) for name, value in values.items())
+        value = self._evaluate(expr, variables, {}, set())
+        return float(value) if value.ndim == 0 else value
+
+    def grid(self, expr, axes, values=None):
+        """
+        Evaluate an expression over the grid of a parametric sweep.
+
+        Parameters
+        ----------
+        expr : str, Expression or number
+            The expression.
+        axes : list of (str, array_like) pairs, or OrderedDict
+            The swept variables, in grid order, and their values:  numbers
+            or expressions such as "2mm".
+        values : dict or None
+            Values of further variables, as for evaluate().
+
+        Returns
+        -------
+        numpy.ndarray
+            The values, of shape (len(values of axis 1), len(values of
+            axis 2), ...).
+
+        """
+        axes = list(axes.items()) if hasattr(axes, 'items') else list(axes)
+        coordinates = []
+        for name, axis in axes:
+            axis = np.asarray(axis)
+            if axis.dtype.kind not in 'iufb':
+                axis = np.array([self.evaluate(value) for value in axis.ravel()], dtype=float)
+            coordinates.append(axis.astype(float).ravel())
+        mesh = np.meshgrid(*coordinates, indexing='ij', sparse=True)
+        swept = dict(values or {})
+        swept.update((name, m) for (name, axis), m in zip(axes, mesh))
+        value = self.evaluate(expr, swept)
+        return np.broadcast_to(value, tuple(len(c) for c in coordinates)).copy()
+
+def evaluate_expression(expr, variables=None, model_units='mm'):
+    """
+    Evaluate an HFSS expression.
+
+    Parameters
+    ----------
+    expr : str, Expression or number
+        The expression, e.g. "$L+0.8mm".
+    variables : dict or None
+        Values of the design and project variables, by name.  Values are
+        numbers, NumPy arrays, or expressions that may use other
+        variables, such as the strings read back from a design.
+    model_units : str
+        Model units of the design, "mm" unless changed.
+
+    Returns
+    -------
+    float or numpy.ndarray
+        The value; an array if any variable it depends on is an array.
+        Lengths are in the model units.
+
+    """
+    return Evaluator(variables, model_units).evaluate(expr)
+
+def evaluate_grid(expr, axes, variables=None, model_units='mm'):
+    """
+    Evaluate an HFSS expression over the grid of a parametric sweep.
+
+    Parameters
+    ----------
+    expr : str, Expression or number
+        The expression.
+    axes : list of (str, array_like) pairs, or OrderedDict
+        The swept variables, in grid order, and their values.
+    variables : dict or None
+        Values of the other variables.
+    model_units : str
+        Model units of the design, "mm" unless changed.
+
+    Returns
+    -------
+    numpy.ndarray
+        The values, one axis per swept variable.
+
+    """
+    return Evaluator(variables, model_units).grid(expr, axes)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Run hycohanz calls on a dedicated COM worker thread.
+
+Every hycohanz function blocks the calling thread until HFSS has finished
+the command.  A ComExecutor owns the HFSS handles on one worker thread,
+initialized as a single-threaded COM apartment, and runs the calls
+submitted to it there, one at a time and in submission order.  submit()
+returns immediately with a concurrent.futures.Future, so the caller can
+prepare the next command, parse results or write files while HFSS works.
+
+Handles returned by submitted calls (projects, designs, editors, modules)
+belong to the worker thread.  Only pass them on to calls submitted to the
+same executor; do not call their methods from other threads.
+
+The public functions of modeler3d, design, report_and_export and
+fieldscalculator are also available as attributes of namespaces that
+submit them:
+
+- executor.modeler3d.create_box(oEditor, ...) returns a Future.
+- executor.aio.modeler3d.create_box(oEditor, ...) returns an asyncio
+  future that can be awaited.
+
+Under Python 2 the "futures" backport package provides concurrent.futures;
+asyncio is only needed for the awaitable wrappers.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> with hfss.ComExecutor() as executor:
+...     oProject = executor.submit(hfss.new_project, executor.oDesktop).result()
+...     oDesign = executor.submit(hfss.insert_design, oProject, "HFSSDesign1", "DrivenModal").result()
+...     oEditor = executor.design.set_active_editor(oDesign).result()
+...     futures = [executor.modeler3d.create_box(oEditor, 2*i, 0, 0, 1, 1, 1) for i in range(100)]
+...     names = [f.result() for f in futures]
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import importlib
+import threading
+
+from concurrent.futures import Future
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from hycohanz.appobject import setup_interface
+
+NAMESPACES = ('modeler3d', 'design', 'report_and_export', 'fieldscalculator')
+
+def _coinitialize():
+    """
+    Initialize COM for the current thread as a single-threaded apartment.
+
+    Returns
+    -------
+    module or None
+        pythoncom, or None if pywin32 is not installed.
+    """
+    try:
+        import pythoncom
+    except ImportError:
+        return None
+    pythoncom.CoInitialize()
+    return pythoncom
+
+class _Namespace(object):
+    """
+    Attribute access to the public functions of a hycohanz module, submitted
+    through the given submit function.
+    """
+    def __init__(self, submit, modulename):
+        self._submit = submit
+        self._modulename = modulename
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        module = importlib.import_module('hycohanz.' + self._modulename)
+        function = getattr(module, name)
+        if not callable(function):
+            raise AttributeError(name)
+        submit = self._submit
+
+        def submitted(*args, **kwargs):
+            return submit(function, *args, **kwargs)
+
+        submitted.__name__ = str(name)
+        submitted.__doc__ = function.__doc__
+        return submitted
+
+    def __dir__(self):
+        module = importlib.import_module('hycohanz.' + self._modulename)
+        return [name for name in dir(module) if not name.startswith('_')]
+
+class _AsyncNamespaces(object):
+    def __init__(self, executor):
+        for modulename in NAMESPACES:
+            setattr(self, modulename, _Namespace(executor.submit_async, modulename))
+
+class ComExecutor(object):
+    """
+    Single worker thread owning the HFSS handles.
+
+    The worker thread connects to HFSS using setup_interface() when the
+    executor is created.
+
+    Parameters
+    ----------
+    backend : str or None
+        Backend name, see setup_interface().
+    **options
+        Backend options, see setup_interface().
+
+    Attributes
+    ----------
+    oAnsoftApp : pywin32 COMObject
+        Handle to the HFSS application interface, owned by the worker.
+    oDesktop : pywin32 COMObject
+        Handle to the HFSS desktop interface, owned by the worker.
+    modeler3d, design, report_and_export, fieldscalculator : namespace
+        Functions of these modules, returning Futures.
+    aio : namespace
+        The same namespaces, returning asyncio futures.
+
+    """
+    def __init__(self, backend=None, **options):
+        self._queue = queue.Queue()
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self.pending = 0
+
+        for modulename in NAMESPACES:
+            setattr(self, modulename, _Namespace(self.submit, modulename))
+        self.aio = _AsyncNamespaces(self)
+
+        ready = Future()
+        self._thread = threading.Thread(target=self._work,
+                                        args=(ready, backend, options),
+                                        name='hycohanz-com')
+        self._thread.daemon = True
+        self._thread.start()
+        [self.oAnsoftApp, self.oDesktop] = ready.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        self.shutdown()
+
+    def _work(self, ready, backend, options):
+        pythoncom = _coinitialize()
+        try:
+            try:
+                handles = setup_interface(backend, **options)
+            except BaseException as e:
+                ready.set_exception(e)
+                return
+            ready.set_result(handles)
+
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                future, function, args, kwargs = item
+                try:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        result = function(*args, **kwargs)
+                    except BaseException as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+                finally:
+                    with self._lock:
+                        self.pending -= 1
+        finally:
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Schedule a call on the worker thread.
+
+        Parameters
+        ----------
+        function : callable
+            Typically a hycohanz function.
+        *args, **kwargs
+            Arguments of the call.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the return value of the call.
+
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot submit to a ComExecutor that has been shut down')
+            self.pending += 1
+        future = Future()
+        self._queue.put((future, function, args, kwargs))
+        return future
+
+    def submit_async(self, function, *args, **kwargs):
+        """
+        Schedule a call on the worker thread, returning an awaitable.
+
+        Must be called while an asyncio event loop is running.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the return value of the call.
+
+        """
+        import asyncio
+
+        return asyncio.wrap_future(self.submit(function, *args, **kwargs))
+
+    def call(self, function, *args, **kwargs):
+        """
+        Run a call on the worker thread and wait for its result.
+        """
+        return self.submit(function, *args, **kwargs).result()
+
+    def map(self, function, *iterables):
+        """
+        Submit function for every tuple of arguments taken from iterables.
+
+        Returns
+        -------
+        list of concurrent.futures.Future
+            One future per call, in order.
+
+        """
+        return [self.submit(function, *args) for args in zip(*iterables)]
+
+    def shutdown(self, wait=True, quit_application=False):
+        """
+        Stop the worker thread after the calls submitted so far.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for the worker thread to finish.
+        quit_application : bool
+            Whether to quit HFSS before stopping.
+
+        Returns
+        -------
+        None
+
+        """
+        if self._shutdown:
+            return
+        if quit_application:
+            from hycohanz.desktop import quit_application as quit
+
+            self.submit(quit, self.oDesktop)
+        with self._lock:
+            self._shutdown = True
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
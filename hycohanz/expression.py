@@ -2,14 +2,524 @@
 """
 The HFSS expression generator.
 
+Expressions are immutable trees of operator nodes.  Nodes are hash-consed:
+building the same subexpression twice returns the same node, so composing
+an expression costs constant time per operator, however large its operands
+are.  The string sent to HFSS is rendered only when the expr attribute is
+read, with no more parentheses than the precedence of the operators
+requires, and cached.
+
+While the tree is built, numbers are folded (``Expression('2') * 3`` is
+``6``), as are quantities with compatible units (``Expression('2mm') +
+'1cm'`` is ``12mm``), constants are collected across sums and products
+(``(x + 1) + 2`` is ``x + 3``), and additions of 0 and multiplications by 1
+are dropped.  Strings are taken as they are:  they only take part in
+folding if they are a number or a number with a unit.
+
+parse_expression() turns an HFSS expression string, e.g. a variable value
+read back from a design, into an Expression tree, which then folds and
+simplifies the same way.  Parsed strings are cached.
+
+Example Usage
+-------------
+>>> from hycohanz.expression import Expression as Ex
+>>> ((Ex('w') + '2mm') + '0.5mm').expr
+'w + 2.5mm'
+>>> (Ex('w') * 2 - Ex('g') / 2).expr
+'w * 2 - g / 2'
+>>> (-(Ex('a') + 'b')).expr
+'-(a + b)'
+>>> parse_expression('(($w)+2mm)+(1mm)').expr
+'$w + 3mm'
+>>> sorted(parse_expression('if(w > 2*$g, sin(45deg)*w, 0)').variables())
+['$g', 'w']
+
 """
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import math
+import re
 import warnings
+import weakref
+from collections import namedtuple
+
+from hycohanz.units import LENGTH_UNITS, ANGLE_UNITS, FREQUENCY_UNITS
 
 warnings.simplefilter('default')
 
+# Binding strength of the operators.  Strings that are neither a constant,
+# a name, a function call nor parenthesized are opaque and get _OPAQUE.
+_OPAQUE = 0
+_COMPARE = 1
+_SUM = 2
+_PRODUCT = 3
+_UNARY = 4
+_POWER = 5
+_ATOM = 6
+
+_PRECEDENCE = {'+': _SUM, '-': _SUM, '*': _PRODUCT, '/': _PRODUCT, '^': _POWER,
+               '<': _COMPARE, '<=': _COMPARE, '>': _COMPARE, '>=': _COMPARE,
+               '==': _COMPARE, '!=': _COMPARE}
+
+_ARITHMETIC = ('+', '-', '*', '/')
+
+_FLIP = {'+': '-', '-': '+'}
+
+_DIMENSIONS = (LENGTH_UNITS, ANGLE_UNITS, FREQUENCY_UNITS)
+
+_CONSTANT = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?([A-Za-z]*)$')
+_NAME = re.compile(r'^\$?[A-Za-z_]\w*$')
+_CALL = re.compile(r'^\$?[A-Za-z_]\w*\s*\(')
+
+# Tokens of the HFSS expression syntax.  ** is accepted for ^.
+_TOKEN = re.compile(r'\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?[A-Za-z]*)'
+                    r'|(?P<name>\$?[A-Za-z_]\w*)'
+                    r'|(?P<operator><=|>=|==|!=|\*\*|[-+*/^(),<>]))')
+
+# Names that are not variables.
+_RESERVED = frozenset(['pi'])
+
+# All live nodes, by their kind and arguments, or by their text for leaves.
+_nodes = weakref.WeakValueDictionary()
+
+ParseCacheInfo = namedtuple('ParseCacheInfo', ['hits', 'misses', 'currsize'])
+
+class _Node(object):
+    """
+    An immutable node of an expression tree.
+
+    kind is an operator such as "+" or "^" with args (left, right), "neg"
+    with args (operand,), "call" with args (function name, argument, ...),
+    or "leaf" for a string with args (text,).  Leaves that are numbers or
+    quantities have a value and a unit ("" for numbers).
+    """
+    __slots__ = ('kind', 'args', 'precedence', 'value', 'unit', 'text', '__weakref__')
+
+    def __init__(self, kind, args, precedence, value=None, unit=None, text=None):
+        self.kind = kind
+        self.args = args
+        self.precedence = precedence
+        self.value = value
+        self.unit = unit
+        self.text = text
+
+def _enclosed(text, start):
+    """
+    Whether the parenthesis at text[start] is closed by the last character.
+    """
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i == len(text) - 1
+    return False
+
+def _leaf(text):
+    """
+    Return the leaf node of a string.
+    """
+    node = _nodes.get(('leaf', text))
+    if node is not None:
+        return node
+
+    stripped = text.strip()
+    value = unit = None
+    match = _CONSTANT.match(stripped)
+    if match and (not match.group(3) or any(match.group(3) in units for units in _DIMENSIONS)):
+        number = stripped[:len(stripped) - len(match.group(3))]
+        if '.' in number or match.group(2):
+            value = float(number)
+        else:
+            value = int(number)
+        unit = match.group(3)
+        precedence = _UNARY if stripped[0] in '-+' else _ATOM
+    elif match:
+        precedence = _UNARY if stripped[0] in '-+' else _ATOM
+    elif _NAME.match(stripped):
+        precedence = _ATOM
+    elif stripped.startswith('(') and _enclosed(stripped, 0):
+        precedence = _ATOM
+    elif _CALL.match(stripped) and _enclosed(stripped, stripped.index('(')):
+        precedence = _ATOM
+    else:
+        precedence = _OPAQUE
+
+    node = _Node('leaf', (text,), precedence, value, unit, text)
+    _nodes[('leaf', text)] = node
+    return node
+
+def _constant(value, unit):
+    """
+    Return the leaf node of a number in a unit, or None if it is not finite.
+    """
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        text = '%.15g' % value
+    else:
+        text = str(value)
+    return _leaf(text + unit)
+
+def _is_constant(node):
+    return node.value is not None
+
+def _is_number(node, value=None):
+    return node.unit == '' and (value is None or node.value == value)
+
+def _scale(unit, other):
+    """
+    Return how many of unit make one other, or None if they measure
+    different things.
+    """
+    if unit == other:
+        return 1
+    for units in _DIMENSIONS:
+        if unit in units and other in units:
+            return units[other] / units[unit]
+    return None
+
+def _divide(a, b):
+    """
+    Divide numbers, keeping integers exact.  Return None if that is not
+    possible.
+    """
+    if b == 0:
+        return None
+    if isinstance(a, int) and isinstance(b, int):
+        return a // b if a % b == 0 else None
+    return a / b
+
+def _fold(op, a, b):
+    """
+    Return the constant node of a binary operation on constants, or None.
+    """
+    if not (_is_constant(a) and _is_constant(b)):
+        return None
+    if op in '+-':
+        scale = _scale(a.unit, b.unit)
+        if scale is None:
+            return None
+        value = b.value * scale
+        return _constant(a.value + value if op == '+' else a.value - value, a.unit)
+    if op == '*':
+        if a.unit and b.unit:
+            return None
+        return _constant(a.value * b.value, a.unit or b.unit)
+    if b.unit:
+        scale = _scale(b.unit, a.unit) if a.unit else None
+        if scale is None:
+            return None
+        value = _divide(a.value * scale if scale != 1 else a.value, b.value)
+        return None if value is None else _constant(value, '')
+    value = _divide(a.value, b.value)
+    return None if value is None else _constant(value, a.unit)
+
+def _negate(a):
+    """
+    Return the node of -a.
+    """
+    if _is_constant(a):
+        folded = _constant(-a.value, a.unit)
+        if folded is not None:
+            return folded
+    if a.kind == 'neg':
+        return a.args[0]
+    return _intern(('neg', a), 'neg', (a,), _UNARY)
+
+def _binary(op, a, b):
+    """
+    Return the node of a op b, folded and simplified.
+    """
+    if op not in _ARITHMETIC:
+        return _intern((op, a, b), op, (a, b), _PRECEDENCE[op])
+
+    folded = _fold(op, a, b)
+    if folded is not None:
+        return folded
+
+    if op in '+-' and _is_number(b, 0):
+        return a
+    if op == '+' and _is_number(a, 0):
+        return b
+    if op == '-' and _is_number(a, 0):
+        return _negate(b)
+    if op in '*/' and _is_number(b, 1):
+        return a
+    if op == '*' and _is_number(a, 1):
+        return b
+
+    if _is_constant(b) and a.kind in _ARITHMETIC and _is_constant(a.args[1]):
+        # Collect the constants:  (x + 1) - 3 is x + (1 - 3), (x - 1) - 3
+        # is x - (1 + 3), (x * 2) / 4 is x * (2 / 4).
+        x, c = a.args
+        combined = None
+        if op in '+-' and a.kind in '+-':
+            combined = _fold(op if a.kind == '+' else _FLIP[op], c, b)
+        elif op in '*/' and a.kind == '*':
+            combined = _fold(op, c, b)
+        if combined is not None:
+            return _binary(a.kind, x, combined)
+
+    if op in '+-' and _is_constant(b) and b.value < 0:
+        return _binary(_FLIP[op], a, _negate(b))
+
+    return _intern((op, a, b), op, (a, b), _PRECEDENCE[op])
+
+def _call(function, arguments):
+    """
+    Return the node of a function call.
+    """
+    args = (function,) + tuple(arguments)
+    return _intern(('call',) + args, 'call', args, _ATOM)
+
+def _intern(key, kind, args, precedence):
+    node = _nodes.get(key)
+    if node is None:
+        node = _nodes[key] = _Node(kind, args, precedence)
+    return node
+
+def _render(node):
+    """
+    Return the text of a node, rendering and caching it if needed.
+
+    The tree is walked with an explicit stack, so that deeply nested
+    expressions do not exhaust the recursion limit.
+    """
+    if node.text is not None:
+        return node.text
+    out = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, _Node):
+            out.append(item)
+        elif item.text is not None:
+            out.append(item.text)
+        elif item.kind == 'neg':
+            operand = item.args[0]
+            if operand.precedence < _ATOM:
+                stack += [')', operand, '-(']
+            else:
+                stack += [operand, '-']
+        elif item.kind == 'call':
+            stack.append(')')
+            for k, argument in enumerate(reversed(item.args[1:])):
+                if k:
+                    stack.append(', ')
+                stack.append(argument)
+            stack.append(item.args[0] + '(')
+        else:
+            left, right = item.args
+            precedence = item.precedence
+            if item.kind in _ARITHMETIC:
+                # Operators of equal precedence group from the left, so a
+                # right operand of - or / keeps its parentheses, and so do
+                # signed right operands.
+                right_parens = (right.precedence < precedence or right.precedence == _UNARY or
+                                (right.precedence == precedence and item.kind in ('-', '/')))
+                left_parens = left.precedence < precedence
+            else:
+                # Powers and comparisons do not chain without parentheses.
+                right_parens = right.precedence <= precedence
+                left_parens = left.precedence <= precedence
+            if right_parens:
+                stack += [')', right, '(']
+            else:
+                stack.append(right)
+            stack.append(' ' + item.kind + ' ' if precedence < _POWER else item.kind)
+            if left_parens:
+                stack += [')', left, '(']
+            else:
+                stack.append(left)
+    node.text = ''.join(out)
+    return node.text
+
+def _node(value):
+    if isinstance(value, Expression):
+        return value._node
+    return _leaf(str(value))
+
+def _tokenize(text):
+    """
+    Split an HFSS expression into (kind, text) tokens.
+    """
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError('cannot parse {e!r}: unexpected {c!r}'.format(
+                             e=text, c=text[position:].strip()[:1]))
+        kind = match.lastgroup
+        token = match.group(kind)
+        tokens.append((kind, '^' if token == '**' else token))
+        position = match.end()
+    return tokens
+
+class _Parser(object):
+    """
+    Recursive descent parser of HFSS expressions into nodes.
+
+    From loosest to tightest binding:  comparisons, sums, products, signs,
+    powers (grouping from the right), and numbers, names, function calls
+    and parentheses.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def _error(self):
+        if self.position < len(self.tokens):
+            found = repr(self.tokens[self.position][1])
+        else:
+            found = 'end'
+        return ValueError('cannot parse {e!r}: unexpected {f}'.format(e=self.text, f=found))
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+        return None
+
+    def _expect(self, token):
+        if self._peek() != token:
+            raise self._error()
+        self.position += 1
+
+    def parse(self):
+        node = self._comparison()
+        if self.position != len(self.tokens):
+            raise self._error()
+        return node
+
+    def _comparison(self):
+        node = self._sum()
+        if _PRECEDENCE.get(self._peek()) == _COMPARE:
+            op = self._peek()
+            self.position += 1
+            node = _binary(op, node, self._sum())
+        return node
+
+    def _sum(self):
+        node = self._product()
+        while self._peek() in ('+', '-'):
+            op = self._peek()
+            self.position += 1
+            node = _binary(op, node, self._product())
+        return node
+
+    def _product(self):
+        node = self._unary()
+        while self._peek() in ('*', '/'):
+            op = self._peek()
+            self.position += 1
+            node = _binary(op, node, self._unary())
+        return node
+
+    def _unary(self):
+        if self._peek() == '-':
+            self.position += 1
+            return _negate(self._unary())
+        if self._peek() == '+':
+            self.position += 1
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._atom()
+        if self._peek() == '^':
+            self.position += 1
+            node = _binary('^', node, self._unary())
+        return node
+
+    def _atom(self):
+        if self.position >= len(self.tokens):
+            raise self._error()
+        kind, token = self.tokens[self.position]
+        self.position += 1
+        if kind == 'number':
+            return _leaf(token)
+        if kind == 'name':
+            if self._peek() != '(':
+                return _leaf(token)
+            self.position += 1
+            arguments = []
+            if self._peek() != ')':
+                arguments.append(self._comparison())
+                while self._peek() == ',':
+                    self.position += 1
+                    arguments.append(self._comparison())
+            self._expect(')')
+            return _call(token, arguments)
+        if token == '(':
+            node = self._comparison()
+            self._expect(')')
+            return node
+        self.position -= 1
+        raise self._error()
+
+class ParseCache(object):
+    """
+    Parsed expressions by their text.
+
+    Attributes
+    ----------
+    hits : int
+        Number of parses answered from the cache.
+    misses : int
+        Number of strings parsed.
+
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._parsed = {}
+
+    def parse(self, text):
+        """
+        Return the node of an expression string.
+        """
+        try:
+            node = self._parsed[text]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return node
+        node = _Parser(text).parse()
+        self.misses += 1
+        if len(self._parsed) >= self.maxsize:
+            self._parsed.clear()
+        self._parsed[text] = node
+        return node
+
+    def info(self):
+        """
+        Return the hit and miss counts and the number of cached strings.
+
+        Returns
+        -------
+        ParseCacheInfo
+            Named tuple (hits, misses, currsize).
+
+        """
+        return ParseCacheInfo(self.hits, self.misses, len(self._parsed))
+
+    def reset_info(self):
+        """
+        Reset the hit and miss counts.
+        """
+        self.hits = 0
+        self.misses = 0
+
+parse_cache = ParseCache()
+
 class Expression(object):
     """
     An HFSS expression.
@@ -36,60 +546,180 @@ class Expression(object):
     
     """
     def __init__(self, expr):
-        if isinstance(expr, Expression):
-            self.expr = expr.expr
+        if isinstance(expr, _Node):
+            self._node = expr
         else:
-            self.expr = str(expr)
-        
+            self._node = _node(expr)
+
+    @property
+    def expr(self):
+        """
+        The string representation, rendered on first access.
+        """
+        return _render(self._node)
+
+    @expr.setter
+    def expr(self, value):
+        self._node = _leaf(str(value))
+
+    def __repr__(self):
+        return 'Expression({e!r})'.format(e=self.expr)
+
+    def variables(self):
+        """
+        Return the names of the design and project variables the expression
+        uses.  Strings in the expression are parsed for this.
+
+        Returns
+        -------
+        set of str
+
+        """
+        names = set()
+        seen = set()
+        stack = [self._node]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node.kind == 'call':
+                stack.extend(node.args[1:])
+            elif node.kind != 'leaf':
+                stack.extend(node.args)
+            elif node.value is None:
+                text = node.text.strip()
+                if _NAME.match(text):
+                    if text not in _RESERVED:
+                        names.add(text)
+                else:
+                    try:
+                        stack.append(parse_cache.parse(node.text))
+                    except ValueError:
+                        pass
+        return names
+
+    def evaluate(self, variables=None, model_units='mm'):
+        """
+        Return the numeric value of the expression for given values of its
+        variables; see hycohanz.evaluator.evaluate_expression().
+        """
+        # Imported here because hycohanz.evaluator pulls in NumPy.
+        from hycohanz.evaluator import evaluate_expression
+        return evaluate_expression(self, variables, model_units)
+
     def __add__(self, y):
         """
         Overloads the addition (+) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') + ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') + ' + str(y))
-        
+        return Expression(_binary('+', self._node, _node(y)))
+
     def __sub__(self, y):
         """
         Overloads the subtraction (-) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') - ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') - ' + str(y))
-        
+        return Expression(_binary('-', self._node, _node(y)))
+
     def __mul__(self, y):
         """
         Overloads the multiplication (*) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') * ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') * ' + str(y))
-        
+        return Expression(_binary('*', self._node, _node(y)))
+
     def __truediv__(self, y):
         """
         Overloads the Python 3 division (/) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') / ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') / ' + str(y))
-            
+        return Expression(_binary('/', self._node, _node(y)))
+
     def __div__(self, y):
         """
         Overloads the Python 3 floor division (//) operator.
         """
         raise NotImplementedError(""""Classic" division is not implemented by 
 design.  Please use from __future__ import division in the calling code.""")
-        
+
     def __neg__(self):
         """
         Overloads the negation (-) operator.
         """
-        return Expression('-(' + self.expr + ')')
+        return Expression(_negate(self._node))
+
+def as_expr(value):
+    """
+    Return the HFSS string representation of a value, i.e. Expression(value).expr 
+    without creating an Expression object.
+    
+    Parameters
+    ----------
+    value : float, int, str, or Expression
+        The value.
+    
+    Returns
+    -------
+    str
+        The string representation.
+    """
+    if isinstance(value, Expression):
+        return value.expr
+    return str(value)
+
+def parse_expression(text, strict=True):
+    """
+    Parse an HFSS expression string into an Expression.
 
+    The result is simplified like any other Expression, e.g. "2mm+1mm"
+    becomes "3mm", and its text has no more parentheses than needed.
+    Parsed strings are cached; see get_parse_cache_info().
+
+    Parameters
+    ----------
+    text : str, Expression or number
+        The expression, e.g. a variable value read back from a design.
+    strict : bool
+        If True, a string that cannot be parsed raises ValueError.  If
+        False, it is returned as an Expression of the string as it is.
+
+    Returns
+    -------
+    Expression
+
+    Raises
+    ------
+    ValueError
+        If strict and the string is not a valid HFSS expression.
+
+    """
+    text = as_expr(text)
+    try:
+        return Expression(parse_cache.parse(text))
+    except ValueError:
+        if strict:
+            raise
+        return Expression(text)
+
+def get_parse_cache_info():
+    """
+    Return statistics of the cache of parsed expressions.
+
+    Returns
+    -------
+    ParseCacheInfo
+        Named tuple (hits, misses, currsize).
+
+    """
+    return parse_cache.info()
+
+def reset_parse_cache_info():
+    """
+    Reset the hit and miss counts of the cache of parsed expressions.
+
+    Returns
+    -------
+    None
+
+    """
+    parse_cache.reset_info()
 
 if __name__ == "__main__":
     import doctest
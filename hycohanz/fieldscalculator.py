@@ -4,11 +4,23 @@ HFSS Fields Calculator functions. Functions in this module correspond more or
 less to the functions described in the HFSS Scripting Guide, Section "Fields 
 Calculator Script Commands".
 
-At last count there were 5 functions implemented out of 28.
+At last count there were 6 functions implemented out of 28.
 """
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import numpy as np
+
+from hycohanz.units import format_values
+
+def _variables_array(freq, phase, variablesdict):
+    variablesarray = ["Freq:=", str(freq) + 'Hz', "Phase:=", str(phase) + 'deg']
+    
+    for key in variablesdict:
+        variablesarray += [str(key) + ':=', str(variablesdict[key])]
+    
+    return variablesarray
+
 def enter_vol(oFieldsReporter, VolumeName):
     """
     Enters a volume defined in the 3D Modeler editor into the Fields Calculator.
@@ -75,13 +87,7 @@ def clc_eval(oFieldsReporter, setupname, sweepname, freq, phase, variablesdict):
     """
     solutionname = setupname + " : " + sweepname
     
-    variablesarray = ["Freq:=", str(freq) + 'Hz', "Phase:=", str(phase) + 'deg']
-    
-    for key in variablesdict:
-        variablesarray += [str(key) + ':=', str(variablesdict[key])]
-        
-    print('solutionname: ' + str(solutionname))
-    print('variablesarray: ' + str(variablesarray))
+    variablesarray = _variables_array(freq, phase, variablesdict)
     
     oFieldsReporter.ClcEval(solutionname, variablesarray)
     
@@ -134,18 +140,93 @@ def get_top_entry_value(oModule, setupname, sweepname, freq, phase, variablesdic
     """
     solutionname = setupname + " : " + sweepname
     
-    variablesarray = ["Freq:=", str(freq) + 'Hz', "Phase:=", str(phase) + 'deg']
-    
-    for key in variablesdict:
-        variablesarray += [str(key) + ':=', str(variablesdict[key])]
-        
-    print('solutionname: ' + str(solutionname))
-    print('variablesarray: ' + str(variablesarray))
+    variablesarray = _variables_array(freq, phase, variablesdict)
     
     result = oModule.GetTopEntryValue(solutionname, variablesarray)
 
     return result
 
+def get_top_entry_values(oModule, setupname, sweepname, freqs, phases=0, 
+                         variablesdict=None, dtype=float):
+    """
+    Evaluates the expression at the top of the stack for many frequencies, 
+    phases and design variations.
+
+    The arguments are broadcast against each other, and the expression is 
+    evaluated once per distinct combination.  The stack is left as it is, 
+    so the expression is only built once.
+
+    Parameters
+    ----------
+    oModule : pywin32 COMObject
+        An HFSS "FieldsReporter" module 
+    setupname : str
+        Name of HFSS setup to use, for example "Setup1"
+    sweepname : str
+        Name of HFSS sweep to use, for example "LastAdaptive"
+    freqs : float or array_like
+        Frequencies in Hz at which to evaluate the calculator expression.
+    phases : float or array_like
+        Phases in degrees at which to evaluate the calculator expression.
+    variablesdict : dict or None
+        Dictionary listing the variables that define the design variation, 
+        except for 'Freq' and 'Phase'.  Variable names are the keys, and the 
+        values are scalars or arrays of values.  Numbers are passed without 
+        unit, strings as they are.  For example: 
+        {'radius': np.linspace(0.5, 1, 11), 'height': '2.0mm'}
+    dtype : numpy dtype
+        Type to which the returned values are converted.  Use complex for 
+        complex-valued expressions, which HFSS returns as a (real, imag) 
+        pair.
+        
+    Returns
+    -------
+    result : numpy.ndarray
+        Value of the expression for each element of the broadcast arguments.
+        
+    Examples
+    --------
+    >>> freqs = np.linspace(1e9, 2e9, 101)
+    >>> widths = np.array([1.0, 1.5, 2.0])
+    >>> result = get_top_entry_values(oFieldsReporter, "Setup1", "Sweep1", 
+    ...                               freqs[:, np.newaxis], 0, {'width': widths})
+    >>> result.shape
+    (101, 3)
+    
+    """
+    if variablesdict is None:
+        variablesdict = {}
+    
+    solutionname = setupname + " : " + sweepname
+    
+    names = ["Freq:=", "Phase:="] + [str(key) + ':=' for key in variablesdict]
+    arrays = np.broadcast_arrays(np.asarray(freqs), 
+                                 np.asarray(phases), 
+                                 *[np.asarray(variablesdict[key]) for key in variablesdict])
+    shape = arrays[0].shape
+    
+    units = ['Hz', 'deg'] + [''] * len(variablesdict)
+    columns = [format_values(array.ravel(), unit).tolist() for array, unit in zip(arrays, units)]
+    
+    result = np.empty(len(columns[0]), dtype=dtype)
+    evaluated = {}
+    for i, variation in enumerate(zip(*columns)):
+        try:
+            result[i] = evaluated[variation]
+            continue
+        except KeyError:
+            pass
+        
+        variablesarray = [item for pair in zip(names, variation) for item in pair]
+        value = oModule.GetTopEntryValue(solutionname, variablesarray)
+        if np.dtype(dtype).kind == 'c' and len(value) > 1:
+            value = complex(float(value[0]), float(value[1]))
+        else:
+            value = value[0]
+        result[i] = evaluated[variation] = value
+    
+    return result.reshape(shape)
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
\ No newline at end of file
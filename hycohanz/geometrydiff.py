@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative geometry with incremental rebuilds.
+
+Parametric studies usually rebuild the whole model for every variant, even
+if only a few parts change.  Instead, the target geometry can be described
+as a list of Part descriptions, and a GeometryModel brings the editor from
+the geometry it built last to the new target with as few edits as it can:
+
+- parts that are no longer wanted are deleted,
+- parts of the same kind and shape under another name are renamed,
+- parts that only moved or were resized are moved and scaled,
+- parts whose material changed get the new material assigned,
+- and only the remaining parts are created.
+
+Edits of the same kind with the same arguments are sent as one command,
+e.g. a single Move for all parts shifted by the same vector.  Parts keep
+their identity (and the boundaries assigned to their faces) when they are
+moved, scaled or renamed.
+
+The model tracks the parameters of the parts it built.  Before planning, it
+asks the editor which parts still exist (get_matched_object_name), so that
+parts deleted by other means are created again.  Parts it did not build are
+left alone.  Numbers are in the model units, and positions and sizes must
+be plain numbers so that the differences can be computed.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> model = hfss.GeometryModel(oEditor)
+>>> for w in [1.0, 1.1, 1.2]:
+...     edits = model.apply([hfss.box_part('Substrate', (0, 0, 0), (10, 10, 0.8), 'FR4_epoxy'),
+...                          hfss.box_part('Patch', (5 - w / 2, 2, 0.8), (w, 5, 0.035), 'copper')])
+>>> edits
+[Edit(op='scale', names=('Patch',), args=(1.0909..., 1.0, 1.0)), Edit(op='move', ...)]
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+from collections import namedtuple
+
+from hycohanz.modeler3d import (get_matched_object_name,
+                                create_box,
+                                create_sphere,
+                                create_rectangle,
+                                create_circle,
+                                delete,
+                                rename_part,
+                                move,
+                                scale,
+                                assign_material)
+
+Part = namedtuple('Part', ['name', 'kind', 'position', 'shape', 'material'])
+Part.__doc__ = """
+A part of the target geometry.
+
+position is the base point of boxes and rectangles and the center of
+spheres and circles; shape holds the other parameters, e.g. the sizes of a
+box.  Use box_part(), sphere_part(), rectangle_part() and circle_part() to
+construct them.
+"""
+
+Edit = namedtuple('Edit', ['op', 'names', 'args'])
+Edit.__doc__ = """
+One command of an incremental rebuild:  op is "delete", "rename", "scale",
+"move", "assign_material" or "create", names the parts it applies to, and
+args its arguments, e.g. the translation vector of a move.
+"""
+
+# Relative tolerance when comparing positions and sizes.
+_RTOL = 1e-12
+
+# In-plane (u, v) axes of rectangles by normal axis, as in HFSS.
+_PLANES = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}
+
+def _vector(values):
+    return tuple(float(v) for v in values)
+
+def box_part(name, position, size, material='vacuum'):
+    """
+    Describe a box.
+
+    Parameters
+    ----------
+    name : str
+        Name of the part.
+    position : tuple of float
+        x, y and z of the base point.
+    size : tuple of float
+        x, y and z dimensions.  Negative dimensions are measured from the
+        base point in the negative direction.
+    material : str
+        Material name.
+
+    Returns
+    -------
+    Part
+
+    """
+    position = list(_vector(position))
+    size = list(_vector(size))
+    for k in range(3):
+        if size[k] < 0:
+            position[k] += size[k]
+            size[k] = -size[k]
+    return Part(name, 'box', tuple(position), tuple(size), material)
+
+def sphere_part(name, center, radius, material='vacuum'):
+    """
+    Describe a sphere.
+
+    Parameters
+    ----------
+    name : str
+        Name of the part.
+    center : tuple of float
+        x, y and z of the center.
+    radius : float
+        Radius of the sphere.
+    material : str
+        Material name.
+
+    Returns
+    -------
+    Part
+
+    """
+    return Part(name, 'sphere', _vector(center), (float(radius),), material)
+
+def rectangle_part(name, position, width, height, WhichAxis='Z', material='vacuum'):
+    """
+    Describe a covered rectangle.
+
+    Parameters
+    ----------
+    name : str
+        Name of the part.
+    position : tuple of float
+        x, y and z of the start point.
+    width, height : float
+        Dimensions along the first and second in-plane axes.
+    WhichAxis : str
+        The normal axis, "X", "Y" or "Z".
+    material : str
+        Material name.
+
+    Returns
+    -------
+    Part
+
+    """
+    return Part(name, 'rectangle', _vector(position),
+                (float(width), float(height), WhichAxis), material)
+
+def circle_part(name, center, radius, WhichAxis='Z', material='vacuum'):
+    """
+    Describe a circle.
+
+    Parameters
+    ----------
+    name : str
+        Name of the part.
+    center : tuple of float
+        x, y and z of the center.
+    radius : float
+        Radius of the circle.
+    WhichAxis : str
+        The normal axis, "X", "Y" or "Z".
+    material : str
+        Material name.
+
+    Returns
+    -------
+    Part
+
+    """
+    return Part(name, 'circle', _vector(center), (float(radius), WhichAxis), material)
+
+def _close(a, b):
+    return abs(a - b) <= _RTOL * max(abs(a), abs(b), 1.0)
+
+def _same(u, v):
+    return len(u) == len(v) and all(_close(a, b) if isinstance(a, float) and isinstance(b, float)
+                                    else a == b for a, b in zip(u, v))
+
+def _same_shape(part, other):
+    return part.kind == other.kind and _same(part.shape, other.shape)
+
+def _factors(current, target):
+    """
+    Return the x, y and z factors that scale the shape of current into the
+    shape of target, or None if no scaling does.
+    """
+    if current.kind != target.kind:
+        return None
+    if current.kind == 'box':
+        if 0 in current.shape:
+            return None
+        return tuple(t / c for c, t in zip(current.shape, target.shape))
+    if current.kind in ('sphere', 'circle'):
+        if current.shape[1:] != target.shape[1:] or current.shape[0] == 0:
+            return None
+        return (target.shape[0] / current.shape[0],) * 3
+    # A rectangle:  the factor along the normal does not matter.
+    width, height, axis = current.shape
+    if target.shape[2] != axis or width == 0 or height == 0:
+        return None
+    factors = [1.0, 1.0, 1.0]
+    u, v = _PLANES[axis]
+    factors[u] = target.shape[0] / width
+    factors[v] = target.shape[1] / height
+    return tuple(factors)
+
+def _transform(current, target):
+    """
+    Return the scale factors (or None) and the translation that turn
+    current into target, or None if they cannot.
+    """
+    factors = _factors(current, target)
+    if factors is None or 0 in factors:
+        return None
+    if all(_close(f, 1.0) for f in factors):
+        factors = None
+        position = current.position
+    else:
+        # HFSS scales about the origin.
+        position = tuple(f * p for f, p in zip(factors, current.position))
+    shift = tuple(t - p for p, t in zip(position, target.position))
+    if all(_close(p, t) for p, t in zip(position, target.position)):
+        shift = None
+    return factors, shift
+
+def _identical(part, other):
+    return (part.kind == other.kind and part.material == other.material and
+            _same_shape(part, other) and _same(part.position, other.position))
+
+# Ways of pairing a current part (old, part) with a target part (new,
+# wanted), from the cheapest to the most expensive in edits.
+_PAIRINGS = (lambda old, part, new, wanted: old == new and _same_shape(part, wanted),
+             lambda old, part, new, wanted: _identical(part, wanted),
+             lambda old, part, new, wanted: old == new,
+             lambda old, part, new, wanted: _same_shape(part, wanted),
+             lambda old, part, new, wanted: True)
+
+def _match(current, target):
+    """
+    Pair current parts with target parts that they can be turned into,
+    preferring pairs that need fewer edits.
+
+    Returns the pairs as {current name: target name}, the current parts
+    left over and the target parts left over.
+    """
+    pairs = collections.OrderedDict()
+    free = collections.OrderedDict(current)
+    unpaired = list(target)
+    for number, pairing in enumerate(_PAIRINGS):
+        for new in list(unpaired):
+            wanted = target[new]
+            if number in (0, 2):
+                # Pairings by name.
+                candidates = [new] if new in free else []
+            else:
+                candidates = free
+            for old in candidates:
+                part = free[old]
+                if pairing(old, part, new, wanted) and _transform(part, wanted) is not None:
+                    pairs[old] = new
+                    del free[old]
+                    unpaired.remove(new)
+                    break
+    return pairs, list(free), unpaired
+
+def _order_renames(renames, existing):
+    """
+    Order renames so that no part is renamed to a name in use, going
+    through a temporary name to break cycles.
+    """
+    pending = collections.OrderedDict(renames)
+    names = set(existing)
+    ordered = []
+    while pending:
+        for old, new in pending.items():
+            if new not in names:
+                break
+        else:
+            # Every target name is taken:  a cycle.
+            old, new = next(iter(pending.items()))
+            temporary = old + '_renamed'
+            while temporary in names:
+                temporary += '_'
+            ordered.append((old, temporary))
+            names.discard(old)
+            names.add(temporary)
+            del pending[old]
+            pending[temporary] = new
+            continue
+        ordered.append((old, new))
+        names.discard(old)
+        names.add(new)
+        del pending[old]
+    return ordered
+
+def diff_geometry(current, target):
+    """
+    Plan the edits that turn the current parts into the target parts.
+
+    Parameters
+    ----------
+    current : list of Part or dict
+        The parts as they are, or a dict of them by name.
+    target : list of Part or dict
+        The parts as they should be, or a dict of them by name.
+
+    Returns
+    -------
+    list of Edit
+        The edits, in the order they are to be applied:  deletes, renames,
+        scales, moves, material assignments and creates.
+
+    Parts of different kinds are never turned into each other:
+
+    >>> edits = diff_geometry([box_part('A', (0, 0, 0), (1, 1, 1))],
+    ...                       [circle_part('B', (0, 0, 0), 1)])
+    >>> [(edit.op, edit.names) for edit in edits]
+    [('delete', ('A',)), ('create', ('B',))]
+
+    """
+    if not isinstance(current, dict):
+        current = collections.OrderedDict((part.name, part) for part in current)
+    if not isinstance(target, dict):
+        target = collections.OrderedDict((part.name, part) for part in target)
+
+    pairs, deleted, created = _match(current, target)
+    edits = []
+    if deleted:
+        edits.append(Edit('delete', tuple(deleted), ()))
+
+    renames = [(old, new) for old, new in pairs.items() if old != new]
+    existing = [name for name in current if name not in deleted]
+    for old, new in _order_renames(renames, existing):
+        edits.append(Edit('rename', (old,), (new,)))
+
+    # Group the edits with equal arguments into one command.
+    groups = collections.OrderedDict()
+    for old, new in pairs.items():
+        factors, shift = _transform(current[old], target[new])
+        if factors is not None:
+            groups.setdefault(('scale', factors), []).append(new)
+        if shift is not None:
+            groups.setdefault(('move', shift), []).append(new)
+        if current[old].material != target[new].material:
+            groups.setdefault(('assign_material', (target[new].material,)), []).append(new)
+    for op in ('scale', 'move', 'assign_material'):
+        for (kind, args), names in groups.items():
+            if kind == op:
+                edits.append(Edit(op, tuple(names), tuple(args)))
+
+    for name in created:
+        edits.append(Edit('create', (name,), (target[name],)))
+    return edits
+
+def _create(oEditor, part):
+    material = '"{m}"'.format(m=part.material)
+    x, y, z = part.position
+    if part.kind == 'box':
+        return create_box(oEditor, x, y, z, *part.shape, Name=part.name, MaterialValue=material)
+    if part.kind == 'sphere':
+        return create_sphere(oEditor, x, y, z, part.shape[0], Name=part.name, MaterialValue=material)
+    if part.kind == 'rectangle':
+        width, height, axis = part.shape
+        return create_rectangle(oEditor, x, y, z, width, height, WhichAxis=axis,
+                                Name=part.name, MaterialValue=material)
+    if part.kind == 'circle':
+        radius, axis = part.shape
+        return create_circle(oEditor, x, y, z, radius, WhichAxis=axis,
+                             Name=part.name, MaterialName=material)
+    raise ValueError('unknown part kind: {k}'.format(k=part.kind))
+
+class GeometryModel(object):
+    """
+    The parts built in an editor, brought to new targets incrementally.
+
+    Attributes
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    parts : OrderedDict
+        Part by name of every part the model built, as it was built.
+
+    """
+    def __init__(self, oEditor):
+        self.oEditor = oEditor
+        self.parts = collections.OrderedDict()
+
+    def track(self, part):
+        """
+        Start tracking a part that exists in the editor already, e.g. one
+        built before the model was created.
+        """
+        self.parts[part.name] = part
+
+    def sync(self):
+        """
+        Forget the tracked parts that no longer exist in the editor.
+        """
+        names = set(get_matched_object_name(self.oEditor, '*'))
+        for name in [name for name in self.parts if name not in names]:
+            del self.parts[name]
+
+    def plan(self, target):
+        """
+        Return the edits that apply() would make, without making them.
+
+        Parameters
+        ----------
+        target : list of Part
+            The parts as they should be.
+
+        Returns
+        -------
+        list of Edit
+
+        """
+        self.sync()
+        return diff_geometry(self.parts, target)
+
+    def apply(self, target):
+        """
+        Bring the editor to the target geometry.
+
+        Parameters
+        ----------
+        target : list of Part
+            The parts as they should be.  Parts not built by the model are
+            not touched; if one has the name of a part to create, HFSS
+            gives the new part another name, under which it is tracked.
+
+        Returns
+        -------
+        list of Edit
+            The edits made.
+
+        """
+        target = collections.OrderedDict((part.name, part) for part in target)
+        edits = self.plan(target)
+        for edit in edits:
+            if edit.op == 'delete':
+                delete(self.oEditor, list(edit.names))
+            elif edit.op == 'rename':
+                rename_part(self.oEditor, edit.names[0], edit.args[0])
+            elif edit.op == 'scale':
+                scale(self.oEditor, list(edit.names), *edit.args)
+            elif edit.op == 'move':
+                move(self.oEditor, list(edit.names), *edit.args)
+            elif edit.op == 'assign_material':
+                assign_material(self.oEditor, list(edit.names), edit.args[0])
+            else:
+                part = edit.args[0]
+                name = _create(self.oEditor, part)
+                target[part.name] = part if name == part.name else part._replace(name=name)
+
+        self.parts = collections.OrderedDict((part.name, part) for part in target.values())
+        return edits
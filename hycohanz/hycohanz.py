@@ -20,6 +20,13 @@ warnings.simplefilter('default')
 
 from hycohanz.appobject import setup_interface
 
+from hycohanz.backend import (register_backend,
+                              available_backends)
+
+from hycohanz.instrument import (enable_instrumentation,
+                                 disable_instrumentation,
+                                 get_recorder)
+
 from hycohanz.desktop import (quit_application, 
                               new_project, 
                               open_project, 
@@ -32,7 +39,12 @@ from hycohanz.desktop import (quit_application,
                               close_all_projects_except_current,
                               save_as_project)
 
-from hycohanz.project import *
+from hycohanz.project import (get_project_name,
+                              set_active_design,
+                              insert_design,
+                              get_design,
+                              delete_design,
+                              get_top_design_list)
 
 from hycohanz.property import ( add_property,
                                 set_variable,
@@ -40,12 +52,52 @@ from hycohanz.property import ( add_property,
                                 )
 
 from hycohanz.design import (get_module, 
+                             invalidate_module_cache,
+                             get_module_cache_info,
+                             reset_module_cache_info,
                              set_active_editor,
                              solve_optimetrics,
                              solve)
 
-from hycohanz.expression import Expression
+from hycohanz.expression import (Expression,
+                                 parse_expression,
+                                 get_parse_cache_info,
+                                 reset_parse_cache_info)
+from hycohanz.attributes import Attributes
+from hycohanz.box import (Box,
+                          BoxArray,
+                          RectangleArray,
+                          SphereArray,
+                          CylinderArray)
 from hycohanz.modeler3d import *
+from hycohanz.querycache import (enable_query_cache,
+                                 invalidate_query_cache,
+                                 get_query_cache_info,
+                                 reset_query_cache_info)
+from hycohanz.scenegraph import (enable_scene_graph,
+                                 clear_scene_graph,
+                                 get_scene,
+                                 get_bounding_box,
+                                 get_face_centers)
+from hycohanz.spatialindex import (enable_spatial_index,
+                                   locate_faces,
+                                   locate_edges,
+                                   get_spatial_index_info,
+                                   reset_spatial_index_info)
+from hycohanz.importcache import (enable_import_cache,
+                                  invalidate_import_cache,
+                                  get_import_cache_info,
+                                  reset_import_cache_info)
+from hycohanz.chunking import (split_selection,
+                               enable_chunking,
+                               get_chunk_stats,
+                               get_chunking_info,
+                               reset_chunking_info)
+from hycohanz.materialqueue import (DeferredMaterials,
+                                    enable_deferred_materials,
+                                    flush_materials,
+                                    get_material_queue_info,
+                                    reset_material_queue_info)
 from hycohanz.material import ( add_material,
                                 does_material_exist,
                                 )
@@ -71,205 +123,56 @@ from hycohanz.fieldscalculator import (enter_vol,
                                        calc_op, 
                                        clc_eval, 
                                        enter_qty, 
-                                       get_top_entry_value)
+                                       get_top_entry_value,
+                                       get_top_entry_values)
 
 from hycohanz.report_and_export import (create_report,
                                         export_to_file)
 
-class App():
-    """
-    Context manager for HFSS App and Desktop objects.
-    """
-    def __enter__(self):
-        """
-        The win32com.client.Dispatch() function starts HFSS and assigns a 
-        handle to the application as oAnsoftApp.  However, oAnsoftApp 
-        doesn't have a method to properly deallocate itself, i.e. to shut the 
-        application down.  Therefore we need to do two operations:
-        
-        1. Dispatch the oAnsoftApp object using win32com.client.Dispatch()
-        
-        2. Get a oDesktop object by calling oAnsoftApp.GetAppDesktop() that 
-           has the oDesktop.QuitApplication() method that we can use to 
-           unwind the dispatch call.
-        """
-        print('__enter__()')
-        self.oAnsoftApp, self.oDesktop = setup_interface()
-        
-        return self
-    
-    def __exit__(self, typ, val, traceback):
-        """
-        Destructor for the App class.  This function is empty for two related 
-        reasons:
-        
-        1. This class is intended to be used only with the 'with'-statement 
-           execution-managed environment. Plus,
-           
-        2. 'with'-statement blocks don't define a new scope, so destructors 
-           don't generally get called upon exit of the 'with' block.
-           
-        3. The only methods guaranteed to be run in a 'with'-block 
-           are __enter__() at entry, and __exit() at exit.
-        """
-        quit_application(self.oDesktop)
-        del self.oDesktop
-        del self.oAnsoftApp
-        
-        print('__exit__()')
-        
-class OpenProject():
-    """
-    Context manager for opening HFSS projects.
-    """
-    def __init__(self, oDesktop, filepath):
-        self.oDesktop = oDesktop
-        self.filepath = filepath
-        
-        
-    def __enter__(self):
-        self.oProject = open_project(self.oDesktop, self.filepath)
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        close_project_byhandle(self.oDesktop, self.oProject)
-        
-        del self.oProject
-        del self.oDesktop
-        
-class NewProject():
-    """
-    Create an HFSS project.  See docstring for new_project for call signature.
-    """
-    def __init__(self, oDesktop):
-        self.oDesktop = oDesktop
-    
-    def __enter__(self):
-        self.oProject = new_project(self.oDesktop)
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        close_project_byhandle(self.oDesktop, self.oProject)
-        
-        del self.oProject
-        del self.oDesktop
-
-class SetActiveEditor():
-    """
-    """
-    def __init__(self, oDesign):
-        self.oDesign = oDesign
-        
-    def __enter__(self): 
-        self.oEditor = set_active_editor(self.oDesign, editorname="3D Modeler")
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        del self.oEditor
-        del self.oDesign
-        
-class SetActiveDesign():
-    """
-    """
-    def __init__(self, oProject, designname):
-        self.oProject = oProject
-        self.designname = designname
-        
-    def __enter__(self):
-        self.oDesign_orig = self.oProject.GetActiveDesign()
-        
-        print(self.oDesign_orig)
-        
-        if self.oDesign_orig is not None:
-            self.designname_orig = self.oDesign_orig.GetName()
-        
-        self.oDesign = set_active_design(self.oProject, self.designname)
-        
-        return self
-
-    def __exit__(self, typ, val, traceback):
-        if self.oDesign_orig is not None:
-            set_active_design(self.oProject, self.designname_orig)
-        
-        del self.oDesign
-        del self.oDesign_orig
-        del self.oProject
-        
-class InsertDesign():
-    """
-    """
-    def __init__(self, oProject, designname, solutiontype):
-        self.oProject = oProject
-        self.designname = designname
-        self.solutiontype = solutiontype
-        
-    def __enter__(self):
-        self.oDesign_orig = self.oProject.GetActiveDesign()
-        
-        if self.oDesign_orig is not None:
-            self.designname_orig = self.oDesign_orig.GetName()
-        
-        self.oDesign = insert_design(self.oProject, self.designname, self.solutiontype)
-    
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        if self.oDesign_orig is not None:
-            set_active_design(self.oProject, self.designname_orig)
-        
-        del self.oDesign_orig
-        del self.oDesign
-        del self.oProject
-
-class GetActiveProject():
-    """
-    """
-    def __init__(self, oDesktop):
-        self.oDesktop = oDesktop
-    def __enter__(self):
-        self.oProject = get_active_project(self.oDesktop)
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        del self.oProject
-        del self.oDesktop
-
-class GetProjects():
-    """
-    Get the list of open projects.  See get_projects() docstring for 
-    call signature.
-    """
-    def __init__(self, oDesktop):
-        self.oDesktop = oDesktop
-        
-    def __enter__(self):
-        self.oProjectlist = get_projects(self.oDesktop)
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        del self.oProjectlist
-        del self.oDesktop
-
-class GetModule():
-    """
-    """
-    def __init__(self, oDesign, ModuleName):
-        self.oDesign = oDesign
-        self.ModuleName = ModuleName
-    
-    def __enter__(self):
-        self.oModule = get_module(self.oDesign, self.ModuleName)
-        
-        return self
-        
-    def __exit__(self, typ, val, traceback):
-        del self.oModule
-        del self.oDesign
-    
-
-
+from hycohanz.batch import BatchEditor
+
+from hycohanz.bulk import (create_boxes,
+                           create_rectangles,
+                           create_circles,
+                           create_spheres)
+
+from hycohanz.booleans import (plan_unite,
+                               unite_many,
+                               subtract_many,
+                               get_boolean_info,
+                               reset_boolean_info)
+
+from hycohanz.evaluator import (Evaluator,
+                                evaluate_expression,
+                                evaluate_grid)
+
+from hycohanz.eqcurve import EquationCurve
+
+from hycohanz.geometrydiff import (Part,
+                                   Edit,
+                                   box_part,
+                                   sphere_part,
+                                   rectangle_part,
+                                   circle_part,
+                                   diff_geometry,
+                                   GeometryModel)
+
+from hycohanz.lattice import (plan_duplication,
+                              linear_array,
+                              rectangular_array,
+                              circular_array)
+
+from hycohanz.executor import ComExecutor
+
+from hycohanz.pool import (DesktopPool,
+                           Lease)
+
+from hycohanz.contextmanagers import (App,
+                                      OpenProject,
+                                      NewProject,
+                                      SetActiveEditor,
+                                      SetActiveDesign,
+                                      InsertDesign,
+                                      GetActiveProject,
+                                      GetProjects,
+                                      GetModule)
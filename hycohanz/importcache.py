@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of imported CAD models.
+
+Importing a large STEP or SAT file makes HFSS parse and heal the whole
+model, which can take minutes, and flows that build many designs import
+the same connectors and housings into each of them.  With the import cache
+enabled, import_model() remembers the bodies that each import created, by
+a hash of the file contents and the import options.  When the same file is
+imported again, the bodies are copied from the design that imported them
+and pasted into the new one instead, which is a matter of seconds.  The
+HFSS clipboard is shared by all designs of a desktop, so this works across
+designs and projects.  Pasted bodies are named the way HFSS names copies,
+e.g. "Connector_1" instead of "Connector"; use the names import_model()
+returns.
+
+Bodies are only copied while they are as imported:  the cache follows them
+in the scene graph, which it enables, and imports the file again once a
+body has been moved, transformed, combined, renamed, deleted or assigned a
+material.  Every import, cached or not, is listed in ImportCache.history
+with the names of the resulting parts.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> hfss.enable_import_cache()
+False
+>>> parts = hfss.import_model(oEditor1, 'SMA_connector.step')
+>>> parts = hfss.import_model(oEditor2, 'SMA_connector.step')  # copied
+>>> hfss.get_import_cache_info()
+ImportCacheInfo(hits=1, misses=1, currsize=1)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+from hycohanz.backend import handle_key
+from hycohanz.scenegraph import IDENTITY, scene_graph, enable_scene_graph
+
+ImportCacheInfo = namedtuple('ImportCacheInfo', ['hits', 'misses', 'currsize'])
+
+ImportRecord = namedtuple('ImportRecord', ['sourcefile', 'digest', 'names', 'cached'])
+
+# Bytes read at a time when hashing a file.
+_BLOCK_SIZE = 1 << 20
+
+def file_digest(path):
+    """
+    Return the SHA-256 hex digest of the contents of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        block = f.read(_BLOCK_SIZE)
+        while block:
+            digest.update(block)
+            block = f.read(_BLOCK_SIZE)
+    return digest.hexdigest()
+
+class ImportCache(object):
+    """
+    Imported bodies by file contents and import options.
+
+    Attributes
+    ----------
+    enabled : bool
+        If False, every import is passed on to the editor.
+    hits : int
+        Number of imports satisfied by copying bodies.
+    misses : int
+        Number of imports passed on to the editor.
+    history : list of ImportRecord
+        Every import:  the source file, the digest of its contents, the
+        names of the resulting parts, and whether they were copied.
+
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.history = []
+        # (digest, options) -> (oEditor, names of the imported bodies)
+        self._sources = {}
+        # (path, size, mtime) -> digest, so that unchanged files are hashed once
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path):
+        """
+        Return the digest of a file, hashing it only if it changed.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _pristine(self, oEditor, names):
+        """
+        Whether the bodies are still as imported.
+        """
+        scene = scene_graph.scene(oEditor)
+        for name in names:
+            obj = scene.get(name)
+            if (obj is None or obj.kind != 'Import' or obj.transform != IDENTITY or
+                    obj.material is not None):
+                return False
+        return bool(names)
+
+    def lookup(self, oEditor, sourcefile, options, fetch):
+        """
+        Import a file, or copy the bodies of an earlier import of it.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor to import into.
+        sourcefile : str
+            Name of the file.
+        options : tuple
+            Hashable import options.
+        fetch : callable
+            Called without arguments to import the file, returning the
+            names of the created parts.
+
+        Returns
+        -------
+        tuple of str
+            The names of the created parts.
+
+        """
+        if not self.enabled or not scene_graph.enabled or not os.path.isfile(sourcefile):
+            return fetch()
+
+        # Imported here to avoid circular imports.
+        from hycohanz.modeler3d import copy, paste
+        from hycohanz.ownership import root
+
+        digest = self.digest(sourcefile)
+        key = (digest, options)
+        with self._lock:
+            source = self._sources.get(key)
+        # Bodies can only be pasted from the clipboard of the same desktop.
+        if (source is not None and root(source[0]) == root(oEditor) and
+                self._pristine(*source)):
+            copy(source[0], list(source[1]))
+            names = tuple(paste(oEditor))
+            cached = True
+        else:
+            names = tuple(fetch())
+            cached = False
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._sources[key] = (oEditor, names)
+            self.history.append(ImportRecord(sourcefile, digest, names, cached))
+        return names
+
+    def invalidate(self, oEditor=None):
+        """
+        Forget the imports into an editor, or all imports.
+        """
+        with self._lock:
+            if oEditor is None:
+                self._sources.clear()
+                self._digests.clear()
+                return
+            key = handle_key(oEditor)
+            for source in [s for s, (editor, names) in self._sources.items()
+                           if handle_key(editor) == key]:
+                del self._sources[source]
+
+    def info(self):
+        """
+        Return the hit and miss counts and the number of cached imports.
+
+        Returns
+        -------
+        ImportCacheInfo
+            Named tuple (hits, misses, currsize).
+
+        """
+        return ImportCacheInfo(self.hits, self.misses, len(self._sources))
+
+    def reset_info(self):
+        """
+        Reset the hit and miss counts and the history.
+        """
+        self.hits = 0
+        self.misses = 0
+        del self.history[:]
+
+import_cache = ImportCache()
+
+def enable_import_cache(enabled=True):
+    """
+    Turn copying of already imported models on or off.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to cache.  Turning the cache on also turns on the scene
+        graph, which follows the imported bodies; turning it off empties
+        the cache.
+
+    Returns
+    -------
+    bool
+        Whether caching was enabled before.
+
+    """
+    previous = import_cache.enabled
+    import_cache.enabled = enabled
+    if enabled:
+        enable_scene_graph()
+    else:
+        import_cache.invalidate()
+    return previous
+
+def invalidate_import_cache():
+    """
+    Forget all cached imports, e.g. after changing imported bodies without
+    going through hycohanz.
+
+    Returns
+    -------
+    None
+
+    """
+    import_cache.invalidate()
+
+def get_import_cache_info():
+    """
+    Return statistics of the import cache.
+
+    Returns
+    -------
+    ImportCacheInfo
+        Named tuple (hits, misses, currsize).
+
+    """
+    return import_cache.info()
+
+def reset_import_cache_info():
+    """
+    Reset the hit and miss counts and the history of the import cache.
+
+    Returns
+    -------
+    None
+
+    """
+    import_cache.reset_info()
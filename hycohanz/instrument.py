@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in timing of every call made through the HFSS scripting handles.
+
+While instrumentation is enabled, the handles returned by setup_interface(),
+insert_design(), set_active_editor() and get_module() are wrapped in a
+proxy that times each method call and records its latency and the size of
+its arguments.  Handles returned by wrapped handles (projects, designs,
+editors, modules, ...) are wrapped as well.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> recorder = hfss.enable_instrumentation()
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> # ... build the model ...
+>>> print(recorder.report())
+>>> recorder.dump('calls.json')
+>>> hfss.disable_instrumentation()
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import io
+import json
+import math
+import threading
+import time
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# Upper bounds, in seconds, of the latency histogram buckets.  The last
+# bucket collects everything slower.
+HISTOGRAM_BOUNDS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+_PLAIN_TYPES = (string_types, bytes, int, float, bool, type(None), list, dict)
+
+def payload_size(value):
+    """
+    Estimate the number of bytes needed to marshal a call argument.
+
+    Parameters
+    ----------
+    value : object
+        A script command argument, typically a nested list of strings and
+        numbers.
+
+    Returns
+    -------
+    int
+        Approximate payload size in bytes.
+
+    """
+    if isinstance(value, string_types):
+        return 2 * len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    return 8
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = int(math.ceil(fraction * len(ordered))) - 1
+    return ordered[max(0, min(index, len(ordered) - 1))]
+
+class MethodStats(object):
+    """
+    Call statistics of one script command.
+
+    Attributes
+    ----------
+    count : int
+        Number of calls.
+    total : float
+        Total time spent in the calls, in seconds.
+    payload : int
+        Total estimated argument size in bytes.
+    samples : list of float
+        Latency of each call in seconds.
+    histogram : list of int
+        Number of calls per latency bucket, see HISTOGRAM_BOUNDS.
+
+    """
+    def __init__(self, method):
+        self.method = method
+        self.count = 0
+        self.total = 0.0
+        self.payload = 0
+        self.samples = []
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, seconds, payload):
+        self.count += 1
+        self.total += seconds
+        self.payload += payload
+        self.samples.append(seconds)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if seconds <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def summary(self):
+        """
+        Return the statistics as a dict.
+        """
+        ordered = sorted(self.samples)
+        return {'method': self.method,
+                'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else 0.0,
+                'p50': _percentile(ordered, 0.50),
+                'p95': _percentile(ordered, 0.95),
+                'p99': _percentile(ordered, 0.99),
+                'payload': self.payload,
+                'histogram': list(self.histogram)}
+
+class Recorder(object):
+    """
+    Collects per-method call statistics from instrumented handles.
+    """
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, seconds, payload=0):
+        """
+        Record one call.
+
+        Parameters
+        ----------
+        method : str
+            Name of the script command, e.g. "CreateBox".
+        seconds : float
+            Time spent in the call.
+        payload : int
+            Estimated argument size in bytes.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            try:
+                stats = self.stats[method]
+            except KeyError:
+                stats = self.stats[method] = MethodStats(method)
+            stats.add(seconds, payload)
+
+    def reset(self):
+        """
+        Discard all recorded calls.
+        """
+        with self._lock:
+            self.stats.clear()
+
+    def summary(self):
+        """
+        Return the statistics of all methods, slowest total first.
+
+        Returns
+        -------
+        list of dict
+            See MethodStats.summary().
+
+        """
+        with self._lock:
+            rows = [stats.summary() for stats in self.stats.values()]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+    def report(self):
+        """
+        Format the statistics as a text table.
+
+        Returns
+        -------
+        str
+            One line per method with count, total time, mean and
+            p50/p95/p99 latencies in milliseconds, and argument bytes.
+
+        """
+        rows = self.summary()
+        width = max([len('method')] + [len(row['method']) for row in rows])
+        header = '{m:<{w}} {c:>8} {t:>10} {a:>9} {p50:>9} {p95:>9} {p99:>9} {b:>12}'.format(
+                 m='method', w=width, c='count', t='total[s]', a='mean[ms]',
+                 p50='p50[ms]', p95='p95[ms]', p99='p99[ms]', b='bytes')
+        lines = [header, '-' * len(header)]
+        for row in rows:
+            lines.append('{m:<{w}} {c:>8d} {t:>10.3f} {a:>9.3f} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f} {b:>12d}'.format(
+                         m=row['method'], w=width, c=row['count'], t=row['total'],
+                         a=1e3 * row['mean'], p50=1e3 * row['p50'], p95=1e3 * row['p95'],
+                         p99=1e3 * row['p99'], b=row['payload']))
+        lines.append('-' * len(header))
+        lines.append('{m:<{w}} {c:>8d} {t:>10.3f}'.format(
+                     m='all', w=width, c=sum(row['count'] for row in rows),
+                     t=sum(row['total'] for row in rows)))
+        return '\n'.join(lines)
+
+    def to_json(self, indent=2):
+        """
+        Format the statistics as JSON.
+
+        Returns
+        -------
+        str
+            A JSON object with the histogram bucket bounds and the per-method
+            statistics.
+
+        """
+        return json.dumps({'histogram_bounds': list(HISTOGRAM_BOUNDS),
+                           'methods': self.summary()}, indent=indent)
+
+    def dump(self, filename, format=None):
+        """
+        Write the report to a file.
+
+        Parameters
+        ----------
+        filename : str
+            Output file name.
+        format : str or None
+            "text" or "json".  If None, "json" is used for file names ending
+            in ".json" and "text" otherwise.
+
+        Returns
+        -------
+        None
+
+        """
+        if format is None:
+            format = 'json' if filename.lower().endswith('.json') else 'text'
+        if format == 'json':
+            text = self.to_json()
+        elif format == 'text':
+            text = self.report()
+        else:
+            raise ValueError('format must be "text" or "json"')
+
+        with io.open(filename, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+class InstrumentedHandle(object):
+    """
+    Proxy for an HFSS scripting handle that times every method call.
+
+    Parameters
+    ----------
+    target : pywin32 COMObject
+        The wrapped handle.
+    recorder : Recorder
+        Where the calls are recorded.
+
+    """
+    def __init__(self, target, recorder):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_recorder', recorder)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        recorder = self._recorder
+
+        def timed(*args):
+            start = _clock()
+            try:
+                result = attr(*args)
+            finally:
+                recorder.record(name, _clock() - start, payload_size(args))
+            return _wrap(result, recorder)
+
+        return timed
+
+    @property
+    def _hycohanz_target_(self):
+        return self._target
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other):
+        return self._target == unwrap(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return '<InstrumentedHandle of {t!r}>'.format(t=self._target)
+
+def _wrap(result, recorder):
+    if isinstance(result, tuple):
+        return tuple(_wrap(item, recorder) for item in result)
+    if isinstance(result, _PLAIN_TYPES) or isinstance(result, InstrumentedHandle):
+        return result
+    return InstrumentedHandle(result, recorder)
+
+def unwrap(handle):
+    """
+    Return the handle behind a proxy such as InstrumentedHandle, or handle
+    itself if it is not a proxy.
+
+    Proxies expose the handle they stand for as their _hycohanz_target_
+    attribute.  The trailing underscore keeps pywin32 from looking the name
+    up through COM.
+    """
+    target = getattr(handle, '_hycohanz_target_', None)
+    while target is not None:
+        handle = target
+        target = getattr(handle, '_hycohanz_target_', None)
+    return handle
+
+_recorder = None
+
+def enable_instrumentation(recorder=None):
+    """
+    Start wrapping newly obtained handles in timing proxies.
+
+    Parameters
+    ----------
+    recorder : Recorder or None
+        Where to record the calls.  A new Recorder is created if None.
+
+    Returns
+    -------
+    Recorder
+        The active recorder.
+
+    """
+    global _recorder
+    _recorder = recorder if recorder is not None else Recorder()
+    return _recorder
+
+def disable_instrumentation():
+    """
+    Stop wrapping newly obtained handles.  Handles that are already wrapped
+    keep recording into their recorder.
+
+    Returns
+    -------
+    Recorder or None
+        The recorder that was active.
+
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+def get_recorder():
+    """
+    Return the active Recorder, or None if instrumentation is disabled.
+    """
+    return _recorder
+
+def instrument(handle, recorder=None):
+    """
+    Wrap a handle in a timing proxy if instrumentation is enabled.
+
+    Parameters
+    ----------
+    handle : pywin32 COMObject
+        The handle to wrap.
+    recorder : Recorder or None
+        Record into this recorder, regardless of whether instrumentation is
+        enabled.
+
+    Returns
+    -------
+    InstrumentedHandle or pywin32 COMObject
+        The wrapped handle, or handle itself if instrumentation is disabled
+        or it is already wrapped.
+
+    """
+    if recorder is None:
+        recorder = _recorder
+    if recorder is None or handle is None or isinstance(handle, InstrumentedHandle):
+        return handle
+    return InstrumentedHandle(handle, recorder)
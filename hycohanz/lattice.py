@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Linear, rectangular and circular arrays of parts built by duplication.
+
+Creating the elements of an array one by one costs one command per element.
+DuplicateAlongLine and DuplicateAroundAxis copy a whole selection several
+times in one command, so an array is built by duplicating ever larger
+blocks of elements:  a row of nx elements is one command, and the rows are
+then duplicated as a block, which is one more command.  If the number of
+clones per command is limited (max_clones), blocks are grown by repeated
+multiplication instead, e.g. 1 -> 8 -> 64 elements with max_clones=8, plus
+one command copying a partial block when the count is not a product of the
+clone counts.  A 64 x 64 array takes 2 commands, or 4 with max_clones=8.
+
+The functions return the part names in a NumPy object array indexed by
+element position, e.g. grid[i, j] for a rectangular array, so that ports
+and boundaries can be assigned by index.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> patch = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 0.1)
+>>> grid = hfss.rectangular_array(oEditor, patch, 64, 64, 2, 2, unit='mm')
+>>> grid[3, 5]
+'Box1_...'
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import numpy as np
+
+from hycohanz.batch import BatchResult
+from hycohanz.modeler3d import (duplicate_along_line,
+                                duplicate_around_axis)
+from hycohanz.scenegraph import match_clones
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+def plan_duplication(count, max_clones=None):
+    """
+    Plan the duplications that grow one element into count elements.
+
+    Parameters
+    ----------
+    count : int
+        Number of elements, including the original.
+    max_clones : int or None
+        Maximum NumClones per duplication, including the originals.  None
+        means no limit.
+
+    Returns
+    -------
+    list of tuple
+        One (selected, offset, clones) tuple per duplication:  the first
+        `selected` elements are duplicated `clones` - 1 times, with a step
+        of `offset` elements.
+
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    if max_clones is not None and max_clones < 2:
+        raise ValueError('max_clones must be at least 2')
+
+    steps = []
+    size = 1
+    while size < count:
+        clones = count // size
+        if max_clones is not None:
+            clones = min(clones, max_clones)
+        if clones >= 2:
+            steps.append((size, size, clones))
+            size *= clones
+        else:
+            steps.append((count - size, size, 2))
+            size = count
+    return steps
+
+def _new_names(oEditor, result, before):
+    """
+    Return the names of the parts created by a duplication.
+    """
+    if isinstance(result, BatchResult):
+        result.batch.run()
+        result = result.value
+    if result:
+        return list(result)
+
+    # Older HFSS versions return nothing; the new parts are the ones
+    # created last.
+    after = oEditor.GetNumObjects()
+    return [oEditor.GetObjectName(index) for index in range(before, after)]
+
+def _resolved(name):
+    """
+    Return the name of a part, or the placeholder if its batch has not run.
+    """
+    if isinstance(name, BatchResult):
+        return name.batch.resolve(name)
+    return name
+
+def _grow(oEditor, duplicate, element, count, max_clones):
+    """
+    Duplicate element, a list of part names, into count elements.
+
+    duplicate(names, offset, clones) performs one duplication of the named
+    parts with a step of offset elements.
+    """
+    elements = [list(element)]
+    width = len(elements[0])
+    for selected, offset, clones in plan_duplication(count, max_clones):
+        names = [name for element in elements[:selected] for name in element]
+        before = oEditor.GetNumObjects() if hasattr(oEditor, 'GetNumObjects') else 0
+        new = _new_names(oEditor, duplicate(names, offset, clones), before)
+        copies = match_clones([_resolved(name) for name in names], new, clones)
+        if copies is None:
+            raise RuntimeError('cannot match the {m} new parts of the duplication to '
+                               '{c} copies of {n} parts'.format(m=len(new), c=clones - 1,
+                                                                n=len(names)))
+        for clone in copies:
+            for start in range(0, len(clone), width):
+                elements.append(clone[start:start + width])
+    return elements
+
+def _selection(selections):
+    if isinstance(selections, string_types):
+        return [selections], True
+    return list(selections), False
+
+def _length(value, unit):
+    return '{v:.15g}{u}'.format(v=value, u=unit)
+
+def _along_line(oEditor, dx, dy, dz, unit):
+    def duplicate(names, offset, clones):
+        return duplicate_along_line(oEditor, names,
+                                    _length(offset * dx, unit),
+                                    _length(offset * dy, unit),
+                                    _length(offset * dz, unit),
+                                    clones)
+    return duplicate
+
+def linear_array(oEditor, selections, count, dx, dy=0, dz=0, unit='', max_clones=None):
+    """
+    Duplicate parts into a linear array.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    selections : str or list of str
+        The part, or parts, forming the first element.
+    count : int
+        Number of elements, including the first.
+    dx, dy, dz : float
+        Step between elements.
+    unit : str
+        Unit of the step, e.g. "mm".  If empty, the model units are used.
+    max_clones : int or None
+        Maximum NumClones per duplication.
+
+    Returns
+    -------
+    grid : numpy.ndarray of str
+        Part names, shape (count,) for a single part, or (count, nparts).
+
+    """
+    element, single = _selection(selections)
+    elements = _grow(oEditor, _along_line(oEditor, dx, dy, dz, unit), element, count, max_clones)
+    grid = np.array(elements, dtype=object)
+    return grid[:, 0] if single else grid
+
+def rectangular_array(oEditor, selections, nx, ny, dx, dy,
+                      unit='',
+                      max_clones=None,
+                      xvector=(1, 0, 0),
+                      yvector=(0, 1, 0)):
+    """
+    Duplicate parts into a rectangular array.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    selections : str or list of str
+        The part, or parts, forming the element at (0, 0).
+    nx, ny : int
+        Number of elements along the first and second array directions.
+    dx, dy : float
+        Element spacing along the first and second array directions.
+    unit : str
+        Unit of the spacing, e.g. "mm".  If empty, the model units are used.
+    max_clones : int or None
+        Maximum NumClones per duplication.
+    xvector, yvector : tuple of float
+        Unit vectors of the array directions.
+
+    Returns
+    -------
+    grid : numpy.ndarray of str
+        Part names, shape (nx, ny) for a single part, or (nx, ny, nparts).
+
+    """
+    element, single = _selection(selections)
+    row = _grow(oEditor,
+                _along_line(oEditor, dx * xvector[0], dx * xvector[1], dx * xvector[2], unit),
+                element, nx, max_clones)
+    rows = _grow(oEditor,
+                 _along_line(oEditor, dy * yvector[0], dy * yvector[1], dy * yvector[2], unit),
+                 [name for element in row for name in element], ny, max_clones)
+    # rows[j] holds the names of row j, element-major.
+    grid = np.array(rows, dtype=object).reshape(ny, nx, len(element)).transpose(1, 0, 2)
+    return grid[:, :, 0] if single else grid
+
+def circular_array(oEditor, selections, count, angle, axis='Z', max_clones=None):
+    """
+    Duplicate parts around a coordinate axis.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    selections : str or list of str
+        The part, or parts, forming the first element.
+    count : int
+        Number of elements, including the first.
+    angle : float
+        Angle between elements in degrees.
+    axis : str
+        Rotation axis, 'X', 'Y' or 'Z'.
+    max_clones : int or None
+        Maximum NumClones per duplication.
+
+    Returns
+    -------
+    grid : numpy.ndarray of str
+        Part names, shape (count,) for a single part, or (count, nparts).
+
+    """
+    element, single = _selection(selections)
+
+    def duplicate(names, offset, clones):
+        return duplicate_around_axis(oEditor, names, '{a:.15g}'.format(a=offset * angle),
+                                     clones, which_axis=axis)
+
+    elements = _grow(oEditor, duplicate, element, count, max_clones)
+    grid = np.array(elements, dtype=object)
+    return grid[:, 0] if single else grid
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred material assignment.
+
+Builders that call assign_material() right after creating each part send
+one AssignMaterial command per part:  3000 parts of 5 materials make 3000
+commands.  While material assignment is deferred for an editor,
+assign_material() only queues the parts, and flush_materials(), or leaving
+a DeferredMaterials block, issues one AssignMaterial command per distinct
+(material, SolveInside) pair.  If a part is queued more than once, the last
+request wins.
+
+With creation=True, the default, create_box(), create_box_new(),
+create_sphere(), create_boxes() and create_spheres() also queue the
+material given as MaterialValue and create the part with vacuum, so that
+every solid is created with the same attributes.  Sheets and lines keep
+their material at creation.
+
+The queue follows the parts through the modeler functions:  deleted parts
+and the parts consumed by unite(), subtract(), intersect() and connect()
+are dropped from it, and rename_part() renames them.  copy(), the
+duplicate functions, split() and separate_body() flush it first, since the
+parts they create take over the material of their originals.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> with hfss.DeferredMaterials(oEditor):
+...     for i, material in enumerate(materials):
+...         box = hfss.create_box(oEditor, 2*i, 0, 0, 1, 1, 1)
+...         hfss.assign_material(oEditor, [box], material)
+>>> hfss.get_material_queue_info()
+MaterialQueueInfo(requests=3000, commands=5, pending=0)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from hycohanz.backend import handle_key
+
+MaterialQueueInfo = namedtuple('MaterialQueueInfo', ['requests', 'commands', 'pending'])
+
+# Material and SolveInside that solids are created with while creation
+# materials are deferred, as sent in the attributes of a creator.
+PLACEHOLDER_MATERIAL = ('"vacuum"', True)
+
+class MaterialQueue(object):
+    """
+    Material assignments queued per editor.
+
+    Attributes
+    ----------
+    requests : int
+        Number of parts queued.
+    commands : int
+        Number of AssignMaterial commands issued by flushes.
+
+    """
+    def __init__(self):
+        self.requests = 0
+        self.commands = 0
+        # editor key -> [oEditor, nesting depth, defer creation materials,
+        #                OrderedDict part -> (MaterialName, SolveInside)]
+        self._editors = {}
+        # Keys of the editors being flushed, whose assignments go through.
+        self._flushing = set()
+        self._lock = threading.RLock()
+
+    def _state(self, oEditor):
+        if not self._editors:
+            return None
+        key = handle_key(oEditor)
+        return None if key in self._flushing else self._editors.get(key)
+
+    def begin(self, oEditor, creation=True):
+        """
+        Start deferring the material assignments of an editor.  Calls
+        nest; the queue is flushed when the outermost end() is reached.
+        """
+        with self._lock:
+            state = self._editors.get(handle_key(oEditor))
+            if state is None:
+                self._editors[handle_key(oEditor)] = [oEditor, 1, creation, OrderedDict()]
+            else:
+                state[1] += 1
+
+    def end(self, oEditor, all_levels=False):
+        """
+        Undo one begin(), or all of them, flushing the queue if it was the
+        outermost.
+        """
+        key = handle_key(oEditor)
+        with self._lock:
+            state = self._editors.get(key)
+            if state is None:
+                return
+            state[1] = 0 if all_levels else state[1] - 1
+            if state[1] > 0:
+                return
+        try:
+            self.flush(oEditor)
+        finally:
+            with self._lock:
+                self._editors.pop(key, None)
+
+    def deferring(self, oEditor):
+        """
+        Whether the material assignments of an editor are deferred.
+        """
+        return handle_key(oEditor) in self._editors
+
+    def defer(self, oEditor, partlist, MaterialName, SolveInside):
+        """
+        Queue an assignment if assignments are deferred for the editor.
+
+        Returns
+        -------
+        bool
+            Whether the assignment was queued.
+
+        """
+        with self._lock:
+            state = self._state(oEditor)
+            if state is None:
+                return False
+            pending = state[3]
+            for part in partlist:
+                # Re-inserted, so that the part is assigned with its last request.
+                pending.pop(part, None)
+                pending[part] = (MaterialName, SolveInside)
+            self.requests += len(partlist)
+        return True
+
+    def attributes(self, oEditor, attributes):
+        """
+        Return the attributes to create a solid with:  with the placeholder
+        material if creation materials are deferred for the editor.
+        """
+        state = self._state(oEditor)
+        if (state is None or not state[2] or
+                (attributes.MaterialValue, attributes.SolveInside) == PLACEHOLDER_MATERIAL):
+            return attributes
+        material, solve_inside = PLACEHOLDER_MATERIAL
+        return attributes.replace(MaterialValue=material, SolveInside=solve_inside)
+
+    def created(self, oEditor, name, attributes):
+        """
+        Queue the material of a solid created with attributes(oEditor,
+        attributes).
+        """
+        state = self._state(oEditor)
+        if (state is None or not state[2] or
+                (attributes.MaterialValue, attributes.SolveInside) == PLACEHOLDER_MATERIAL):
+            return
+        self.defer(oEditor, [name], str(attributes.MaterialValue).strip('"'),
+                   attributes.SolveInside)
+
+    def discard(self, oEditor, partlist):
+        """
+        Drop parts that no longer exist from the queue.
+        """
+        with self._lock:
+            state = self._state(oEditor)
+            if state is not None:
+                for part in partlist:
+                    state[3].pop(part, None)
+
+    def rename(self, oEditor, oldname, newname):
+        """
+        Follow a renamed part.
+        """
+        with self._lock:
+            state = self._state(oEditor)
+            if state is not None and oldname in state[3]:
+                state[3][newname] = state[3].pop(oldname)
+
+    def flush(self, oEditor=None):
+        """
+        Issue the queued assignments of an editor, or of all editors, with
+        one AssignMaterial command per (material, SolveInside) pair.
+        """
+        # Imported here to avoid a circular import.
+        from hycohanz.modeler3d import assign_material
+
+        with self._lock:
+            if oEditor is None:
+                states = list(self._editors.values())
+            else:
+                states = [self._editors.get(handle_key(oEditor))]
+        for state in states:
+            key = None if state is None else handle_key(state[0])
+            with self._lock:
+                if state is None or not state[3] or key in self._flushing:
+                    continue
+                groups = OrderedDict()
+                for part, group in state[3].items():
+                    groups.setdefault(group, []).append(part)
+                state[3].clear()
+                self._flushing.add(key)
+            # The commands are issued outside the lock, so that the queues
+            # of other editors can be used meanwhile.
+            try:
+                for (MaterialName, SolveInside), partlist in groups.items():
+                    assign_material(state[0], partlist, MaterialName, SolveInside)
+                    with self._lock:
+                        self.commands += 1
+            finally:
+                with self._lock:
+                    self._flushing.discard(key)
+
+    def info(self):
+        """
+        Return the request and command counts and the number of queued
+        parts.
+
+        Returns
+        -------
+        MaterialQueueInfo
+            Named tuple (requests, commands, pending).
+
+        """
+        with self._lock:
+            pending = sum(len(state[3]) for state in self._editors.values())
+        return MaterialQueueInfo(self.requests, self.commands, pending)
+
+    def reset_info(self):
+        """
+        Reset the request and command counts.
+        """
+        self.requests = 0
+        self.commands = 0
+
+material_queue = MaterialQueue()
+
+class DeferredMaterials(object):
+    """
+    Context manager deferring the material assignments of an editor until
+    the block is left.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor whose assignments are deferred.
+    creation : bool
+        Whether to defer the materials given to create_box(),
+        create_box_new(), create_sphere(), create_boxes() and
+        create_spheres() as well.
+
+    """
+    def __init__(self, oEditor, creation=True):
+        self.oEditor = oEditor
+        self.creation = creation
+
+    def __enter__(self):
+        material_queue.begin(self.oEditor, self.creation)
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        material_queue.end(self.oEditor)
+
+    def flush(self):
+        """
+        Issue the assignments queued so far.
+        """
+        material_queue.flush(self.oEditor)
+
+def enable_deferred_materials(oEditor, enabled=True, creation=True):
+    """
+    Turn deferred material assignment on or off for an editor.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    enabled : bool
+        Whether to defer.  Turning deferral off flushes the queue.
+    creation : bool
+        Whether to defer the materials given to create_box(),
+        create_box_new(), create_sphere(), create_boxes() and
+        create_spheres() as well.
+
+    Returns
+    -------
+    bool
+        Whether assignments were deferred before.
+
+    """
+    previous = material_queue.deferring(oEditor)
+    if enabled and not previous:
+        material_queue.begin(oEditor, creation)
+    elif not enabled and previous:
+        material_queue.end(oEditor, all_levels=True)
+    return previous
+
+def flush_materials(oEditor=None):
+    """
+    Issue the queued material assignments.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject or None
+        The editor whose queue to flush, or None for all editors.
+
+    Returns
+    -------
+    None
+
+    """
+    material_queue.flush(oEditor)
+
+def get_material_queue_info():
+    """
+    Return the number of queued assignments, the number of AssignMaterial
+    commands issued for them, and the number still pending.
+
+    Returns
+    -------
+    MaterialQueueInfo
+        Named tuple (requests, commands, pending).
+
+    """
+    return material_queue.info()
+
+def reset_material_queue_info():
+    """
+    Reset the request and command counts of the material queue.
+
+    Returns
+    -------
+    None
+
+    """
+    material_queue.reset_info()
@@ -9,11 +9,19 @@ At last count there were 31 functions implemented out of 93.
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import gc
 import warnings
 
-from hycohanz.expression import Expression as Ex
+from hycohanz.expression import Expression as Ex, as_expr
+from hycohanz.attributes import Attributes, MATERIAL_NAME
 
-from hycohanz.box import Box
+from hycohanz.querycache import query_cache
+from hycohanz.scenegraph import scene_graph
+from hycohanz.spatialindex import spatial_index
+from hycohanz.importcache import import_cache
+from hycohanz.chunking import selection_chunker
+from hycohanz.materialqueue import material_queue
+from hycohanz.units import format_values
 
 warnings.simplefilter('default')
 
@@ -55,14 +63,20 @@ def assign_material(oEditor, partlist, MaterialName="vacuum", SolveInside=True):
     -------
     None
     """
-    selectionsarray = ["NAME:Selections", 
-                       "Selections:=", ','.join(partlist)]
+    if material_queue.defer(oEditor, partlist, MaterialName, SolveInside):
+        return
     
     attributesarray = ["NAME:Attributes", 
                        "MaterialName:=", MaterialName, 
                        "SolveInside:=", SolveInside]
     
-    oEditor.AssignMaterial(selectionsarray, attributesarray)
+    def issue(chunk):
+        selectionsarray = ["NAME:Selections", 
+                           "Selections:=", ','.join(chunk)]
+        oEditor.AssignMaterial(selectionsarray, attributesarray)
+        scene_graph.record(oEditor, 'AssignMaterial', (selectionsarray, attributesarray))
+    
+    selection_chunker.run('AssignMaterial', partlist, issue)
 
 def create_rectangle(   oEditor, 
                         xs, 
@@ -79,7 +93,8 @@ def create_rectangle(   oEditor,
                         UDMId='',
                         MaterialValue='"vacuum"',
                         SolveInside=True,
-                        IsCovered=True):
+                        IsCovered=True,
+                        attributes=None):
     """
     Draw a rectangle.
     
@@ -116,6 +131,10 @@ def create_rectangle(   oEditor,
         inside.
     IsCovered : bool
         Whether the rectangle is has a surface or has only edges.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces 
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId, 
+        MaterialValue and SolveInside.
         
     Returns
     -------
@@ -125,24 +144,22 @@ def create_rectangle(   oEditor,
     """
     RectangleParameters = [ "NAME:RectangleParameters",
                             "IsCovered:=", IsCovered,
-                            "XStart:=", Ex(xs).expr,
-                            "YStart:=", Ex(ys).expr,
-                            "ZStart:=", Ex(zs).expr,
-                            "Width:=", Ex(width).expr,
-                            "Height:=", Ex(height).expr,
+                            "XStart:=", as_expr(xs),
+                            "YStart:=", as_expr(ys),
+                            "ZStart:=", as_expr(zs),
+                            "Width:=", as_expr(width),
+                            "Height:=", as_expr(height),
                             "WhichAxis:=", WhichAxis]
 
-    Attributes = [  "NAME:Attributes",
-                    "Name:=", Name,
-                    "Flags:=", Flags,
-                    "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
-                    "Transparency:=", Transparency,
-                    "PartCoordinateSystem:=", PartCoordinateSystem,
-                    "UDMId:=", UDMId,
-                    "MaterialValue:=", MaterialValue,
-                    "SolveInside:=", SolveInside]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+    attributesarray = attributes.array(Name)
                     
-    return oEditor.CreateRectangle(RectangleParameters, Attributes)
+    name = oEditor.CreateRectangle(RectangleParameters, attributesarray)
+    scene_graph.record(oEditor, 'CreateRectangle', (RectangleParameters, attributesarray), name)
+
+    return name
 
 
 def create_EQbasedcurve(   oEditor, 
@@ -160,7 +177,9 @@ def create_EQbasedcurve(   oEditor,
                         PartCoordinateSystem='Global',
                         UDMId='',
                         MaterialValue='"vacuum"',
-                        SolveInside=True):
+                        SolveInside=True,
+                        attributes=None,
+                        validate=False):
     """
     Draw an equation based curve.
     
@@ -194,13 +213,35 @@ def create_EQbasedcurve(   oEditor,
     SolveInside : bool
         Whether to mesh the interior of the object and solve for the fields 
         inside.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces 
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId, 
+        MaterialValue and SolveInside.
+    validate : bool
+        Whether to evaluate the equations locally first, see 
+        EquationCurve.validate().  Equations using design variables or 
+        functions unknown to EquationCurve are not checked.
         
     Returns
     -------
     str
         The actual name of the created object.
         
+    Raises
+    ------
+    ValueError
+        With validate, if the range of _t is empty or the curve is not 
+        finite somewhere in it.
+        
     """
+    if validate:
+        # Imported here so that hycohanz can be imported without NumPy.
+        from hycohanz.eqcurve import EquationCurve
+        try:
+            EquationCurve(xt, yt, zt, tstart, tend).validate()
+        except NameError:
+            pass
+
     EquationCurveParameters = [ "NAME:EquationBasedCurveParameters",
                             "XtFunction:=", xt,
                             "YtFunction:=", yt,
@@ -210,17 +251,15 @@ def create_EQbasedcurve(   oEditor,
                             "NumOfPointsOnCurve:=", numpoints,
                             "Version:=", Version]
 
-    Attributes = [  "NAME:Attributes",
-                    "Name:=", Name,
-                    "Flags:=", Flags,
-                    "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
-                    "Transparency:=", Transparency,
-                    "PartCoordinateSystem:=", PartCoordinateSystem,
-                    "UDMId:=", UDMId,
-                    "MaterialValue:=", MaterialValue,
-                    "SolveInside:=", SolveInside]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+    attributesarray = attributes.array(Name)
                     
-    return oEditor.CreateEquationCurve(EquationCurveParameters, Attributes)
+    name = oEditor.CreateEquationCurve(EquationCurveParameters, attributesarray)
+    scene_graph.record(oEditor, 'CreateEquationCurve', (EquationCurveParameters, attributesarray), name)
+
+    return name
 
 def create_circle(oEditor, xc, yc, zc, radius, 
                   WhichAxis='Z', 
@@ -231,7 +270,8 @@ def create_circle(oEditor, xc, yc, zc, radius,
                   Transparency=0,
                   PartCoordinateSystem='Global',
                   MaterialName='"vacuum"',
-                  Solveinside=True):
+                  Solveinside=True,
+                  attributes=None):
     """
     Create a circle primitive.
     
@@ -267,6 +307,10 @@ def create_circle(oEditor, xc, yc, zc, radius,
     SolveInside : bool
         Whether to mesh the interior of the object and solve for the fields 
         inside.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces 
+        Flags, Color, Transparency, PartCoordinateSystem, MaterialName and 
+        Solveinside.
         
     Returns
     -------
@@ -274,23 +318,22 @@ def create_circle(oEditor, xc, yc, zc, radius,
         The actual name of the created object.
     """
     circleparams = ["NAME:CircleParameters", 
-                    "XCenter:=", Ex(xc).expr, 
-                    "YCenter:=", Ex(yc).expr, 
-                    "ZCenter:=", Ex(zc).expr, 
-                    "Radius:=", Ex(radius).expr, 
+                    "XCenter:=", as_expr(xc), 
+                    "YCenter:=", as_expr(yc), 
+                    "ZCenter:=", as_expr(zc), 
+                    "Radius:=", as_expr(radius), 
                     "WhichAxis:=", str(WhichAxis), 
                     "NumSegments:=", str(NumSegments)]
 
-    attributesarray = ["NAME:Attributes", 
-                       "Name:=", Name, 
-                       "Flags:=", Flags, 
-                       "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]), 
-                       "Transparency:=", str(Transparency), 
-                       "PartCoordinateSystem:=", PartCoordinateSystem, 
-                       "MaterialName:=", MaterialName, 
-                       "Solveinside:=", Solveinside]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                MaterialValue=MaterialName, SolveInside=Solveinside)
+    attributesarray = attributes.array(Name, MATERIAL_NAME)
 
-    return oEditor.CreateCircle(circleparams, attributesarray)
+    name = oEditor.CreateCircle(circleparams, attributesarray)
+    scene_graph.record(oEditor, 'CreateCircle', (circleparams, attributesarray), name)
+
+    return name
 
 
 def create_ellipse(oEditor, xc, yc, zc, Majradius,Ratio,
@@ -302,7 +345,8 @@ def create_ellipse(oEditor, xc, yc, zc, Majradius,Ratio,
                   Transparency=0,
                   PartCoordinateSystem='Global',
                   MaterialName='"vacuum"',
-                  Solveinside=True):
+                  Solveinside=True,
+                  attributes=None):
     """
     Create a circle primitive.
 
@@ -340,6 +384,10 @@ def create_ellipse(oEditor, xc, yc, zc, Majradius,Ratio,
     SolveInside : bool
         Whether to mesh the interior of the object and solve for the fields
         inside.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces
+        Flags, Color, Transparency, PartCoordinateSystem, MaterialName and
+        Solveinside.
 
     Returns
     -------
@@ -347,24 +395,23 @@ def create_ellipse(oEditor, xc, yc, zc, Majradius,Ratio,
         The actual name of the created object.
     """
     circleparams = ["NAME:CircleParameters",
-                    "XCenter:=", Ex(xc).expr,
-                    "YCenter:=", Ex(yc).expr,
-                    "ZCenter:=", Ex(zc).expr,
-                    "MajRadius:=", Ex(Majradius).expr,
-                    "Ratio:=", Ex(Ratio).expr,
+                    "XCenter:=", as_expr(xc),
+                    "YCenter:=", as_expr(yc),
+                    "ZCenter:=", as_expr(zc),
+                    "MajRadius:=", as_expr(Majradius),
+                    "Ratio:=", as_expr(Ratio),
                     "WhichAxis:=", str(WhichAxis),
                     "NumSegments:=", str(NumSegments)]
 
-    attributesarray = ["NAME:Attributes",
-                       "Name:=", Name,
-                       "Flags:=", Flags,
-                       "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
-                       "Transparency:=", str(Transparency),
-                       "PartCoordinateSystem:=", PartCoordinateSystem,
-                       "MaterialName:=", MaterialName,
-                       "Solveinside:=", Solveinside]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                MaterialValue=MaterialName, SolveInside=Solveinside)
+    attributesarray = attributes.array(Name, MATERIAL_NAME)
+
+    name = oEditor.CreateEllipse(circleparams, attributesarray)
+    scene_graph.record(oEditor, 'CreateEllipse', (circleparams, attributesarray), name)
 
-    return oEditor.CreateEllipse(circleparams, attributesarray)
+    return name
 
 def create_sphere(oEditor, x, y, z, radius,
                   Name="Sphere1",
@@ -374,7 +421,8 @@ def create_sphere(oEditor, x, y, z, radius,
                   PartCoordinateSystem="Global",
                   UDMId="",
                   MaterialValue='"vacuum"',
-                  SolveInside=True):
+                  SolveInside=True,
+                  attributes=None):
     """
     Create a sphere primitive.
     
@@ -408,6 +456,10 @@ def create_sphere(oEditor, x, y, z, radius,
     SolveInside : bool
         Whether to mesh the interior of the object and solve for the fields 
         inside.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces 
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId, 
+        MaterialValue and SolveInside.
         
     Returns
     -------
@@ -416,22 +468,19 @@ def create_sphere(oEditor, x, y, z, radius,
         
     """
     sphereparametersarray = ["NAME:SphereParameters", 
-                             "XCenter:=", Ex(x).expr, 
-                             "YCenter:=", Ex(y).expr, 
-                             "ZCenter:=", Ex(z).expr, 
-                             "Radius:=", Ex(radius).expr]
+                             "XCenter:=", as_expr(x), 
+                             "YCenter:=", as_expr(y), 
+                             "ZCenter:=", as_expr(z), 
+                             "Radius:=", as_expr(radius)]
     
-    attributesarray = ["NAME:Attributes", 
-                       "Name:=",  Name, 
-                       "Flags:=", Flags, 
-                       "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]), 
-                       "Transparency:=", Transparency, 
-                       "PartCoordinateSystem:=", PartCoordinateSystem, 
-                       "UDMId:=", UDMId, 
-                       "MaterialValue:=", MaterialValue, 
-                       "SolveInside:=", SolveInside]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+    attributesarray = material_queue.attributes(oEditor, attributes).array(Name)
     
     part = oEditor.CreateSphere(sphereparametersarray, attributesarray)
+    scene_graph.record(oEditor, 'CreateSphere', (sphereparametersarray, attributesarray), part)
+    material_queue.created(oEditor, part, attributes)
     
     return part
 
@@ -451,6 +500,7 @@ def create_box( oEditor,
                 MaterialValue='"vacuum"',
                 SolveInside=True,
                 IsCovered=True,
+                attributes=None,
                 ):
     """
     Draw a 3D box.
@@ -488,6 +538,10 @@ def create_box( oEditor,
         inside.
     IsCovered : bool
         Whether the rectangle is has a surface or has only edges.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId,
+        MaterialValue and SolveInside.
 
     Returns
     -------
@@ -496,24 +550,23 @@ def create_box( oEditor,
 
     """
     BoxParameters = [ "NAME:BoxParameters",
-                    "XPosition:=", Ex(xpos).expr,
-                    "YPosition:=", Ex(ypos).expr,
-                    "ZPosition:=", Ex(zpos).expr,
-                    "XSize:=", Ex(xsize).expr,
-                    "YSize:=", Ex(ysize).expr,
-                    "ZSize:=", Ex(zsize).expr]
-
-    Attributes = [  "NAME:Attributes",
-                    "Name:=", Name,
-                    "Flags:=", Flags,
-                    "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
-                    "Transparency:=", Transparency,
-                    "PartCoordinateSystem:=", PartCoordinateSystem,
-                    "UDMId:=", UDMId,
-                    "MaterialValue:=", MaterialValue,
-                    "SolveInside:=", SolveInside]
-
-    return oEditor.CreateBox(BoxParameters, Attributes)
+                    "XPosition:=", as_expr(xpos),
+                    "YPosition:=", as_expr(ypos),
+                    "ZPosition:=", as_expr(zpos),
+                    "XSize:=", as_expr(xsize),
+                    "YSize:=", as_expr(ysize),
+                    "ZSize:=", as_expr(zsize)]
+
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+    attributesarray = material_queue.attributes(oEditor, attributes).array(Name)
+
+    name = oEditor.CreateBox(BoxParameters, attributesarray)
+    scene_graph.record(oEditor, 'CreateBox', (BoxParameters, attributesarray), name)
+    material_queue.created(oEditor, name, attributes)
+
+    return name
 
 def create_box_new( oEditor,
                     xpos,
@@ -538,6 +591,7 @@ def create_box_new( oEditor,
                     MaterialValue='"vacuum"',
                     SolveInside=True,
                     IsCovered=True,
+                    attributes=None,
                     ):
     """
     Author: Winerly
@@ -586,6 +640,10 @@ def create_box_new( oEditor,
         inside.
     IsCovered : bool
         Whether the rectangle is has a surface or has only edges.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId,
+        MaterialValue and SolveInside.
 
     Returns
     -------
@@ -593,24 +651,26 @@ def create_box_new( oEditor,
 
     """
     BoxParameters = [ "NAME:BoxParameters",
-                    "XPosition:=", Ex(xpos).expr,
-                    "YPosition:=", Ex(ypos).expr,
-                    "ZPosition:=", Ex(zpos).expr,
-                    "XSize:=", Ex(xsize).expr,
-                    "YSize:=", Ex(ysize).expr,
-                    "ZSize:=", Ex(zsize).expr]
-
-    Attributes = [  "NAME:Attributes",
-                    "Name:=", Name,
-                    "Flags:=", Flags,
-                    "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
-                    "Transparency:=", Transparency,
-                    "PartCoordinateSystem:=", PartCoordinateSystem,
-                    "UDMId:=", UDMId,
-                    "MaterialValue:=", MaterialValue,
-                    "SolveInside:=", SolveInside]
-
-    return Box(oEditor.CreateBox(BoxParameters, Attributes), unit, [xpos_f,ypos_f,zpos_f], [xsize_f,ysize_f,zsize_f])
+                    "XPosition:=", as_expr(xpos),
+                    "YPosition:=", as_expr(ypos),
+                    "ZPosition:=", as_expr(zpos),
+                    "XSize:=", as_expr(xsize),
+                    "YSize:=", as_expr(ysize),
+                    "ZSize:=", as_expr(zsize)]
+
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+    attributesarray = material_queue.attributes(oEditor, attributes).array(Name)
+
+    # Imported here because hycohanz.box pulls in NumPy.
+    from hycohanz.box import Box
+
+    name = oEditor.CreateBox(BoxParameters, attributesarray)
+    scene_graph.record(oEditor, 'CreateBox', (BoxParameters, attributesarray), name)
+    material_queue.created(oEditor, name, attributes)
+
+    return Box(name, unit, [xpos_f,ypos_f,zpos_f], [xsize_f,ysize_f,zsize_f])
 
 def create_polyline(oEditor, x, y, z, Name="Polyline1", 
                                 Flags="", 
@@ -630,7 +690,10 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
                                 XSectionOrient="Auto",
                                 XSectionType="None",
                                 SegmentType="Line",
-                                NoOfPoints=2):
+                                NoOfPoints=2,
+                                attributes=None,
+                                unit="meter",
+                                max_points=None):
     """ 
     Draw a polyline.
     
@@ -666,6 +729,17 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
     IsPolylineClosed : bool
         Whether the polyline should be considered closed.
     TODO:  finish documentation of this function.
+    attributes : Attributes or None
+        Style of the object, shared between calls.  If given, it replaces 
+        Flags, Color, Transparency, PartCoordinateSystem, UDMId, 
+        MaterialValue and SolveInside.
+    unit : str
+        Unit of the numeric coordinates.
+    max_points : int or None
+        If x, y, and z are numeric arrays with more than max_points vertices, 
+        the polyline is drawn as several open polylines of at most max_points 
+        vertices, which are then united (and covered, if the polyline is 
+        closed and covered).
         
     Returns
     -------
@@ -673,7 +747,12 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
         Actual name of the polyline
         
     
-    x, y, and z are lists with numeric or string elements.
+    x, y, and z are lists with numeric or string elements.  If all three 
+    are numeric NumPy arrays, the vertices are formatted in one vectorized 
+    pass.  Either way, the first vertex is appended only if the polyline 
+    is closed and does not already end there.  (Lists used to get the 
+    first vertex appended also for open polylines, which thus returned to 
+    their start; append it to x, y, and z to keep that shape.)
     
     Example Usage
     -------------
@@ -684,11 +763,23 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
     >>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
     >>> tri = hfss.create_polyline(oEditor, [0, 1, 0], [0, 0, 1], [0, 0, 0])
     """
-    # Augment the polyline points vector by appending the first element to 
-    # the last.  This gives polyline points and N - 1 segments
-    xv = list(x) + [list(x)[0]]
-    yv = list(y) + [list(y)[0]]
-    zv = list(z) + [list(z)[0]]
+    if attributes is None:
+        attributes = Attributes(Flags, Color, Transparency, PartCoordinateSystem, 
+                                UDMId, MaterialValue, SolveInside)
+
+    if _is_numeric_array(x) and _is_numeric_array(y) and _is_numeric_array(z):
+        points = _polyline_points(x, y, z, unit, IsPolylineClosed)
+        if max_points is None or len(points) <= max_points:
+            return _create_polyline_points(oEditor, points, Name, attributes, 
+                                           IsPolylineCovered, IsPolylineClosed, 
+                                           SegmentType, NoOfPoints)
+        return _create_polyline_chunks(oEditor, points, max_points, Name, attributes, 
+                                       IsPolylineCovered, IsPolylineClosed, 
+                                       SegmentType, NoOfPoints)
+
+    xv = list(x)
+    yv = list(y)
+    zv = list(z)
     
 #    print('xv:  ' + str(xv))
     
@@ -702,7 +793,7 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
         if isinstance(xv[n], str):
             xpt = xv[n]
         elif isinstance(xv[n], (float, int)):
-            xpt = str(xv[n]) + "meter"
+            xpt = str(xv[n]) + unit
         elif isinstance(xv[n], Ex):
             xpt = xv[n].expr
         else:
@@ -711,7 +802,7 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
         if isinstance(yv[n], str):
             ypt = yv[n]
         elif isinstance(yv[n], (float, int)):
-            ypt = str(yv[n]) + "meter"
+            ypt = str(yv[n]) + unit
         elif isinstance(yv[n], Ex):
             ypt = yv[n].expr
         else:
@@ -720,7 +811,7 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
         if isinstance(zv[n], str):
             zpt = zv[n]
         elif isinstance(zv[n], (float, int)):
-            zpt = str(zv[n]) + "meter"
+            zpt = str(zv[n]) + unit
         elif isinstance(zv[n], Ex):
             zpt = zv[n].expr
         else:
@@ -734,6 +825,12 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
                         "Y:=", ypt, 
                         "Z:=", zpt]])
     
+    # Close the polyline by appending the first vertex to the last.  This 
+    # gives polyline points and N - 1 segments
+    if IsPolylineClosed and Npts > 1 and polylinepoints[1] != polylinepoints[-1]:
+        polylinepoints.append(polylinepoints[1])
+        Npts += 1
+    
 #    plpoint[0] = ["NAME:PLPoint", "X:=", "-1mm", "Y:=", "0mm", "Z:=", "0mm"]
 #    plpoint[1] = ["NAME:PLPoint", "X:=", "0mm", "Y:=", "1mm", "Z:=", "0mm"]
 #    plpoint[2] = ["NAME:PLPoint", "X:=", "1mm", "Y:=", "0mm", "Z:=", "0mm"]
@@ -784,18 +881,108 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
                       polylinesegments]#, 
 #                      polylinexsection]
 
-    polylineattribs = ["NAME:Attributes", 
-                       "Name:=", Name, 
-                       "Flags:=", Flags, 
-                       "Color:=", Color,
-                       "Transparency:=", Transparency, 
-                       "PartCoordinateSystem:=", PartCoordinateSystem, 
-                       "UDMId:=", UDMId, 
-                       "MaterialValue:=", MaterialValue, 
-                       "SolveInside:=",  SolveInside]
+    polylineattribs = attributes.array(Name)
     
     polyname = oEditor.CreatePolyline(polylineparams, polylineattribs)
+    scene_graph.record(oEditor, 'CreatePolyline', (polylineparams, polylineattribs), polyname)
+
+    return polyname
+
+def _is_numeric_array(value):
+    dtype = getattr(value, 'dtype', None)
+    return dtype is not None and dtype.kind in 'biuf'
+
+def _polyline_points(x, y, z, unit, IsPolylineClosed):
+    """
+    Format the vertices of a polyline given as numeric arrays.
 
+    Returns an (N, 3) object array of coordinate strings, ending with the 
+    first vertex if the polyline is closed.
+    """
+    import numpy as np
+
+    coords = np.column_stack(np.broadcast_arrays(np.ravel(x), np.ravel(y), np.ravel(z)))
+    if IsPolylineClosed and len(coords) > 1 and (coords[0] != coords[-1]).any():
+        coords = np.vstack([coords, coords[:1]])
+
+    return format_values(coords, unit)
+
+def _tolist(table):
+    """
+    Return table.tolist() with the cyclic garbage collector paused.
+
+    The nested lists only hold strings and numbers, so they cannot form 
+    cycles, but creating 100000s of them triggers many useless collections.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return table.tolist()
+    finally:
+        if enabled:
+            gc.enable()
+
+def _create_polyline_points(oEditor, points, Name, attributes, 
+                            IsPolylineCovered, IsPolylineClosed, 
+                            SegmentType, NoOfPoints):
+    """
+    Draw a polyline through points, an array from _polyline_points().
+    """
+    import numpy as np
+
+    # The "NAME:PLPoint" and "NAME:PLSegment" arrays are filled in column 
+    # by column as object arrays, and only turned into the nested lists 
+    # the COM interface needs by tolist().  Every point is wrapped in an 
+    # extra list, as in create_polyline().
+    npoints = len(points)
+    table = np.empty((npoints, 1, 7), dtype=object)
+    table[:, 0, :2] = ["NAME:PLPoint", "X:="]
+    table[:, 0, 3] = "Y:="
+    table[:, 0, 5] = "Z:="
+    table[:, 0, 2::2] = points
+    polylinepoints = ["NAME:PolylinePoints"] + _tolist(table)
+    
+    table = np.empty((max(npoints - 1, 0), 7), dtype=object)
+    table[:] = ["NAME:PLSegment", 
+                "SegmentType:=", SegmentType, 
+                "StartIndex:=", None, 
+                "NoOfPoints:=", NoOfPoints]
+    table[:, 4] = range(len(table))
+    polylinesegments = ["NAME:PolylineSegments"] + _tolist(table)
+    
+    polylineparams = ["NAME:PolylineParameters", 
+                      "IsPolylineCovered:=", IsPolylineCovered, 
+                      "IsPolylineClosed:=", IsPolylineClosed, 
+                      polylinepoints, 
+                      polylinesegments]
+    
+    polylineattribs = attributes.array(Name)
+    
+    polyname = oEditor.CreatePolyline(polylineparams, polylineattribs)
+    scene_graph.record(oEditor, 'CreatePolyline', (polylineparams, polylineattribs), polyname)
+    
+    return polyname
+
+def _create_polyline_chunks(oEditor, points, max_points, Name, attributes, 
+                            IsPolylineCovered, IsPolylineClosed, 
+                            SegmentType, NoOfPoints):
+    """
+    Draw a long polyline as open pieces of at most max_points vertices.
+    
+    Consecutive pieces share a vertex, so that uniting them gives one 
+    connected polyline.
+    """
+    if max_points < 2:
+        raise ValueError('max_points must be at least 2')
+    
+    names = [_create_polyline_points(oEditor, points[start:start + max_points], Name, 
+                                     attributes, False, False, SegmentType, NoOfPoints)
+             for start in range(0, len(points) - 1, max_points - 1)]
+    
+    polyname = unite(oEditor, names)
+    if IsPolylineClosed and IsPolylineCovered:
+        cover_lines(oEditor, [polyname])
+    
     return polyname
 
 def get_selections(oEditor):
@@ -835,16 +1022,20 @@ def move(oEditor, partlist, x, y, z, NewPartsModelFlag="Model"):
     -------
     None
     """
-    selectionsarray = ["NAME:Selections", 
-                       "Selections:=", ','.join(partlist), 
-                       "NewPartsModelFlag:=", NewPartsModelFlag]
-                      
     moveparametersarray = ["NAME:TranslateParameters", 
-                           "TranslateVectorX:=", str(Ex(x).expr), 
-                           "TranslateVectorY:=", str(Ex(y).expr), 
-                           "TranslateVectorZ:=", str(Ex(z).expr)]
+                           "TranslateVectorX:=", as_expr(x), 
+                           "TranslateVectorY:=", as_expr(y), 
+                           "TranslateVectorZ:=", as_expr(z)]
+    
+    def issue(chunk):
+        selectionsarray = ["NAME:Selections", 
+                           "Selections:=", ','.join(chunk), 
+                           "NewPartsModelFlag:=", NewPartsModelFlag]
+        oEditor.Move(selectionsarray, moveparametersarray)
+        scene_graph.record(oEditor, 'Move', (selectionsarray, moveparametersarray))
     
-    oEditor.Move(selectionsarray, moveparametersarray)
+    query_cache.invalidate(oEditor, partlist)
+    selection_chunker.run('Move', partlist, issue)
 
 def get_object_name(oEditor, index):
     """
@@ -858,6 +1049,9 @@ def copy(oEditor, partlist):
     """
     Copy specified parts to the clipboard.
     
+    The selection is never split into chunks, since every Copy command 
+    replaces the clipboard.
+    
     Parameters
     ----------
     oEditor : pywin32 COMObject
@@ -873,7 +1067,9 @@ def copy(oEditor, partlist):
                        "Selections:=", ','.join(partlist), 
                        "NewPartsModelFlag:=", "Model"]
                        
+    material_queue.flush(oEditor)
     oEditor.Copy(selectionsarray)
+    scene_graph.record(oEditor, 'Copy', (selectionsarray,))
     
 def get_object_id_by_name(oEditor, objname):
     """
@@ -881,7 +1077,8 @@ def get_object_id_by_name(oEditor, objname):
     
     Note:  This is NOT the inverse of get_object_name()!
     """
-    return oEditor.GetObjectIDByName(objname)
+    return query_cache.lookup(oEditor, objname, ('id',), 
+                              lambda: oEditor.GetObjectIDByName(objname))
 
 def paste(oEditor):
     """
@@ -898,6 +1095,7 @@ def paste(oEditor):
         List of parts that are pasted
     """
     pastelist = oEditor.Paste()
+    scene_graph.record(oEditor, 'Paste', (), pastelist)
     return pastelist
 
 def duplicate_along_line(oEditor,
@@ -928,17 +1126,25 @@ def duplicate_along_line(oEditor,
     '''
     Selections = ",".join(selections)
 
-    return oEditor.DuplicateAlongLine(["NAME:Selections",
-                                       "Selections:=", Selections,
-                                       "NewPartsModelFlag:=", new_parts_model_flag,],
-                                      ["NAME:DuplicateToAlongLineParameters",
-                                       "CreateNewObjects:=", create_new_objects,
-                                       "XComponent:=", x,
-                                       "YComponent:=", y,
-                                       "ZComponent:=", z,
-                                       "NumClones:=", str(Ex(num_clones).expr)],
-                                      ["NAME:Options",
-                                       "DuplicateAssignments:=", False])
+    selectionsarray = ["NAME:Selections",
+                       "Selections:=", Selections,
+                       "NewPartsModelFlag:=", new_parts_model_flag,]
+
+    parametersarray = ["NAME:DuplicateToAlongLineParameters",
+                       "CreateNewObjects:=", create_new_objects,
+                       "XComponent:=", x,
+                       "YComponent:=", y,
+                       "ZComponent:=", z,
+                       "NumClones:=", as_expr(num_clones)]
+
+    optionsarray = ["NAME:Options",
+                    "DuplicateAssignments:=", False]
+
+    material_queue.flush(oEditor)
+    names = oEditor.DuplicateAlongLine(selectionsarray, parametersarray, optionsarray)
+    scene_graph.record(oEditor, 'DuplicateAlongLine', (selectionsarray, parametersarray, optionsarray), names)
+
+    return names
 
 def duplicate_around_axis(oEditor,
                          selections,
@@ -969,16 +1175,24 @@ def duplicate_around_axis(oEditor,
     '''
     Selections = ",".join(selections)
 
-    return oEditor.DuplicateAroundAxis(["NAME:Selections",
-                                       "Selections:=", Selections,
-                                       "NewPartsModelFlag:=", new_parts_model_flag,],
-                                      ["NAME:DuplicateToAroundAxisParameters",
-                                       "CreateNewObjects:=", create_new_objects,
-                                       "WhichAxis:=", which_axis,
-                                       "AngleStr:=", str(angle) + "deg",
-                                       "NumClones:=", str(Ex(num_clones).expr)],
-                                      ["NAME:Options",
-                                       "DuplicateAssignments:=", False])
+    selectionsarray = ["NAME:Selections",
+                       "Selections:=", Selections,
+                       "NewPartsModelFlag:=", new_parts_model_flag,]
+
+    parametersarray = ["NAME:DuplicateToAroundAxisParameters",
+                       "CreateNewObjects:=", create_new_objects,
+                       "WhichAxis:=", which_axis,
+                       "AngleStr:=", str(angle) + "deg",
+                       "NumClones:=", as_expr(num_clones)]
+
+    optionsarray = ["NAME:Options",
+                    "DuplicateAssignments:=", False]
+
+    material_queue.flush(oEditor)
+    names = oEditor.DuplicateAroundAxis(selectionsarray, parametersarray, optionsarray)
+    scene_graph.record(oEditor, 'DuplicateAroundAxis', (selectionsarray, parametersarray, optionsarray), names)
+
+    return names
 
 
 
@@ -995,7 +1209,11 @@ def imprint(oEditor, blanklist, toollist, KeepOriginals=False):
     imprintparams = ["NAME:ImprintParameters", 
                      "KeepOriginals:=", KeepOriginals]
     
-    return oEditor.Imprint(imprintselectionsarray, imprintparams)
+    query_cache.invalidate(oEditor, list(blanklist) + list(toollist))
+    result = oEditor.Imprint(imprintselectionsarray, imprintparams)
+    scene_graph.record(oEditor, 'Imprint', (imprintselectionsarray, imprintparams))
+    
+    return result
 
 def mirror(oEditor, partlist, base, normal):
     """
@@ -1029,7 +1247,9 @@ def mirror(oEditor, partlist, base, normal):
                          "MirrorNormalY:=", str(normal[1]) + "meter", 
                          "MirrorNormalZ:=", str(normal[2]) + "meter"]
                        
+    query_cache.invalidate(oEditor, partlist)
     oEditor.Mirror(selectionsarray, mirrorparamsarray)
+    scene_graph.record(oEditor, 'Mirror', (selectionsarray, mirrorparamsarray))
 
 def sweep_along_vector(oEditor, obj_name_list, x, y, z):
     """
@@ -1056,16 +1276,21 @@ def sweep_along_vector(oEditor, obj_name_list, x, y, z):
     
 #    print(selections)
     
-    oEditor.SweepAlongVector(["NAME:Selections", 
-                              "Selections:=", selections, 
-                              "NewPartsModelFlag:=", "Model"], 
-                             ["NAME:VectorSweepParameters", 
-                              "DraftAngle:=", "0deg", 
-                              "DraftType:=", "Round", 
-                              "CheckFaceFaceIntersection:=", False, 
-                              "SweepVectorX:=", Ex(x).expr, 
-                              "SweepVectorY:=", Ex(y).expr, 
-                              "SweepVectorZ:=", Ex(z).expr])
+    selectionsarray = ["NAME:Selections", 
+                       "Selections:=", selections, 
+                       "NewPartsModelFlag:=", "Model"]
+    
+    sweepparametersarray = ["NAME:VectorSweepParameters", 
+                            "DraftAngle:=", "0deg", 
+                            "DraftType:=", "Round", 
+                            "CheckFaceFaceIntersection:=", False, 
+                            "SweepVectorX:=", as_expr(x), 
+                            "SweepVectorY:=", as_expr(y), 
+                            "SweepVectorZ:=", as_expr(z)]
+    
+    query_cache.invalidate(oEditor, obj_name_list)
+    oEditor.SweepAlongVector(selectionsarray, sweepparametersarray)
+    scene_graph.record(oEditor, 'SweepAlongVector', (selectionsarray, sweepparametersarray))
 
     return get_selections(oEditor)
 
@@ -1094,9 +1319,11 @@ def rotate(oEditor, partlist, axis, angle):
                        
     rotateparametersarray = ["NAME:RotateParameters", 
                              "RotateAxis:=", axis, 
-                             "RotateAngle:=", Ex(angle).expr]
+                             "RotateAngle:=", as_expr(angle)]
                              
+    query_cache.invalidate(oEditor, partlist)
     oEditor.Rotate(selectionsarray, rotateparametersarray)
+    scene_graph.record(oEditor, 'Rotate', (selectionsarray, rotateparametersarray))
 
 def subtract(oEditor, blanklist, toollist, KeepOriginals=False):
     """
@@ -1133,7 +1360,11 @@ def subtract(oEditor, blanklist, toollist, KeepOriginals=False):
     subtractparametersarray = ["NAME:SubtractParameters", 
                                "KeepOriginals:=", KeepOriginals]
     
+    query_cache.invalidate(oEditor, list(blanklist) + list(toollist))
+    if not KeepOriginals:
+        material_queue.discard(oEditor, toollist)
     oEditor.Subtract(subtractselectionsarray, subtractparametersarray)
+    scene_graph.record(oEditor, 'Subtract', (subtractselectionsarray, subtractparametersarray))
     
     return blanklist[0]
 
@@ -1174,7 +1405,11 @@ def unite(oEditor, partlist, KeepOriginals=False):
     
     uniteparametersarray = ["NAME:UniteParameters", "KeepOriginals:=", KeepOriginals]
     
+    query_cache.invalidate(oEditor, partlist)
+    if not KeepOriginals:
+        material_queue.discard(oEditor, partlist[1:])
     oEditor.Unite(selectionsarray, uniteparametersarray)
+    scene_graph.record(oEditor, 'Unite', (selectionsarray, uniteparametersarray))
     
     return partlist[0]
 
@@ -1216,7 +1451,11 @@ def intersect(oEditor, partlist, KeepOriginals=False):
 
     intersectparametersarray = ["NAME:IntersectParameters", "KeepOriginals:=", KeepOriginals]
 
+    query_cache.invalidate(oEditor, partlist)
+    if not KeepOriginals:
+        material_queue.discard(oEditor, partlist[1:])
     oEditor.Unite(selectionsarray, intersectparametersarray)
+    scene_graph.record(oEditor, 'Unite', (selectionsarray, intersectparametersarray))
 
     return partlist[0]
 
@@ -1241,17 +1480,21 @@ def scale(oEditor, partlist, x, y, z):
     -------
     None
     """
-    selections = ", ".join(partlist)
-    selectionsarray = ["NAME:Selections",
-                       "Selections:=", selections, 
-                       "NewPartsModelFlag:=", "Model"]
-  
     scaleparametersarray = ["NAME:ScaleParameters", 
                             "ScaleX:=", str(x), 
                             "ScaleY:=", str(y), 
                             "ScaleZ:=", str(z)]
   
-    oEditor.Scale(selectionsarray, scaleparametersarray)
+    def issue(chunk):
+        selections = ", ".join(chunk)
+        selectionsarray = ["NAME:Selections",
+                           "Selections:=", selections, 
+                           "NewPartsModelFlag:=", "Model"]
+        oEditor.Scale(selectionsarray, scaleparametersarray)
+        scene_graph.record(oEditor, 'Scale', (selectionsarray, scaleparametersarray))
+  
+    query_cache.invalidate(oEditor, partlist)
+    selection_chunker.run('Scale', partlist, issue)
 
 def get_object_name_by_faceid(oEditor, faceid):
     """
@@ -1270,7 +1513,8 @@ def get_object_name_by_faceid(oEditor, faceid):
         The name of the object.
 
     """
-    return oEditor.GetObjectNameByFaceID(faceid)
+    return query_cache.lookup_owner(oEditor, faceid, 
+                                    lambda: oEditor.GetObjectNameByFaceID(faceid))
 
 def import_model(oEditor, 
                  sourcefile,
@@ -1292,10 +1536,13 @@ def import_model(oEditor,
         
     Returns
     -------
-    None
+    tuple of str
+        Names of the imported parts.
     
     Notes
     -----
+    - With the import cache enabled, a file imported before is copied from 
+      the design it was imported into, see hycohanz.importcache.
     - This function is barely documented in the HFSS Scripting Guide.
     - No documentation of the optional arguments is given because their 
       equivalents are not documented in the HFSS Scripting Guide.
@@ -1325,9 +1572,14 @@ def import_model(oEditor,
                           "ImportFreeSurfaces:=", ImportFreeSurfaces, 
                           "SourceFile:=", sourcefile]
     
-    oEditor.Import(import_params_array)
+    def fetch():
+        oEditor.Import(import_params_array)
+        names = get_selections(oEditor)
+        scene_graph.record(oEditor, 'Import', (import_params_array,), names)
+        return names
     
-    return get_selections(oEditor)
+    options = tuple(import_params_array[2:-2:2])
+    return import_cache.lookup(oEditor, sourcefile, options, fetch)
 
 def get_edge_by_position(oEditor, bodyname, x, y, z):
     """
@@ -1351,16 +1603,20 @@ def get_edge_by_position(oEditor, bodyname, x, y, z):
     edgeid : int
         Id number of the edge.
     """
-#    print(Ex(x).expr)
-#    print(Ex(y).expr)
-#    print(Ex(z).expr)
+#    print(as_expr(x))
+#    print(as_expr(y))
+#    print(as_expr(z))
     positionparameters = ["NAME:EdgeParameters", 
                           "BodyName:=", bodyname,
-                          "Xposition:=", Ex(x).expr,
-                          "YPosition:=", Ex(y).expr,
-                          "ZPosition:=", Ex(z).expr]
+                          "Xposition:=", as_expr(x),
+                          "YPosition:=", as_expr(y),
+                          "ZPosition:=", as_expr(z)]
 
-    edgeid = oEditor.GetEdgeByPosition(positionparameters)
+    query = ('edge',) + tuple(positionparameters[4::2])
+    edgeid = query_cache.lookup(oEditor, bodyname, query, 
+                                lambda: spatial_index.lookup(oEditor, bodyname, query[1:],
+                                    lambda: oEditor.GetEdgeByPosition(positionparameters),
+                                    edges=True))
     
     return edgeid
     
@@ -1407,12 +1663,14 @@ def fillet(oEditor, partlist, edgelist, radius, vertexlist=[], setback=0):
     tempparams = ["NAME:FilletParameters", 
                   "Edges:=", edgelist, 
                   "Vertices:=", vertexlist, 
-                  "Radius:=",  Ex(radius).expr, 
+                  "Radius:=",  as_expr(radius), 
                   "Setback:=", str(setback)]
     
     filletparameters = ["NAME:Parameters", tempparams]
                             
+    query_cache.invalidate(oEditor, partlist)
     oEditor.Fillet(selectionsarray, filletparameters)
+    scene_graph.record(oEditor, 'Fillet', (selectionsarray, filletparameters))
     
 def separate_body(oEditor, partlist, NewPartsModelFlag="Model"):
     """
@@ -1433,13 +1691,20 @@ def separate_body(oEditor, partlist, NewPartsModelFlag="Model"):
         List of objects created by the operation.
     
     """
-    selectionsarray = ["NAME:Selections", 
-                       "Selections:=", ",".join(partlist), 
-                       "NewPartsModelFlag:=", NewPartsModelFlag]
+    def issue(chunk):
+        selectionsarray = ["NAME:Selections", 
+                           "Selections:=", ",".join(chunk), 
+                           "NewPartsModelFlag:=", NewPartsModelFlag]
+        oEditor.SeparateBody(selectionsarray)
+        scene_graph.record(oEditor, 'SeparateBody', (selectionsarray,))
+        # The new parts are selected until the next command.
+        return tuple(get_selections(oEditor))
 
-    oEditor.SeparateBody(selectionsarray)
+    query_cache.invalidate(oEditor, partlist)
+    material_queue.flush(oEditor)
+    newparts = selection_chunker.run('SeparateBody', partlist, issue)
     
-    return (partlist[0],) + get_selections(oEditor)
+    return (partlist[0],) + sum(newparts, ())
     
 def delete(oEditor, partlist):
     """
@@ -1457,10 +1722,18 @@ def delete(oEditor, partlist):
     None
     
     """
-    selectionsarray = ["NAME:Selections", 
-                       "Selections:=", ','.join(partlist)]
+    def issue(chunk):
+        selectionsarray = ["NAME:Selections", 
+                           "Selections:=", ','.join(chunk)]
+        result = oEditor.Delete(selectionsarray)
+        scene_graph.record(oEditor, 'Delete', (selectionsarray,))
+        return result
                        
-    return oEditor.Delete(selectionsarray)
+    query_cache.invalidate(oEditor, partlist)
+    material_queue.discard(oEditor, partlist)
+    result = selection_chunker.run('Delete', partlist, issue)[-1]
+    
+    return result
 
 
 def split(oEditor, partlist, 
@@ -1500,7 +1773,12 @@ def split(oEditor, partlist,
                      "SplitCrossingObjectsOnly:=", SplitCrossingObjectsOnly, 
                      "DeleteInvalidObjects:=", DeleteInvalidObjects]
                        
-    return oEditor.Split(selectionsarray, splittoparams)
+    query_cache.invalidate(oEditor, partlist)
+    material_queue.flush(oEditor)
+    result = oEditor.Split(selectionsarray, splittoparams)
+    scene_graph.record(oEditor, 'Split', (selectionsarray, splittoparams))
+    
+    return result
 
 def get_face_by_position(oEditor, bodyname, x, y, z):
     """
@@ -1526,11 +1804,14 @@ def get_face_by_position(oEditor, bodyname, x, y, z):
     """
     positionparameters = ["NAME:Parameters", 
                           "BodyName:=", bodyname,
-                          "Xposition:=", Ex(x).expr,
-                          "YPosition:=", Ex(y).expr,
-                          "ZPosition:=", Ex(z).expr]
+                          "Xposition:=", as_expr(x),
+                          "YPosition:=", as_expr(y),
+                          "ZPosition:=", as_expr(z)]
                           
-    faceid = oEditor.GetFaceByPosition(positionparameters)
+    query = ('face',) + tuple(positionparameters[4::2])
+    faceid = query_cache.lookup(oEditor, bodyname, query, 
+                                lambda: spatial_index.lookup(oEditor, bodyname, query[1:],
+                                    lambda: oEditor.GetFaceByPosition(positionparameters)))
     
     return faceid
     
@@ -1552,16 +1833,18 @@ def uncover_faces(oEditor, partlist, dictoffacelists):
     -------
     None
     """
-    selectionsarray = ["NAME:Selections", "Selections:=", ','.join(partlist)]
+    def issue(chunk):
+        selectionsarray = ["NAME:Selections", "Selections:=", ','.join(chunk)]
 
-    uncoverparametersarray = ["NAME:Parameters"]
-    for part in partlist:
-        uncoverparametersarray += [["NAME:UncoverFacesParameters", "FacesToUncover:=", dictoffacelists[part]]]
+        uncoverparametersarray = ["NAME:Parameters"]
+        for part in chunk:
+            uncoverparametersarray += [["NAME:UncoverFacesParameters", "FacesToUncover:=", dictoffacelists[part]]]
 
-    print('selectionsarray:  {s}'.format(s=selectionsarray))
-    print('uncoverparametersarray:  {s}'.format(s=uncoverparametersarray))
+        oEditor.UncoverFaces(selectionsarray, uncoverparametersarray)
+        scene_graph.record(oEditor, 'UncoverFaces', (selectionsarray, uncoverparametersarray))
 
-    oEditor.UncoverFaces(selectionsarray, uncoverparametersarray)
+    query_cache.invalidate(oEditor, partlist)
+    selection_chunker.run('UncoverFaces', partlist, issue)
     
 def connect(oEditor, partlist):
     """
@@ -1591,10 +1874,36 @@ def connect(oEditor, partlist):
     """
     selectionsarray = ["NAME:Selections", "Selections:=", ','.join(partlist)]
     
+    query_cache.invalidate(oEditor, partlist)
+    material_queue.discard(oEditor, partlist[1:])
     oEditor.Connect(selectionsarray)
+    scene_graph.record(oEditor, 'Connect', (selectionsarray,))
     
     return partlist[0]
 
+def cover_lines(oEditor, partlist):
+    """
+    Cover closed 1-D parts to form sheets.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    partlist : list
+        List of part name strings to be covered.
+        
+    Returns
+    -------
+    None
+    """
+    selectionsarray = ["NAME:Selections", 
+                       "Selections:=", ','.join(partlist), 
+                       "NewPartsModelFlag:=", "Model"]
+    
+    query_cache.invalidate(oEditor, partlist)
+    oEditor.CoverLines(selectionsarray)
+    scene_graph.record(oEditor, 'CoverLines', (selectionsarray,))
+
 def rename_part(oEditor, oldname, newname):
     """
     Rename a part.
@@ -1615,7 +1924,12 @@ def rename_part(oEditor, oldname, newname):
     """
     renameparamsarray = ["Name:Rename Data", "Old Name:=", oldname, "New Name:=", newname]
     
-    return oEditor.RenamePart(renameparamsarray)
+    query_cache.invalidate(oEditor, [oldname, newname])
+    result = oEditor.RenamePart(renameparamsarray)
+    material_queue.rename(oEditor, oldname, newname)
+    scene_graph.record(oEditor, 'RenamePart', (renameparamsarray,))
+    
+    return result
 
 def get_face_ids(oEditor, body_name):
     """
@@ -1634,6 +1948,7 @@ def get_face_ids(oEditor, body_name):
         list with face Id numbers of body_name
     """
 
-    face_id_list = list(oEditor.GetFaceIDs(body_name))
+    face_id_list = query_cache.lookup(oEditor, body_name, ('faceids',), 
+                                      lambda: list(oEditor.GetFaceIDs(body_name)))
     return map(int,face_id_list)
 
@@ -7,6 +7,8 @@ in the HFSS Scripting Guide, Section "Optimetrics Module Script Commands"
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+from hycohanz.design import get_module
+
 def insert_optimetrics_setup(oDesign,
                              setup_name,
                              Variable,
@@ -52,7 +54,7 @@ def insert_optimetrics_setup(oDesign,
 
     '''
 
-    oOptimetricsSetup = oDesign.GetModule("Optimetrics")
+    oOptimetricsSetup = get_module(oDesign, "Optimetrics")
 
     V = ["NAME:Sweeps"]
     for i in range(len(Variable)):
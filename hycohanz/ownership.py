@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Ownership of the HFSS handles that hycohanz hands out.
+
+Quitting HFSS, closing a project or deleting a design invalidates the
+editors under it, and what hycohanz keeps about those editors:  the scene
+graph, the spatial index, the topology query cache and the import cache.
+The functions that hand out projects, designs and editors record here what
+they belong to, so that only the state of the editors that went away is
+dropped.
+
+Handles obtained without going through hycohanz, e.g. by calling
+oProject.GetActiveDesign() directly, are not known.  The state of editors
+under them is kept until clear_scene_graph() or invalidate_query_cache()
+is called for them.
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import threading
+
+from hycohanz.backend import handle_key
+from hycohanz.importcache import import_cache
+from hycohanz.querycache import query_cache
+from hycohanz.scenegraph import scene_graph
+from hycohanz.spatialindex import spatial_index
+
+# handle key -> [handle, key of the owner, name or None, whether an editor]
+_handles = {}
+_lock = threading.Lock()
+
+def adopt(owner, handle, name=None, editor=False):
+    """
+    Record that handle belongs to owner, e.g. a design to its project.
+
+    Parameters
+    ----------
+    owner : pywin32 COMObject
+        The desktop, project or design that handle belongs to.
+    handle : pywin32 COMObject
+        The project, design or editor.
+    name : str or None
+        Name of the design, if known.
+    editor : bool
+        Whether handle is an editor.
+
+    Returns
+    -------
+    None
+
+    """
+    if owner is None or handle is None:
+        return
+    with _lock:
+        _handles[handle_key(handle)] = [handle, handle_key(owner), name, editor]
+
+def owned(owner, name=None):
+    """
+    Return the recorded handles belonging to owner, or those of them named
+    name.
+    """
+    key = handle_key(owner)
+    with _lock:
+        return [entry[0] for entry in _handles.values()
+                if entry[1] == key and (name is None or entry[2] == name)]
+
+def root(handle):
+    """
+    Return the key of the topmost recorded owner of a handle, e.g. of the
+    desktop of an editor, or the key of the handle itself if it has no
+    recorded owner.
+    """
+    key = handle_key(handle)
+    with _lock:
+        while key in _handles:
+            key = _handles[key][1]
+    return key
+
+def release(handle):
+    """
+    Forget a handle that went away, and every handle under it.
+
+    Parameters
+    ----------
+    handle : pywin32 COMObject
+        The desktop, project or design.
+
+    Returns
+    -------
+    list of (handle, bool) tuples
+        The handles that were under it, and whether they are editors.
+
+    """
+    released = []
+    with _lock:
+        keys = [handle_key(handle)]
+        while keys:
+            key = keys.pop()
+            entry = _handles.pop(key, None)
+            if entry is not None:
+                released.append((entry[0], entry[3]))
+            keys.extend(k for k, e in _handles.items() if e[1] == key)
+    return released
+
+def forget(handle):
+    """
+    Forget a handle that went away, and drop what hycohanz keeps about the
+    designs and editors under it.
+
+    Parameters
+    ----------
+    handle : pywin32 COMObject
+        The desktop that quit, the project that was closed or the design
+        that was deleted.
+
+    Returns
+    -------
+    None
+
+    """
+    # Imported here to avoid a circular import.
+    from hycohanz.design import invalidate_module_cache
+
+    invalidate_module_cache(handle)
+    for released, editor in release(handle):
+        if editor:
+            query_cache.invalidate(released)
+            scene_graph.invalidate(released)
+            spatial_index.invalidate(released)
+            import_cache.invalidate(released)
+        else:
+            invalidate_module_cache(released)
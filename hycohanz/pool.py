@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+A pool of HFSS desktop instances for running independent jobs in parallel.
+
+setup_interface() gives one desktop, so independent builds and solves
+queue up behind each other.  A DesktopPool launches up to a given number of
+HFSS processes, each driven by its own ComExecutor, and hands them out as
+exclusive leases.  A new lease goes to an idle instance, launching one if
+the pool is not full, preferring the instance that has run the fewest
+jobs.  Instances are quit and replaced after a configurable number of jobs,
+or when a memory probe reports that they have grown too large.
+
+Jobs are functions taking oDesktop as their first argument, e.g.
+new_project(), open_project() or a function building and solving one
+variant.  They run on the COM worker thread of the leased instance.
+
+What hycohanz keeps between calls is shared by all threads:  the module
+handle cache, the topology query cache, the scene graph and its spatial
+index, the import cache, the material queue and the selection chunker.
+All of them are locked and keep their state per editor, so jobs running on
+different instances at the same time are safe, and closing a project or
+deleting a design in one job drops only the state of its own editors.  The
+switches that turn them on and off, such as enable_scene_graph() or
+enable_chunking(), are global:  set them before submitting jobs, not from
+within a job.  The statistics they report, e.g. get_query_cache_info(),
+and the adapted chunk lengths of the selection chunker are totals over all
+instances.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> def build(oDesktop, width):
+...     oProject = hfss.new_project(oDesktop)
+...     # ... build, solve and export the variant ...
+...     hfss.close_project_byhandle(oDesktop, oProject)
+>>> with hfss.DesktopPool(size=4, max_jobs=20) as pool:
+...     pool.map(build, [1.0, 1.5, 2.0, 2.5, 3.0])
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from hycohanz.backend import backend_name
+from hycohanz.executor import ComExecutor
+
+class Lease(object):
+    """
+    Exclusive use of one desktop instance of a DesktopPool.
+
+    Use the lease as a context manager, or call release() when done.
+
+    Attributes
+    ----------
+    oAnsoftApp : pywin32 COMObject
+        Handle to the HFSS application interface.
+    oDesktop : pywin32 COMObject
+        Handle to the HFSS desktop interface.
+    executor : ComExecutor
+        The executor owning the handles.  Calls using them must be made
+        through it.
+    jobs : int
+        Number of jobs the instance had completed when it was leased.
+
+    """
+    def __init__(self, pool, instance):
+        self._pool = pool
+        self._instance = instance
+        self.executor = instance.executor
+        self.oAnsoftApp = instance.executor.oAnsoftApp
+        self.oDesktop = instance.executor.oDesktop
+        self.jobs = instance.jobs
+        self.released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        self.release()
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Schedule a call on the executor of the instance.  See
+        ComExecutor.submit().
+        """
+        return self.executor.submit(function, *args, **kwargs)
+
+    def call(self, function, *args, **kwargs):
+        """
+        Run a call on the executor of the instance and wait for its result.
+        """
+        return self.executor.call(function, *args, **kwargs)
+
+    def release(self, jobs=1):
+        """
+        Return the instance to the pool.
+
+        Parameters
+        ----------
+        jobs : int
+            Number of jobs run under this lease, counted towards max_jobs.
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.released:
+            self.released = True
+            self._pool._release(self._instance, jobs)
+
+class _Instance(object):
+    def __init__(self, executor):
+        self.executor = executor
+        self.jobs = 0
+        self.leased = False
+
+class DesktopPool(object):
+    """
+    Launches, reuses and recycles up to size HFSS desktop instances.
+
+    Parameters
+    ----------
+    size : int
+        Maximum number of instances running at the same time.
+    backend : str or None
+        Backend name, see setup_interface().  For the "com" backend,
+        new_process defaults to True so that each instance is a separate
+        HFSS process.
+    max_jobs : int or None
+        Recycle an instance after it has run this many jobs.
+    max_memory : int or None
+        Recycle an instance once memory_probe reports more than this
+        many bytes.
+    memory_probe : callable or None
+        Called with a Lease when it is released, it must return the memory
+        in use by that instance in bytes, e.g. the working set of the HFSS
+        process as reported by psutil.
+    **options
+        Backend options, see setup_interface().
+
+    Attributes
+    ----------
+    launched : int
+        Number of instances launched so far.
+    recycled : int
+        Number of instances quit because of max_jobs or max_memory.
+    jobs : int
+        Number of jobs completed.
+
+    """
+    def __init__(self, size=2, backend=None,
+                 max_jobs=None,
+                 max_memory=None,
+                 memory_probe=None,
+                 **options):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        if backend_name(backend) == 'com':
+            options.setdefault('new_process', True)
+        self.size = size
+        self.backend = backend
+        self.options = options
+        self.max_jobs = max_jobs
+        self.max_memory = max_memory
+        self.memory_probe = memory_probe
+        self.launched = 0
+        self.recycled = 0
+        self.jobs = 0
+        self._instances = []
+        self._starting = 0
+        self._closed = False
+        self._quit = True
+        self._condition = threading.Condition()
+        self._dispatcher = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        self.shutdown()
+
+    @property
+    def instances(self):
+        """
+        Number of instances currently running.
+        """
+        return len(self._instances)
+
+    def lease(self, timeout=None):
+        """
+        Obtain exclusive use of an instance, launching one if needed.
+
+        Parameters
+        ----------
+        timeout : float or None
+            Seconds to wait for an instance to become available.  Wait
+            indefinitely if None.
+
+        Returns
+        -------
+        Lease
+
+        Raises
+        ------
+        RuntimeError
+            If no instance became available within timeout, or the pool
+            has been shut down.
+
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('the DesktopPool has been shut down')
+                idle = [instance for instance in self._instances if not instance.leased]
+                if idle:
+                    instance = min(idle, key=lambda instance: instance.jobs)
+                    instance.leased = True
+                    return Lease(self, instance)
+                if len(self._instances) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                if not self._condition.wait(timeout) and timeout is not None:
+                    raise RuntimeError('no HFSS instance became available within {t} s'.format(t=timeout))
+
+        # Launch outside the lock; starting HFSS takes a while.
+        try:
+            executor = ComExecutor(self.backend, **self.options)
+        except BaseException:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify()
+            raise
+
+        instance = _Instance(executor)
+        instance.leased = True
+        with self._condition:
+            self._starting -= 1
+            self._instances.append(instance)
+            self.launched += 1
+        return Lease(self, instance)
+
+    def _release(self, instance, jobs):
+        lease = None
+        instance.jobs += jobs
+        recycle = self.max_jobs is not None and instance.jobs >= self.max_jobs
+        if not recycle and self.memory_probe is not None and self.max_memory is not None:
+            lease = Lease(self, instance)
+            lease.released = True
+            recycle = self.memory_probe(lease) > self.max_memory
+
+        with self._condition:
+            self.jobs += jobs
+            instance.leased = False
+            stop = recycle or self._closed
+            if stop:
+                self._instances.remove(instance)
+                if recycle:
+                    self.recycled += 1
+            self._condition.notify()
+
+        if stop:
+            instance.executor.shutdown(quit_application=recycle or self._quit)
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Run a job on the next available instance.
+
+        Parameters
+        ----------
+        function : callable
+            Called on the worker thread of the leased instance as
+            function(oDesktop, *args, **kwargs).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the return value of the job.
+
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('the DesktopPool has been shut down')
+            if self._dispatcher is None:
+                self._dispatcher = ThreadPoolExecutor(max_workers=self.size)
+        return self._dispatcher.submit(self._run, function, args, kwargs)
+
+    def _run(self, function, args, kwargs):
+        with self.lease() as lease:
+            return lease.call(function, lease.oDesktop, *args, **kwargs)
+
+    def map(self, function, *iterables):
+        """
+        Run function(oDesktop, *args) for every tuple of arguments taken
+        from iterables, spread over the instances.
+
+        Returns
+        -------
+        list
+            The return values of the jobs, in order.
+
+        """
+        futures = [self.submit(function, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def shutdown(self, quit_application=True):
+        """
+        Wait for submitted jobs, then stop all instances.  Instances that
+        are still leased are stopped when they are released.
+
+        Parameters
+        ----------
+        quit_application : bool
+            Whether to quit the HFSS processes.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._condition:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=True)
+
+        with self._condition:
+            self._closed = True
+            self._quit = quit_application
+            instances = [instance for instance in self._instances if not instance.leased]
+            for instance in instances:
+                self._instances.remove(instance)
+            self._condition.notify_all()
+
+        for instance in instances:
+            instance.executor.shutdown(quit_application=quit_application)
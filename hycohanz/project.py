@@ -8,6 +8,9 @@ At last count there were 3 functions implemented out of 17.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+from hycohanz.ownership import adopt, owned, forget
+from hycohanz.instrument import instrument
+
 def get_project_name(oProject):
     """
     Get the name of the specified project.
@@ -43,6 +46,7 @@ def set_active_design(oProject, designname):
         
     """
     oEditor = oProject.SetActiveDesign(designname)
+    adopt(oProject, oEditor, designname)
     
     return oEditor
     
@@ -70,7 +74,8 @@ def insert_design(oProject, designname, solutiontype):
         The created HFSS design.
         
     """
-    oDesign = oProject.InsertDesign("HFSS", designname, solutiontype, "")
+    oDesign = instrument(oProject.InsertDesign("HFSS", designname, solutiontype, ""))
+    adopt(oProject, oDesign, designname)
     
     return oDesign
 
@@ -92,8 +97,30 @@ def get_design(oProject, design_name):
         
     """
     oDesign = oProject.GetDesign(design_name)
+    adopt(oProject, oDesign, design_name)
     return oDesign
 
+def delete_design(oProject, designname):
+    """
+    Delete a design from the project.
+    
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project in which the operation will be performed.
+    designname : str
+        Name of the design to delete.
+        
+    Returns
+    -------
+    None
+    
+    """
+    deleted = owned(oProject, designname)
+    oProject.DeleteDesign(designname)
+    for oDesign in deleted:
+        forget(oDesign)
+
 def get_top_design_list(oProject):
     """
     Returns a list of the names of the top-level designs.
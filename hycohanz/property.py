@@ -9,6 +9,7 @@ At last count there were 1 functions implemented out of 7.
 from __future__ import division, print_function, unicode_literals, absolute_import
 
 from hycohanz.expression import Expression
+from hycohanz.querycache import query_cache
 
 def add_property(oDesign, name, value):
     """
@@ -38,6 +39,8 @@ def add_property(oDesign, name, value):
     proptabarray = ["NAME:LocalVariableTab", propserversarray, newpropsarray]
           
     oDesign.ChangeProperty(["NAME:AllTabs", proptabarray])
+    # Geometry sized by the variable may have changed.
+    query_cache.invalidate()
 
 def set_variable(oProject, name, value):
     """
@@ -61,10 +64,11 @@ def set_variable(oProject, name, value):
     
     """
     if '$' in name: 
-		oProject.SetVariableValue(name,Expression(value).expr)
+        oProject.SetVariableValue(name,Expression(value).expr)
     else:
-		oDesign = oProject.GetActiveDesign()
-		oDesign.SetVariableValue(name,Expression(value).expr)
+        oDesign = oProject.GetActiveDesign()
+        oDesign.SetVariableValue(name,Expression(value).expr)
+    query_cache.invalidate()
 
 def get_variables(oProject,oDesign=''):
     """
@@ -81,7 +85,7 @@ def get_variables(oProject,oDesign=''):
     Returns
     -------
     variable_list: list of str
-	list of non-indexed project/design variables
+        list of non-indexed project/design variables
     
     """
     if oDesign=='':
@@ -108,5 +112,6 @@ def add_property_project(oProject, name, value):
     proptabarray = ["NAME:ProjectVariableTab", propserversarray, newpropsarray, changepropsarray]
 
     oProject.ChangeProperty(["NAME:AllTabs", proptabarray])
+    query_cache.invalidate()
 
 
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of 3D Modeler topology queries.
+
+Scripts that look up faces and edges by position tend to ask the same
+questions over and over, e.g. the face of a port sheet when assigning the
+port and again when creating its integration line.  Each question is a
+cross-process COM call.  The hycohanz query functions therefore remember
+their answers per editor and body:
+
+- get_face_by_position()
+- get_edge_by_position()
+- get_face_ids()
+- get_object_id_by_name()
+- get_object_name_by_faceid()
+
+The hycohanz functions that change a body (move, rotate, subtract, unite,
+delete, rename_part, ...) drop the cached answers of the bodies they touch.
+Changing a variable with set_variable(), add_property() or
+add_property_project() may resize any body, and drops all cached answers.
+Changes made without going through hycohanz, e.g. by calling oEditor methods
+directly or in the HFSS user interface, are not seen; call
+invalidate_query_cache() afterwards, or disable the cache.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> face = hfss.get_face_by_position(oEditor, box, 0, 0.5, 0.5)
+>>> face = hfss.get_face_by_position(oEditor, box, 0, 0.5, 0.5)  # no COM call
+>>> hfss.get_query_cache_info()
+QueryCacheInfo(hits=1, misses=1, currsize=1)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import threading
+from collections import namedtuple
+
+from hycohanz.backend import handle_key
+
+QueryCacheInfo = namedtuple('QueryCacheInfo', ['hits', 'misses', 'currsize'])
+
+class QueryCache(object):
+    """
+    Answers to topology queries by editor, body name and query.
+
+    Attributes
+    ----------
+    enabled : bool
+        If False, every query is passed on to the editor and nothing is
+        stored.
+    hits : int
+        Number of queries answered from the cache.
+    misses : int
+        Number of queries passed on to the editor.
+
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        # editor key -> {body name: {query: answer}}
+        self._bodies = {}
+        # editor key -> {face id: body name}
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, oEditor, body, query, fetch):
+        """
+        Return the cached answer to a query, or fetch and cache it.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor that the query is made to.
+        body : str
+            Name of the body that the answer depends on.
+        query : tuple
+            Hashable description of the query.
+        fetch : callable
+            Called without arguments to obtain the answer on a miss.
+
+        Returns
+        -------
+        The answer to the query.
+
+        """
+        if not self.enabled:
+            return fetch()
+
+        key = handle_key(oEditor)
+        with self._lock:
+            try:
+                answer = self._bodies[key][body][query]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return answer
+        # Fetched outside the lock, so that other threads need not wait for
+        # the COM call.
+        answer = fetch()
+        with self._lock:
+            self.misses += 1
+            self._bodies.setdefault(key, {}).setdefault(body, {})[query] = answer
+        return answer
+
+    def lookup_owner(self, oEditor, faceid, fetch):
+        """
+        Return the cached name of the body owning a face, or fetch and
+        cache it.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor that the query is made to.
+        faceid : int
+            The face ID.
+        fetch : callable
+            Called without arguments to obtain the body name on a miss.
+
+        Returns
+        -------
+        str
+            Name of the body.
+
+        """
+        if not self.enabled:
+            return fetch()
+
+        key = handle_key(oEditor)
+        with self._lock:
+            try:
+                body = self._owners[key][faceid]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return body
+        body = fetch()
+        with self._lock:
+            self.misses += 1
+            self._owners.setdefault(key, {})[faceid] = body
+            # Registering the body makes invalidate() find the entry.
+            self._bodies.setdefault(key, {}).setdefault(body, {})
+        return body
+
+    def invalidate(self, oEditor=None, partlist=None):
+        """
+        Drop cached answers.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject or None
+            Drop the answers of this editor only.  If None, the answers of
+            all editors are dropped.
+        partlist : list of str or None
+            Drop the answers concerning these bodies only.  If None, all
+            answers of the editor are dropped.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            if oEditor is None:
+                self._bodies.clear()
+                self._owners.clear()
+                return
+
+            key = handle_key(oEditor)
+            if partlist is None:
+                self._bodies.pop(key, None)
+                self._owners.pop(key, None)
+                return
+
+            bodies = self._bodies.get(key)
+            if not bodies:
+                return
+            owners = self._owners.get(key, {})
+            for part in partlist:
+                if bodies.pop(part, None) is not None:
+                    for faceid in [f for f, owner in owners.items() if owner == part]:
+                        del owners[faceid]
+
+    def info(self):
+        """
+        Return the hit and miss counts and the number of cached answers.
+
+        Returns
+        -------
+        QueryCacheInfo
+            Named tuple (hits, misses, currsize).
+
+        """
+        with self._lock:
+            currsize = sum(len(queries) for bodies in self._bodies.values()
+                           for queries in bodies.values())
+            currsize += sum(len(owners) for owners in self._owners.values())
+        return QueryCacheInfo(self.hits, self.misses, currsize)
+
+    def reset_info(self):
+        """
+        Reset the hit and miss counts.
+        """
+        self.hits = 0
+        self.misses = 0
+
+query_cache = QueryCache()
+
+def enable_query_cache(enabled=True):
+    """
+    Turn caching of topology queries on or off.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to cache.  Turning the cache off also empties it.
+
+    Returns
+    -------
+    bool
+        Whether caching was enabled before.
+
+    """
+    previous = query_cache.enabled
+    query_cache.enabled = enabled
+    if not enabled:
+        query_cache.invalidate()
+    return previous
+
+def invalidate_query_cache(oEditor=None, partlist=None):
+    """
+    Drop cached topology query answers, e.g. after changing the model
+    without going through hycohanz.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject or None
+        Drop the answers of this editor only.  If None, all answers are
+        dropped.
+    partlist : list of str or None
+        Drop the answers concerning these bodies only.  If None, all
+        answers of the editor are dropped.
+
+    Returns
+    -------
+    None
+
+    """
+    query_cache.invalidate(oEditor, partlist)
+
+def get_query_cache_info():
+    """
+    Return statistics of the topology query cache.
+
+    Returns
+    -------
+    QueryCacheInfo
+        Named tuple (hits, misses, currsize).
+
+    """
+    return query_cache.info()
+
+def reset_query_cache_info():
+    """
+    Reset the hit and miss counts of the topology query cache.
+
+    Returns
+    -------
+    None
+
+    """
+    query_cache.reset_info()
@@ -9,6 +9,8 @@ Export data have been reported in HFSS.
 from __future__ import division, print_function, unicode_literals, absolute_import
 import numpy.core.defchararray as npchar
 
+from hycohanz.design import get_module
+
 def create_report(oDesign,
                   paraname_array,
                   paravalue_array,
@@ -54,11 +56,11 @@ def create_report(oDesign,
     '''
 
     paraname_array = npchar.add(paraname_array, ':=')
-    para_array = range(2*len(paraname_array))
+    para_array = list(range(2*len(paraname_array)))
     para_array[::2] = paraname_array
     para_array[1::2] = paravalue_array
 
-    oReportSetup = oDesign.GetModule("ReportSetup")
+    oReportSetup = get_module(oDesign, "ReportSetup")
     return oReportSetup.CreateReport(report_name,
                                      report_type,
                                      display_type,
@@ -82,5 +84,5 @@ def export_to_file(oDesign, report_name, file_name):
     :return: None
     '''
 
-    oReportSetup = oDesign.GetModule("ReportSetup")
+    oReportSetup = get_module(oDesign, "ReportSetup")
     return oReportSetup.ExportToFile(report_name, file_name)
\ No newline at end of file
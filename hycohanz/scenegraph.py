@@ -0,0 +1,964 @@
+# -*- coding: utf-8 -*-
+"""
+Python-side shadow of the geometry in a 3D Modeler editor.
+
+When the scene graph is enabled, every hycohanz modeler3d creator and
+transform records what it asked HFSS to do:  the primitive type and
+parameters of each part, its material, and the affine transform applied to
+it since it was created.  Geometric questions about parts drawn this way
+are then answered locally, without a COM call:
+
+- get_bounding_box()
+- get_face_centers()
+- Scene.names(), Scene.get(), Scene.objects
+
+Coordinates are SI (meters).  Unitless numbers in the recorded parameters
+are read in the model units of the scene, "mm" unless changed with
+get_scene(oEditor).model_units.  Parameters that reference design variables
+cannot be evaluated locally; the parts are tracked by name, but their
+geometry is unknown and the queries return None.
+
+After a boolean operation, the bounding box of the result is the union of
+the bounding boxes of its parts (unite, connect), or an upper bound
+(subtract, imprint, fillet).  Parts that hycohanz cannot follow, e.g. the
+results of split and separate_body, or changes made by calling oEditor
+methods directly, are dropped from the scene; call clear_scene_graph() after
+changing the model by other means.  Closing a project, deleting a design or
+quitting HFSS through hycohanz forgets the scenes of their editors only; see
+hycohanz.ownership.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> hfss.enable_scene_graph()
+False
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 2, 3)
+>>> hfss.move(oEditor, [box], 1, 0, 0)
+>>> hfss.get_bounding_box(oEditor, box)
+((0.001, 0.0, 0.0), (0.002, 0.002, 0.003))
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import fnmatch
+import math
+import re
+import threading
+
+from hycohanz.backend import handle_key
+from hycohanz.units import to_si
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+# Affine transforms are (A, t) pairs, A a 3 x 3 tuple of rows.
+IDENTITY = (((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)), (0.0, 0.0, 0.0))
+
+_AXES = {'X': (1.0, 0.0, 0.0), 'Y': (0.0, 1.0, 0.0), 'Z': (0.0, 0.0, 1.0)}
+
+# In-plane (u, v) axes of rectangles, circles and ellipses by normal axis.
+_PLANES = {'X': ('Y', 'Z'), 'Y': ('Z', 'X'), 'Z': ('X', 'Y')}
+
+def _fields(array):
+    """
+    Map the "Key:=", value pairs of an HFSS argument array to a dict.
+    Nested named arrays are stored under their name.
+    """
+    fields = {}
+    items = iter(array[1:])
+    for item in items:
+        if isinstance(item, string_types):
+            if item.endswith(':='):
+                fields[item[:-2]] = next(items, None)
+        elif isinstance(item, (list, tuple)) and item and isinstance(item[0], string_types) \
+                and item[0][:5].upper() == 'NAME:':
+            fields[item[0][5:]] = item
+    return fields
+
+def _split(text):
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+_COPY_NAME = re.compile(r'^(.*)_(\d+)$')
+
+def match_clones(names, new, clones):
+    """
+    Match the parts created by a duplication to their clone and original.
+
+    HFSS names the copies of a part <name>_<k>, counting k up from the
+    lowest free number, so the copies of each original are ordered by k.
+    The order in which the new names are reported does not matter.
+
+    Parameters
+    ----------
+    names : list of str
+        The duplicated parts, in selection order.
+    new : list of str
+        The names of the new parts.
+    clones : int
+        NumClones of the duplication, including the originals.
+
+    Returns
+    -------
+    list of list of str, or None
+        result[k - 1][i] is the copy of names[i] in clone k.  None if the
+        new names are not one copy of each original per clone.
+
+    """
+    copies = collections.OrderedDict((name, []) for name in names)
+    if len(copies) != len(names):
+        return None
+    for newname in new:
+        match = _COPY_NAME.match(newname)
+        if match is None or match.group(1) not in copies:
+            return None
+        copies[match.group(1)].append((int(match.group(2)), newname))
+    if any(len(found) != clones - 1 for found in copies.values()):
+        return None
+    for found in copies.values():
+        found.sort()
+    return [[copies[name][k][1] for name in names] for k in range(clones - 1)]
+
+def _apply(transform, point):
+    A, t = transform
+    return (A[0][0] * point[0] + A[0][1] * point[1] + A[0][2] * point[2] + t[0],
+            A[1][0] * point[0] + A[1][1] * point[1] + A[1][2] * point[2] + t[1],
+            A[2][0] * point[0] + A[2][1] * point[1] + A[2][2] * point[2] + t[2])
+
+def _apply_vector(transform, vector):
+    return _apply((transform[0], (0.0, 0.0, 0.0)), vector)
+
+def _compose(outer, inner):
+    """
+    Return the transform applying inner, then outer.
+    """
+    A = outer[0]
+    B = inner[0]
+    AB = tuple((a[0] * B[0][0] + a[1] * B[1][0] + a[2] * B[2][0],
+                a[0] * B[0][1] + a[1] * B[1][1] + a[2] * B[2][1],
+                a[0] * B[0][2] + a[1] * B[1][2] + a[2] * B[2][2]) for a in A)
+    return (AB, _apply(outer, inner[1]))
+
+def translation(vector):
+    """
+    Return the affine transform translating by vector.
+    """
+    return (IDENTITY[0], tuple(vector))
+
+def rotation(axis, angle):
+    """
+    Return the affine transform rotating by angle (radians) about the
+    coordinate axis 'X', 'Y', or 'Z' through the origin.
+    """
+    c = math.cos(angle)
+    s = math.sin(angle)
+    axis = axis.upper()
+    if axis == 'X':
+        A = ((1.0, 0.0, 0.0), (0.0, c, -s), (0.0, s, c))
+    elif axis == 'Y':
+        A = ((c, 0.0, s), (0.0, 1.0, 0.0), (-s, 0.0, c))
+    else:
+        A = ((c, -s, 0.0), (s, c, 0.0), (0.0, 0.0, 1.0))
+    return (A, (0.0, 0.0, 0.0))
+
+def reflection(base, normal):
+    """
+    Return the affine transform mirroring about the plane through base with
+    the given normal.
+    """
+    length = math.sqrt(sum(c * c for c in normal))
+    n = tuple(c / length for c in normal)
+    A = tuple(tuple((1.0 if i == j else 0.0) - 2 * n[i] * n[j] for j in range(3))
+              for i in range(3))
+    return (A, tuple(base[i] - sum(A[i][j] * base[j] for j in range(3)) for i in range(3)))
+
+def scaling(factors):
+    """
+    Return the affine transform scaling about the origin.
+    """
+    x, y, z = factors
+    return (((x, 0.0, 0.0), (0.0, y, 0.0), (0.0, 0.0, z)), (0.0, 0.0, 0.0))
+
+def _polygon_centroid(points):
+    """
+    Return the area centroid of a planar polygon, or None if it is
+    degenerate.
+    """
+    p0 = points[0]
+    normal = [0.0, 0.0, 0.0]
+    triangles = []
+    for a, b in zip(points[1:-1], points[2:]):
+        u = [a[k] - p0[k] for k in range(3)]
+        v = [b[k] - p0[k] for k in range(3)]
+        cross = (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+        normal = [normal[k] + cross[k] for k in range(3)]
+        triangles.append((cross, [(p0[k] + a[k] + b[k]) / 3 for k in range(3)]))
+    area = math.sqrt(sum(c * c for c in normal))
+    if area == 0:
+        return None
+    n = [c / area for c in normal]
+    centroid = [0.0, 0.0, 0.0]
+    for cross, center in triangles:
+        weight = sum(cross[k] * n[k] for k in range(3)) / area
+        centroid = [centroid[k] + weight * center[k] for k in range(3)]
+    return tuple(centroid)
+
+def _transform_feature(transform, feature):
+    """
+    Apply an affine transform to a face or edge descriptor.
+    """
+    kind = feature[0]
+    if kind in ('polygon', 'segment'):
+        return (kind,) + tuple(_apply(transform, p) for p in feature[1:])
+    return ((kind, _apply(transform, feature[1])) +
+            tuple(_apply_vector(transform, v) for v in feature[2:]))
+
+class SceneObject(object):
+    """
+    A part of the 3D Modeler as recorded by the scene graph.
+
+    Faces and edges are described by tuples:  ('polygon', p1, p2, ...) for
+    planar polygons, ('disk', center, u, v) for elliptical disks with
+    semi-axis vectors u and v, ('ellipsoid', center, u, v, w) for spheres,
+    ('segment', a, b) for straight edges, and ('ellipse', center, u, v) for
+    elliptical edges.
+
+    Attributes
+    ----------
+    name : str
+        Name of the part.
+    kind : str
+        The primitive it was created as, e.g. "Box" or "Polyline", or the
+        last boolean operation that changed it, e.g. "Unite".
+    parameters : dict
+        The parameters it was created with, as sent to HFSS.
+    material : str or None
+        Name of the assigned material, without quotes.
+    transform : tuple
+        Affine transform (A, t) applied since the part was created.
+    exact : bool
+        False if the bounding box is only an upper bound.
+    face_ids, edge_ids : dict
+        HFSS IDs of the faces and edges by their index in faces() and
+        edges(), as far as they have been learned.
+
+    """
+    __slots__ = ('name', 'kind', 'parameters', 'material', 'transform', 'exact',
+                 'face_ids', 'edge_ids',
+                 '_points', '_rounds', '_faces', '_edges', '_bbox', '_world')
+
+    def __init__(self, name, kind, parameters, material,
+                 points=None, rounds=(), faces=None, edges=None):
+        self.name = name
+        self.kind = kind
+        self.parameters = parameters
+        self.material = material
+        self.transform = IDENTITY
+        self.exact = True
+        self.face_ids = {}
+        self.edge_ids = {}
+        # Vertices bounding the part, round features as (center, radius
+        # vectors), faces, and edges, all before the transform.  points is
+        # None if the geometry is unknown, faces and edges if the topology
+        # is.
+        self._points = points
+        self._rounds = tuple(rounds)
+        self._faces = faces
+        self._edges = edges
+        self._bbox = None
+        self._world = None
+
+    def clone(self, name, transform=None):
+        """
+        Return a copy of the part, optionally transformed.
+
+        The copy has new faces and edges, so their IDs are not copied.
+        """
+        other = SceneObject(name, self.kind, self.parameters, self.material,
+                            self._points, self._rounds, self._faces, self._edges)
+        other.transform = self.transform
+        other.exact = self.exact
+        if transform is not None:
+            other.apply(transform)
+        return other
+
+    def apply(self, transform):
+        """
+        Apply an affine transform to the part.
+        """
+        self.transform = _compose(transform, self.transform)
+        self._bbox = None
+        self._world = None
+
+    def world(self):
+        """
+        Return the vertices and round features in global coordinates, or
+        (None, ()) if the geometry is unknown.
+        """
+        if self._points is None:
+            return None, ()
+        points = [_apply(self.transform, p) for p in self._points]
+        rounds = [(_apply(self.transform, c), [_apply_vector(self.transform, v) for v in vectors])
+                  for c, vectors in self._rounds]
+        return points, rounds
+
+    def _topology(self):
+        if self._world is None:
+            known = self._points is not None
+            self._world = tuple(
+                None if not known or features is None else
+                [_transform_feature(self.transform, f) for f in features]
+                for features in (self._faces, self._edges))
+        return self._world
+
+    def faces(self):
+        """
+        Return the faces in global coordinates, or None if they are unknown.
+        """
+        return self._topology()[0]
+
+    def edges(self):
+        """
+        Return the edges in global coordinates, or None if they are unknown.
+        """
+        return self._topology()[1]
+
+    def bounding_box(self):
+        """
+        Return the axis-aligned bounding box in meters.
+
+        Returns
+        -------
+        tuple or None
+            ((xmin, ymin, zmin), (xmax, ymax, zmax)), or None if the
+            geometry is unknown.
+
+        """
+        if self._bbox is None and self._points is not None:
+            points, rounds = self.world()
+            lo = [float('inf')] * 3
+            hi = [float('-inf')] * 3
+            for p in points:
+                for k in range(3):
+                    lo[k] = min(lo[k], p[k])
+                    hi[k] = max(hi[k], p[k])
+            for c, vectors in rounds:
+                for k in range(3):
+                    half = math.sqrt(sum(v[k] * v[k] for v in vectors))
+                    lo[k] = min(lo[k], c[k] - half)
+                    hi[k] = max(hi[k], c[k] + half)
+            self._bbox = (tuple(lo), tuple(hi))
+        return self._bbox
+
+    def face_centers(self):
+        """
+        Return the centers of the planar faces in meters.
+
+        Returns
+        -------
+        list of tuple or None
+            One (x, y, z) per planar face, or None if the faces are unknown.
+
+        """
+        faces = self.faces()
+        if faces is None:
+            return None
+        centers = []
+        for face in faces:
+            if face[0] == 'polygon':
+                center = _polygon_centroid(face[1:])
+                if center is not None:
+                    centers.append(center)
+            elif face[0] == 'disk':
+                centers.append(face[1])
+        return centers
+
+    def _absorb(self, others, kind, exact):
+        """
+        Make the part the union of itself and others, in global coordinates.
+        """
+        points, rounds = self.world()
+        for other in others:
+            if points is None:
+                break
+            other_points, other_rounds = other.world()
+            if other_points is None:
+                points = None
+            else:
+                points = points + other_points
+                rounds = rounds + list(other_rounds)
+        self.kind = kind
+        self.transform = IDENTITY
+        self.exact = exact and all(other.exact for other in others)
+        self.face_ids = {}
+        self.edge_ids = {}
+        self._points = points
+        self._rounds = tuple(rounds)
+        self._faces = None
+        self._edges = None
+        self._bbox = None
+        self._world = None
+
+    def __repr__(self):
+        return 'SceneObject({n!r}, {k!r})'.format(n=self.name, k=self.kind)
+
+class Scene(object):
+    """
+    The recorded parts of one 3D Modeler editor.
+
+    Attributes
+    ----------
+    objects : OrderedDict
+        SceneObject by part name, in creation order.
+    model_units : str
+        Unit of unitless numbers in the recorded parameters.
+
+    """
+    def __init__(self, model_units='mm'):
+        self.objects = collections.OrderedDict()
+        self.model_units = model_units
+        # Names of the parts added, changed or removed since the last call
+        # of take_changes().
+        self._changed = set()
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, name):
+        return name in self.objects
+
+    def get(self, name):
+        """
+        Return the SceneObject of a part, or None if it is not tracked.
+        """
+        return self.objects.get(name)
+
+    def names(self, pattern='*'):
+        """
+        Return the names of the tracked parts matching a wildcard pattern,
+        in creation order.
+        """
+        if pattern == '*':
+            return list(self.objects)
+        return [name for name in self.objects if fnmatch.fnmatchcase(name, pattern)]
+
+    def take_changes(self):
+        """
+        Return the names of the parts added, changed or removed since the
+        last call, e.g. to update an index of the parts.
+        """
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    # Parameter parsing
+
+    def _length(self, value):
+        return to_si(value, self.model_units)
+
+    def _point(self, x, y, z):
+        point = (self._length(x), self._length(y), self._length(z))
+        return None if None in point else point
+
+    def _object(self, name):
+        """
+        Return the SceneObject of a part that is about to change.
+        """
+        self._changed.add(name)
+        return self.objects.get(name)
+
+    def _add(self, obj):
+        self._changed.add(obj.name)
+        self.objects[obj.name] = obj
+        return obj
+
+    def _discard(self, names):
+        for name in names:
+            self._changed.add(name)
+            self.objects.pop(name, None)
+
+    def _transform(self, names, transform):
+        for name in names:
+            obj = self._object(name)
+            if obj is None:
+                continue
+            if transform is None:
+                # The transform could not be evaluated.
+                obj._absorb([], obj.kind, obj.exact)
+                obj._points = None
+            else:
+                obj.apply(transform)
+
+    def _create(self, kind, f, attributesarray, name,
+                points=None, rounds=(), faces=None, edges=None):
+        attributes = _fields(attributesarray)
+        material = attributes.get('MaterialValue', attributes.get('MaterialName'))
+        if material is not None:
+            material = str(material).strip('"')
+        return self._add(SceneObject(name, kind, f, material, points, rounds, faces, edges))
+
+    # Recorders, named after the editor methods
+
+    def CreateBox(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        p = self._point(f['XPosition'], f['YPosition'], f['ZPosition'])
+        s = self._point(f['XSize'], f['YSize'], f['ZSize'])
+        if p is None or s is None:
+            return self._create('Box', f, attributesarray, name)
+        corner = lambda a, b, c: (p[0] + a * s[0], p[1] + b * s[1], p[2] + c * s[2])
+        points = [corner(a, b, c) for a in (0, 1) for b in (0, 1) for c in (0, 1)]
+        # Bottom, top, front, back, left, right.
+        faces = [('polygon', corner(0, 0, 0), corner(1, 0, 0), corner(1, 1, 0), corner(0, 1, 0)),
+                 ('polygon', corner(0, 0, 1), corner(1, 0, 1), corner(1, 1, 1), corner(0, 1, 1)),
+                 ('polygon', corner(0, 0, 0), corner(1, 0, 0), corner(1, 0, 1), corner(0, 0, 1)),
+                 ('polygon', corner(0, 1, 0), corner(1, 1, 0), corner(1, 1, 1), corner(0, 1, 1)),
+                 ('polygon', corner(0, 0, 0), corner(0, 1, 0), corner(0, 1, 1), corner(0, 0, 1)),
+                 ('polygon', corner(1, 0, 0), corner(1, 1, 0), corner(1, 1, 1), corner(1, 0, 1))]
+        edges = []
+        for a, b in ((0, 0), (0, 1), (1, 0), (1, 1)):
+            edges += [('segment', corner(0, a, b), corner(1, a, b)),
+                      ('segment', corner(a, 0, b), corner(a, 1, b)),
+                      ('segment', corner(a, b, 0), corner(a, b, 1))]
+        return self._create('Box', f, attributesarray, name, points, (), faces, edges)
+
+    def CreateRectangle(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        p = self._point(f['XStart'], f['YStart'], f['ZStart'])
+        w = self._length(f['Width'])
+        h = self._length(f['Height'])
+        if p is None or w is None or h is None:
+            return self._create('Rectangle', f, attributesarray, name)
+        u, v = (_AXES[axis] for axis in _PLANES[f.get('WhichAxis', 'Z')])
+        corner = lambda a, b: tuple(p[k] + a * w * u[k] + b * h * v[k] for k in range(3))
+        points = [corner(0, 0), corner(1, 0), corner(1, 1), corner(0, 1)]
+        faces = [('polygon',) + tuple(points)] if f.get('IsCovered', True) else []
+        edges = [('segment', points[k], points[(k + 1) % 4]) for k in range(4)]
+        return self._create('Rectangle', f, attributesarray, name, points, (), faces, edges)
+
+    def _create_disk(self, kind, name, f, attributesarray, radius, ratio):
+        c = self._point(f['XCenter'], f['YCenter'], f['ZCenter'])
+        r = self._length(radius)
+        if c is None or r is None or ratio is None:
+            return self._create(kind, f, attributesarray, name)
+        u, v = (_AXES[axis] for axis in _PLANES[f.get('WhichAxis', 'Z')])
+        u = tuple(r * x for x in u)
+        v = tuple(r * ratio * x for x in v)
+        return self._create(kind, f, attributesarray, name,
+                            [c], [(c, (u, v))], [('disk', c, u, v)], [('ellipse', c, u, v)])
+
+    def CreateCircle(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        return self._create_disk('Circle', name, f, attributesarray, f['Radius'], 1.0)
+
+    def CreateEllipse(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        return self._create_disk('Ellipse', name, f, attributesarray,
+                                 f['MajRadius'], to_si(f['Ratio'], 'm'))
+
+    def CreateSphere(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        c = self._point(f['XCenter'], f['YCenter'], f['ZCenter'])
+        r = self._length(f['Radius'])
+        if c is None or r is None:
+            return self._create('Sphere', f, attributesarray, name)
+        vectors = ((r, 0.0, 0.0), (0.0, r, 0.0), (0.0, 0.0, r))
+        return self._create('Sphere', f, attributesarray, name,
+                            [c], [(c, vectors)], [('ellipsoid', c) + vectors], [])
+
+    def CreatePolyline(self, name, parametersarray, attributesarray):
+        f = _fields(parametersarray)
+        points = []
+        for item in f['PolylinePoints'][1:]:
+            # create_polyline() wraps every point in an extra list.
+            if isinstance(item[0], (list, tuple)):
+                item = item[0]
+            pf = _fields(item)
+            points.append(self._point(pf['X'], pf['Y'], pf['Z']))
+        segments = [_fields(segment) for segment in f['PolylineSegments'][1:]]
+        # Arcs and splines are not chords of their points.
+        if (not points or None in points or
+                any(segment.get('SegmentType', 'Line') != 'Line' for segment in segments)):
+            return self._create('Polyline', f, attributesarray, name)
+        nsegments = min(len(segments), len(points) - 1)
+        edges = [('segment', points[k], points[k + 1]) for k in range(nsegments)]
+        faces = []
+        if f.get('IsPolylineClosed', True) and f.get('IsPolylineCovered', True) and len(points) > 2:
+            outline = points[:-1] if points[0] == points[-1] else points
+            faces = [('polygon',) + tuple(outline)]
+        return self._create('Polyline', f, attributesarray, name, points, (), faces, edges)
+
+    def CreateEquationCurve(self, name, parametersarray, attributesarray):
+        return self._create('EquationCurve', _fields(parametersarray), attributesarray, name)
+
+    def Import(self, result, parametersarray):
+        # The geometry of imported bodies is not known.
+        f = _fields(parametersarray)
+        for name in result or ():
+            self._add(SceneObject(name, 'Import', f, None))
+
+    def Move(self, result, selectionsarray, parametersarray):
+        f = _fields(parametersarray)
+        d = self._point(f['TranslateVectorX'], f['TranslateVectorY'], f['TranslateVectorZ'])
+        self._transform(_split(_fields(selectionsarray)['Selections']),
+                        None if d is None else translation(d))
+
+    def Rotate(self, result, selectionsarray, parametersarray):
+        f = _fields(parametersarray)
+        angle = to_si(f['RotateAngle'], 'deg')
+        self._transform(_split(_fields(selectionsarray)['Selections']),
+                        None if angle is None else rotation(f['RotateAxis'], angle))
+
+    def Mirror(self, result, selectionsarray, parametersarray):
+        f = _fields(parametersarray)
+        base = self._point(f['MirrorBaseX'], f['MirrorBaseY'], f['MirrorBaseZ'])
+        normal = self._point(f['MirrorNormalX'], f['MirrorNormalY'], f['MirrorNormalZ'])
+        self._transform(_split(_fields(selectionsarray)['Selections']),
+                        None if base is None or normal is None else reflection(base, normal))
+
+    def Scale(self, result, selectionsarray, parametersarray):
+        f = _fields(parametersarray)
+        factors = (to_si(f['ScaleX'], 'm'), to_si(f['ScaleY'], 'm'), to_si(f['ScaleZ'], 'm'))
+        self._transform(_split(_fields(selectionsarray)['Selections']),
+                        None if None in factors else scaling(factors))
+
+    def _duplicate(self, result, selectionsarray, count, step):
+        names = _split(_fields(selectionsarray)['Selections'])
+        clones = match_clones(names, list(result or []), count)
+        if clones is None:
+            # HFSS did not report the new parts, or they cannot be told
+            # apart.
+            return
+        for k, newnames in enumerate(clones, 1):
+            transform = None if step is None else step(k)
+            for name, newname in zip(names, newnames):
+                source = self.objects.get(name)
+                if source is None:
+                    continue
+                self._add(source.clone(newname))
+                self._transform([newname], transform)
+
+    def DuplicateAlongLine(self, result, selectionsarray, parametersarray, optionsarray):
+        f = _fields(parametersarray)
+        d = self._point(f['XComponent'], f['YComponent'], f['ZComponent'])
+        step = None if d is None else (lambda k: translation(tuple(k * c for c in d)))
+        self._duplicate(result, selectionsarray, int(float(f['NumClones'])), step)
+
+    def DuplicateAroundAxis(self, result, selectionsarray, parametersarray, optionsarray):
+        f = _fields(parametersarray)
+        angle = to_si(f['AngleStr'], 'deg')
+        axis = f.get('WhichAxis', 'Z')
+        step = None if angle is None else (lambda k: rotation(axis, k * angle))
+        self._duplicate(result, selectionsarray, int(float(f['NumClones'])), step)
+
+    def Paste(self, result, clipboard):
+        new = list(result or [])
+        if len(new) != len(clipboard):
+            return
+        for obj, name in zip(clipboard, new):
+            if obj is not None:
+                self._add(obj.clone(name))
+
+    def Delete(self, result, selectionsarray):
+        self._discard(_split(_fields(selectionsarray)['Selections']))
+
+    def RenamePart(self, result, parametersarray):
+        f = _fields(parametersarray)
+        oldname, newname = f['Old Name'], f['New Name']
+        obj = self._object(oldname)
+        self._changed.add(newname)
+        if obj is None:
+            return
+        # Keep the creation order.
+        self.objects = collections.OrderedDict(
+            (newname, value) if name == oldname else (name, value)
+            for name, value in self.objects.items())
+        obj.name = newname
+
+    def AssignMaterial(self, result, selectionsarray, attributesarray):
+        material = _fields(attributesarray).get('MaterialName')
+        for name in _split(_fields(selectionsarray)['Selections']):
+            obj = self.objects.get(name)
+            if obj is not None and material is not None:
+                obj.material = str(material).strip('"')
+
+    def _combine(self, names, kind, exact, keep_originals):
+        target = self._object(names[0])
+        others = [self.objects.get(name) for name in names[1:]]
+        if not keep_originals:
+            self._discard(names[1:])
+        if target is None:
+            return
+        if None in others:
+            target._absorb([], kind, exact)
+            target._points = None
+        else:
+            target._absorb(others, kind, exact)
+
+    def Unite(self, result, selectionsarray, parametersarray):
+        self._combine(_split(_fields(selectionsarray)['Selections']), 'Unite', True,
+                      _fields(parametersarray).get('KeepOriginals', False))
+
+    def Connect(self, result, selectionsarray):
+        self._combine(_split(_fields(selectionsarray)['Selections']), 'Connect', True, False)
+
+    def _subtract(self, kind, selectionsarray, parametersarray):
+        f = _fields(selectionsarray)
+        tools = _split(f['Tool Parts'])
+        if not _fields(parametersarray).get('KeepOriginals', False):
+            self._discard(tools)
+        for name in _split(f['Blank Parts']):
+            obj = self._object(name)
+            if obj is not None:
+                obj._absorb([], kind, False)
+
+    def Subtract(self, result, selectionsarray, parametersarray):
+        self._subtract('Subtract', selectionsarray, parametersarray)
+
+    def Imprint(self, result, selectionsarray, parametersarray):
+        self._subtract('Imprint', selectionsarray, parametersarray)
+
+    def SweepAlongVector(self, result, selectionsarray, parametersarray):
+        f = _fields(parametersarray)
+        d = self._point(f['SweepVectorX'], f['SweepVectorY'], f['SweepVectorZ'])
+        for name in _split(_fields(selectionsarray)['Selections']):
+            obj = self._object(name)
+            if obj is None:
+                continue
+            if d is None:
+                obj._absorb([], 'Sweep', True)
+                obj._points = None
+            else:
+                obj._absorb([obj.clone(name, translation(d))], 'Sweep', True)
+
+    def Fillet(self, result, selectionsarray, parametersarray):
+        for name in _split(_fields(selectionsarray)['Selections']):
+            obj = self._object(name)
+            if obj is not None:
+                obj._absorb([], 'Fillet', False)
+
+    def UncoverFaces(self, result, selectionsarray, parametersarray):
+        for name in _split(_fields(selectionsarray)['Selections']):
+            obj = self._object(name)
+            if obj is not None:
+                edges = obj.edges()
+                obj._absorb([], obj.kind, obj.exact)
+                obj._edges = edges
+
+    def CoverLines(self, result, selectionsarray):
+        for name in _split(_fields(selectionsarray)['Selections']):
+            obj = self._object(name)
+            if obj is None:
+                continue
+            points, rounds = obj.world()
+            edges = obj.edges()
+            obj._absorb([], 'CoverLines', obj.exact)
+            obj._edges = edges
+            # Covering a closed polyline, e.g. one united from open pieces,
+            # gives a single planar face.
+            if edges and all(edge[0] == 'segment' for edge in edges) and \
+                    _polygon_centroid([edge[1] for edge in edges]) is not None:
+                obj._faces = [('polygon',) + tuple(edge[1] for edge in edges)]
+
+    def SeparateBody(self, result, selectionsarray):
+        self._discard(_split(_fields(selectionsarray)['Selections']))
+
+    def Split(self, result, selectionsarray, parametersarray):
+        self._discard(_split(_fields(selectionsarray)['Selections']))
+
+# Editor methods other than Create* that return the names of new parts.
+_CREATING = ('DuplicateAlongLine', 'DuplicateAroundAxis', 'Paste', 'Import')
+
+class SceneGraph(object):
+    """
+    The Scene of every editor, and the switch that turns recording on.
+
+    Attributes
+    ----------
+    enabled : bool
+        If False, nothing is recorded.
+    model_units : str
+        Model units of newly created scenes.
+
+    """
+    def __init__(self, enabled=False, model_units='mm'):
+        self.enabled = enabled
+        self.model_units = model_units
+        self._scenes = {}
+        # Parts on the clipboard, by the key of the desktop of the editor
+        # they were copied from:  the editors of a desktop share its
+        # clipboard.
+        self._clipboards = {}
+        # Held while scenes change, so that they can be read from other
+        # threads, e.g. by the jobs of a DesktopPool.
+        self._lock = threading.RLock()
+
+    def scene(self, oEditor):
+        """
+        Return the Scene of an editor, creating it if needed.
+        """
+        key = handle_key(oEditor)
+        with self._lock:
+            try:
+                return self._scenes[key]
+            except KeyError:
+                scene = self._scenes[key] = Scene(self.model_units)
+                return scene
+
+    def record(self, oEditor, method, args, result=None):
+        """
+        Record an editor command.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor the command was sent to.
+        method : str
+            The editor method, e.g. "CreateBox".
+        args : tuple
+            The arguments it was called with.
+        result
+            What it returned.
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.enabled:
+            return
+
+        # Imported here to avoid circular imports.
+        from hycohanz.batch import BatchResult
+        from hycohanz.ownership import root
+
+        if isinstance(result, BatchResult):
+            # The names of new parts are not known until the batch runs, so
+            # they are not tracked.
+            if method.startswith('Create') or method in _CREATING:
+                return
+            result = None
+
+        with self._lock:
+            scene = self.scene(oEditor)
+            if method == 'Copy':
+                clipboard = [scene.get(name) for name in _split(_fields(args[0])['Selections'])]
+                self._clipboards[root(oEditor)] = [None if obj is None else obj.clone(obj.name)
+                                                   for obj in clipboard]
+            elif method == 'Paste':
+                scene.Paste(result, self._clipboards.get(root(oEditor), []))
+            else:
+                getattr(scene, method)(result, *args)
+
+    def invalidate(self, oEditor=None):
+        """
+        Forget the recorded parts of an editor, or of all editors.
+        """
+        with self._lock:
+            if oEditor is None:
+                self._scenes.clear()
+                self._clipboards.clear()
+            else:
+                self._scenes.pop(handle_key(oEditor), None)
+
+scene_graph = SceneGraph()
+
+def enable_scene_graph(enabled=True):
+    """
+    Turn recording of created geometry on or off.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to record.  Turning recording off also forgets all
+        recorded parts.
+
+    Returns
+    -------
+    bool
+        Whether recording was enabled before.
+
+    """
+    previous = scene_graph.enabled
+    scene_graph.enabled = enabled
+    if not enabled:
+        scene_graph.invalidate()
+    return previous
+
+def clear_scene_graph(oEditor=None):
+    """
+    Forget the recorded parts, e.g. after changing the model without
+    going through hycohanz.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject or None
+        Forget the parts of this editor only.  If None, the parts of all
+        editors are forgotten.
+
+    Returns
+    -------
+    None
+
+    """
+    scene_graph.invalidate(oEditor)
+
+def get_scene(oEditor):
+    """
+    Return the recorded parts of an editor.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+
+    Returns
+    -------
+    Scene
+
+    """
+    return scene_graph.scene(oEditor)
+
+def get_bounding_box(oEditor, partname):
+    """
+    Return the bounding box of a part from the scene graph.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    partname : str
+        Name of the part.
+
+    Returns
+    -------
+    tuple or None
+        ((xmin, ymin, zmin), (xmax, ymax, zmax)) in meters, or None if the
+        part or its geometry is not known.  After subtract, imprint and
+        fillet, the box is an upper bound.
+
+    """
+    obj = scene_graph.scene(oEditor).get(partname)
+    return None if obj is None else obj.bounding_box()
+
+def get_face_centers(oEditor, partname):
+    """
+    Return the centers of the planar faces of a part from the scene graph.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    partname : str
+        Name of the part.
+
+    Returns
+    -------
+    list of tuple or None
+        One (x, y, z) in meters per planar face, e.g. six for a box, or
+        None if the part or its faces are not known.
+
+    """
+    obj = scene_graph.scene(oEditor).get(partname)
+    return None if obj is None else obj.face_centers()
@@ -0,0 +1,1089 @@
+# -*- coding: utf-8 -*-
+"""
+An in-process stand-in for HFSS.
+
+The classes in this module mimic the Desktop, Project, Design, Editor and
+Module objects of the HFSS scripting interface closely enough to run
+hycohanz scripts without HFSS.  Objects are named the way HFSS names them,
+receive object, face and edge IDs from a shared counter, and keep enough
+geometry for GetFaceByPosition() and GetEdgeByPosition() to give
+plausible answers for primitives whose dimensions are plain numbers.
+
+Every method call is counted in SimulatedApp.call_counts and may be delayed
+by a configurable latency to mimic the cost of a COM round-trip.  Select it
+with the "simulated" backend:
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface(backend='simulated', latency=0.001)
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign)
+>>> hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+'Box1'
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import copy as _copy
+import fnmatch
+import io
+import math
+import os
+import re
+import time
+
+from hycohanz.units import to_si
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+MODULE_NAMES = ("BoundarySetup",
+                "MeshSetup",
+                "AnalysisSetup",
+                "Optimetrics",
+                "Solutions",
+                "FieldsReporter",
+                "RadField",
+                "UserDefinedSolutionModule",
+                "ReportSetup")
+
+DEFAULT_MATERIALS = ("vacuum", "air", "pec", "copper", "aluminum", "FR4_epoxy",
+                     "Rogers RT/duroid 5880 (tm)")
+
+class SimulatedComError(Exception):
+    """
+    Raised where HFSS would reject a script command.
+    """
+
+def _pairs(items):
+    """
+    Map the "Key:=", value pairs of an HFSS argument array to a dict.  Nested
+    named arrays are stored under their name.
+    """
+    fields = {}
+    i = 0
+    while i < len(items):
+        item = items[i]
+        if isinstance(item, string_types) and item.endswith(':=') and i + 1 < len(items):
+            fields[item[:-2]] = items[i + 1]
+            i += 2
+            continue
+        if isinstance(item, (list, tuple)) and item and isinstance(item[0], string_types) \
+                and item[0][:5].upper() == 'NAME:':
+            fields[item[0][5:]] = item
+        i += 1
+    return fields
+
+def _fields(array):
+    return _pairs(list(array[1:]))
+
+def _array_name(array):
+    return array[0][5:]
+
+def _selections(array):
+    """
+    Return the part names in a "NAME:Selections" array.
+    """
+    text = _fields(array).get('Selections', '')
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+def _add(a, b):
+    return (a[0] + b[0], a[1] + b[1], a[2] + b[2])
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def _mul(a, s):
+    return (a[0] * s, a[1] * s, a[2] * s)
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0])
+
+def _length(a):
+    return math.sqrt(_dot(a, a))
+
+def _unit(a):
+    n = _length(a)
+    if n == 0:
+        return a
+    return _mul(a, 1 / n)
+
+_AXES = {'X': (1.0, 0.0, 0.0), 'Y': (0.0, 1.0, 0.0), 'Z': (0.0, 0.0, 1.0)}
+
+def _rotation(axis, angle):
+    """
+    Return a function rotating a vector by angle (radians) about the given
+    coordinate axis.
+    """
+    c = math.cos(angle)
+    s = math.sin(angle)
+    axis = axis.upper()
+    if axis == 'X':
+        return lambda p: (p[0], c * p[1] - s * p[2], s * p[1] + c * p[2])
+    elif axis == 'Y':
+        return lambda p: (c * p[0] + s * p[2], p[1], -s * p[0] + c * p[2])
+    else:
+        return lambda p: (c * p[0] - s * p[1], s * p[0] + c * p[1], p[2])
+
+def _polygon_normal(points):
+    normal = (0.0, 0.0, 0.0)
+    for i in range(len(points)):
+        normal = _add(normal, _cross(points[i], points[(i + 1) % len(points)]))
+    return _unit(normal)
+
+def _in_polygon(point, points, normal):
+    """
+    Test whether the projection of point lies inside the planar polygon.
+    """
+    drop = max(range(3), key=lambda k: abs(normal[k]))
+    keep = [k for k in range(3) if k != drop]
+    px, py = point[keep[0]], point[keep[1]]
+    inside = False
+    n = len(points)
+    for i in range(n):
+        ax, ay = points[i][keep[0]], points[i][keep[1]]
+        bx, by = points[(i + 1) % n][keep[0]], points[(i + 1) % n][keep[1]]
+        if (ay > py) != (by > py):
+            if px < (bx - ax) * (py - ay) / (by - ay) + ax:
+                inside = not inside
+    return inside
+
+def _segment_distance(point, a, b):
+    ab = _sub(b, a)
+    denom = _dot(ab, ab)
+    t = 0.0 if denom == 0 else max(0.0, min(1.0, _dot(_sub(point, a), ab) / denom))
+    return _length(_sub(point, _add(a, _mul(ab, t))))
+
+class _Entity(object):
+    """
+    A face or an edge of a simulated body.
+
+    kind is one of "polygon", "segment", "disk", "circle", "sphere", or None
+    when the geometry could not be evaluated.
+    """
+    __slots__ = ('id', 'kind', 'points', 'normal', 'radius')
+
+    def __init__(self, kind, points=(), normal=None, radius=None):
+        self.id = None
+        self.kind = kind
+        self.points = list(points)
+        self.normal = normal
+        self.radius = radius
+
+    def transform(self, point_map, vector_map, radius_scale):
+        self.points = [point_map(p) for p in self.points]
+        if self.normal is not None:
+            self.normal = _unit(vector_map(self.normal))
+        if self.radius is not None:
+            self.radius = self.radius * radius_scale
+
+    def distance(self, point):
+        """
+        Distance from point to this face or edge, or None if unknown.
+        """
+        if self.kind is None:
+            return None
+        if self.kind == 'sphere':
+            return abs(_length(_sub(point, self.points[0])) - self.radius)
+        if self.kind == 'segment':
+            return _segment_distance(point, self.points[0], self.points[1])
+
+        offset = _sub(point, self.points[0])
+        height = _dot(offset, self.normal)
+        inplane = _sub(offset, _mul(self.normal, height))
+        if self.kind == 'disk':
+            return math.hypot(height, max(0.0, _length(inplane) - self.radius))
+        if self.kind == 'circle':
+            return math.hypot(height, _length(inplane) - self.radius)
+
+        # polygon
+        if _in_polygon(point, self.points, self.normal):
+            return abs(height)
+        n = len(self.points)
+        return min(_segment_distance(point, self.points[i], self.points[(i + 1) % n])
+                   for i in range(n))
+
+class _Body(object):
+    """
+    A simulated 3D Modeler object.
+    """
+    def __init__(self, name, kind, faces, edges, attributes, parameters):
+        self.name = name
+        self.id = None
+        self.kind = kind
+        self.faces = faces
+        self.edges = edges
+        self.attributes = attributes
+        self.parameters = parameters
+        self.material = _material_name(attributes.get('MaterialValue',
+                                       attributes.get('MaterialName', '"vacuum"')))
+        self.solve_inside = attributes.get('SolveInside',
+                                           attributes.get('Solveinside', True))
+
+    def transform(self, point_map, vector_map, radius_scale=1.0):
+        for entity in self.faces + self.edges:
+            entity.transform(point_map, vector_map, radius_scale)
+
+    def clone(self, name):
+        body = _copy.deepcopy(self)
+        body.name = name
+        return body
+
+def _material_name(value):
+    return str(value).strip('"')
+
+class _SimObject(object):
+    """
+    Base class of the simulated scripting objects.
+    """
+    def __init__(self, app):
+        self._app = app
+
+    def _call(self, method):
+        self._app._record(method)
+
+class SimulatedApp(_SimObject):
+    """
+    Stand-in for the AnsoftHfss.HfssScriptInterface object.
+
+    Parameters
+    ----------
+    latency : float or dict
+        Seconds to sleep in every simulated call.  A dict maps method names
+        to latencies; its "*" entry, if any, applies to all other methods.
+    model_units : str
+        Length unit assumed for unitless coordinates.
+
+    Attributes
+    ----------
+    call_counts : collections.Counter
+        Number of calls per method name.
+    script_call_counts : collections.Counter
+        Number of calls per method name made by scripts executed through
+        RunScript().  These run inside HFSS and so incur no latency.
+
+    """
+    def __init__(self, latency=0.0, model_units='mm'):
+        _SimObject.__init__(self, self)
+        self.latency = latency
+        self.model_units = model_units
+        self.call_counts = collections.Counter()
+        self.script_call_counts = collections.Counter()
+        self.quit_requested = False
+        self._ids = 0
+        self._script_depth = 0
+        self._desktop = SimulatedDesktop(self)
+
+    def _new_id(self):
+        # Object, face and edge IDs share one counter, as in HFSS.
+        self._ids += 1
+        return self._ids
+
+    def _record(self, method):
+        if self._script_depth:
+            self.script_call_counts[method] += 1
+            return
+        self.call_counts[method] += 1
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(method, latency.get('*', 0.0))
+        if latency:
+            time.sleep(latency)
+
+    @property
+    def total_calls(self):
+        """
+        Total number of simulated calls so far.
+        """
+        return sum(self.call_counts.values())
+
+    def GetAppDesktop(self):
+        self._call('GetAppDesktop')
+        return self._desktop
+
+class SimulatedDesktop(_SimObject):
+    """
+    Stand-in for the HFSS Desktop object.
+    """
+    def __init__(self, app):
+        _SimObject.__init__(self, app)
+        self._projects = collections.OrderedDict()
+        self._active = None
+        self._count = 0
+        self.clipboard = []
+
+    def _unique_project_name(self, name):
+        candidate = name
+        k = 1
+        while candidate in self._projects:
+            candidate = '{n}{k}'.format(n=name, k=k)
+            k += 1
+        return candidate
+
+    def _add_project(self, name):
+        oProject = SimulatedProject(self._app, self, name)
+        self._projects[name] = oProject
+        self._active = oProject
+        return oProject
+
+    def NewProject(self):
+        self._call('NewProject')
+        self._count += 1
+        name = 'Project{n}'.format(n=self._count)
+        while name in self._projects:
+            self._count += 1
+            name = 'Project{n}'.format(n=self._count)
+        return self._add_project(name)
+
+    def OpenProject(self, filename):
+        self._call('OpenProject')
+        name = os.path.splitext(os.path.basename(filename))[0]
+        if name in self._projects:
+            self._active = self._projects[name]
+            return self._active
+        oProject = self._add_project(name)
+        oProject.path = filename
+        return oProject
+
+    def CloseProject(self, projectname):
+        self._call('CloseProject')
+        try:
+            oProject = self._projects.pop(projectname)
+        except KeyError:
+            raise SimulatedComError('Project {p!r} is not open'.format(p=projectname))
+        if oProject is self._active:
+            self._active = list(self._projects.values())[-1] if self._projects else None
+
+    def GetActiveProject(self):
+        self._call('GetActiveProject')
+        return self._active
+
+    def SetActiveProject(self, projectname):
+        self._call('SetActiveProject')
+        try:
+            self._active = self._projects[projectname]
+        except KeyError:
+            raise SimulatedComError('Project {p!r} is not open'.format(p=projectname))
+        return self._active
+
+    def GetProjects(self):
+        self._call('GetProjects')
+        return tuple(self._projects.values())
+
+    def RunScript(self, scriptpath):
+        self._call('RunScript')
+        with io.open(scriptpath, encoding='utf-8') as f:
+            source = f.read()
+        self._app._script_depth += 1
+        try:
+            exec(compile(source, scriptpath, 'exec'), {'__name__': '__main__', 'oDesktop': self})
+        finally:
+            self._app._script_depth -= 1
+
+    def QuitApplication(self):
+        self._call('QuitApplication')
+        self._projects.clear()
+        self._active = None
+        self._app.quit_requested = True
+
+class SimulatedDefinitionManager(_SimObject):
+    """
+    Stand-in for the project's material definition manager.
+    """
+    def __init__(self, app):
+        _SimObject.__init__(self, app)
+        self.materials = dict((name.lower(), name) for name in DEFAULT_MATERIALS)
+
+    def AddMaterial(self, materialarray):
+        self._call('AddMaterial')
+        name = _array_name(materialarray)
+        self.materials[name.lower()] = name
+        return name
+
+    def DoesMaterialExist(self, material_name):
+        self._call('DoesMaterialExist')
+        return material_name.lower() in self.materials
+
+def _change_variables(variables, tabsarray):
+    """
+    Apply the NewProps and ChangedProps of a ChangeProperty() call to the
+    variables dict.
+    """
+    for tab in tabsarray[1:]:
+        for group in tab[1:]:
+            if _array_name(group) in ('NewProps', 'ChangedProps'):
+                for prop in group[1:]:
+                    fields = _fields(prop)
+                    if 'Value' in fields:
+                        variables[_array_name(prop)] = str(fields['Value'])
+
+class _VariableHost(_SimObject):
+    def __init__(self, app):
+        _SimObject.__init__(self, app)
+        self.variables = collections.OrderedDict()
+
+    def GetVariables(self):
+        self._call('GetVariables')
+        return tuple(self.variables)
+
+    def GetVariableValue(self, name):
+        self._call('GetVariableValue')
+        try:
+            return self.variables[name]
+        except KeyError:
+            raise SimulatedComError('Variable {v!r} does not exist'.format(v=name))
+
+    def SetVariableValue(self, name, value):
+        self._call('SetVariableValue')
+        self.variables[name] = str(value)
+
+    def ChangeProperty(self, tabsarray):
+        self._call('ChangeProperty')
+        _change_variables(self.variables, tabsarray)
+
+class SimulatedProject(_VariableHost):
+    """
+    Stand-in for the HFSS Project object.
+    """
+    def __init__(self, app, oDesktop, name):
+        _VariableHost.__init__(self, app)
+        self._desktop = oDesktop
+        self._name = name
+        self._designs = collections.OrderedDict()
+        self._active = None
+        self._definitions = SimulatedDefinitionManager(app)
+        self.path = None
+
+    def GetName(self):
+        self._call('GetName')
+        return self._name
+
+    def InsertDesign(self, designtype, designname, solutiontype, unused):
+        self._call('InsertDesign')
+        name = designname
+        k = 1
+        while name in self._designs:
+            name = '{n}_{k}'.format(n=designname, k=k)
+            k += 1
+        oDesign = SimulatedDesign(self._app, self, name, solutiontype)
+        self._designs[name] = oDesign
+        self._active = oDesign
+        return oDesign
+
+    def SetActiveDesign(self, designname):
+        self._call('SetActiveDesign')
+        self._active = self._design(designname)
+        return self._active
+
+    def GetActiveDesign(self):
+        self._call('GetActiveDesign')
+        return self._active
+
+    def GetDesign(self, designname):
+        self._call('GetDesign')
+        return self._design(designname)
+
+    def DeleteDesign(self, designname):
+        self._call('DeleteDesign')
+        oDesign = self._design(designname)
+        del self._designs[designname]
+        if oDesign is self._active:
+            self._active = None
+
+    def GetTopDesignList(self):
+        self._call('GetTopDesignList')
+        return tuple(self._designs)
+
+    def GetDefinitionManager(self):
+        self._call('GetDefinitionManager')
+        return self._definitions
+
+    def SaveAs(self, filename, overwrite):
+        self._call('SaveAs')
+        del self._desktop._projects[self._name]
+        self._name = os.path.splitext(os.path.basename(filename))[0]
+        self._desktop._projects[self._name] = self
+        self.path = filename
+        return True
+
+    def Save(self):
+        self._call('Save')
+        return True
+
+    def _design(self, designname):
+        try:
+            return self._designs[designname]
+        except KeyError:
+            raise SimulatedComError('Design {d!r} does not exist'.format(d=designname))
+
+class SimulatedDesign(_VariableHost):
+    """
+    Stand-in for the HFSS Design object.
+    """
+    def __init__(self, app, oProject, name, solutiontype):
+        _VariableHost.__init__(self, app)
+        self._project = oProject
+        self._name = name
+        self.solution_type = solutiontype
+        self._editor = SimulatedEditor(app, self)
+        self._modules = {}
+        self.solved = []
+
+    def GetName(self):
+        self._call('GetName')
+        return self._name
+
+    def GetSolutionType(self):
+        self._call('GetSolutionType')
+        return self.solution_type
+
+    def SetActiveEditor(self, editorname):
+        self._call('SetActiveEditor')
+        if editorname != "3D Modeler":
+            raise SimulatedComError('Unknown editor {e!r}'.format(e=editorname))
+        return self._editor
+
+    def GetModule(self, ModuleName):
+        self._call('GetModule')
+        if ModuleName not in MODULE_NAMES:
+            raise SimulatedComError('Unknown module {m!r}'.format(m=ModuleName))
+        try:
+            return self._modules[ModuleName]
+        except KeyError:
+            if ModuleName == "FieldsReporter":
+                oModule = SimulatedFieldsReporter(self._app, ModuleName)
+            else:
+                oModule = SimulatedModule(self._app, ModuleName)
+            self._modules[ModuleName] = oModule
+            return oModule
+
+    def Solve(self, setupnames):
+        self._call('Solve')
+        self.solved.extend(setupnames)
+        return 0
+
+class SimulatedModule(_SimObject):
+    """
+    Stand-in for an HFSS module such as "BoundarySetup".
+
+    Every script command is accepted and appended to the calls list as a
+    (method name, arguments) tuple.
+    """
+    def __init__(self, app, name):
+        _SimObject.__init__(self, app)
+        self.name = name
+        self.calls = []
+
+    def __getattr__(self, method):
+        if not method[:1].isupper():
+            raise AttributeError(method)
+
+        def command(*args):
+            self._call(method)
+            self.calls.append((method, args))
+
+        return command
+
+class SimulatedFieldsReporter(SimulatedModule):
+    """
+    Stand-in for the "FieldsReporter" module.
+
+    The value at the top of the calculator stack is the sum of the SI values
+    of the quantities in the requested variation, which makes results
+    deterministic and easy to check.
+    """
+    def __init__(self, app, name):
+        SimulatedModule.__init__(self, app, name)
+        self.stack = []
+
+    def EnterQty(self, quantity):
+        self._call('EnterQty')
+        self.stack.append(quantity)
+
+    def EnterVol(self, volume):
+        self._call('EnterVol')
+        self.stack.append(volume)
+
+    def CalcOp(self, operation):
+        self._call('CalcOp')
+        top = self.stack.pop() if self.stack else ''
+        self.stack.append('{o}({t})'.format(o=operation, t=top))
+
+    def ClcEval(self, solutionname, variablesarray):
+        self._call('ClcEval')
+
+    def GetTopEntryValue(self, solutionname, variablesarray):
+        self._call('GetTopEntryValue')
+        values = [to_si(value, 'Hz') for value in _pairs(list(variablesarray)).values()]
+        return (repr(float(sum(v for v in values if v is not None))),)
+
+class SimulatedEditor(_SimObject):
+    """
+    Stand-in for the "3D Modeler" editor.
+    """
+    def __init__(self, app, oDesign):
+        _SimObject.__init__(self, app)
+        self._design = oDesign
+        self.objects = collections.OrderedDict()
+        self._owner = {}
+        self._selections = ()
+
+    # Helpers
+
+    def _new_id(self):
+        return self._app._new_id()
+
+    def _coord(self, value):
+        return to_si(value, self._app.model_units)
+
+    def _point(self, x, y, z):
+        p = (self._coord(x), self._coord(y), self._coord(z))
+        return None if None in p else p
+
+    def _unique(self, name):
+        """
+        Name a new primitive the way HFSS does: if the name is taken, the
+        trailing number is incremented until the name is free.
+        """
+        if name not in self.objects:
+            return name
+        match = re.match(r'^(.*?)(\d*)$', name)
+        stem, number = match.group(1), int(match.group(2) or 0)
+        while True:
+            number += 1
+            candidate = '{s}{n}'.format(s=stem, n=number)
+            if candidate not in self.objects:
+                return candidate
+
+    def _copy_name(self, name):
+        """
+        Name a copy the way HFSS does, e.g. Box1_1, Box1_2, ...
+        """
+        k = 1
+        while '{n}_{k}'.format(n=name, k=k) in self.objects:
+            k += 1
+        return '{n}_{k}'.format(n=name, k=k)
+
+    def _body(self, name):
+        try:
+            return self.objects[name]
+        except KeyError:
+            raise SimulatedComError('Object {n!r} does not exist'.format(n=name))
+
+    def _add(self, body):
+        body.id = self._new_id()
+        for entity in body.faces + body.edges:
+            entity.id = self._new_id()
+            self._owner[entity.id] = body.name
+        self.objects[body.name] = body
+        return body.name
+
+    def _remove(self, name):
+        body = self.objects.pop(name)
+        for entity in body.faces + body.edges:
+            self._owner.pop(entity.id, None)
+        return body
+
+    def _create(self, kind, attributesarray, faces, edges, parameters):
+        attributes = _fields(attributesarray)
+        name = self._unique(attributes.get('Name', kind))
+        return self._add(_Body(name, kind, faces, edges, attributes, parameters))
+
+    def _clone(self, body, point_map=None, vector_map=None):
+        clone = body.clone(self._copy_name(body.name))
+        if point_map is not None:
+            clone.transform(point_map, vector_map)
+        return self._add(clone)
+
+    def _transform(self, names, point_map, vector_map, radius_scale=1.0):
+        for name in names:
+            self._body(name).transform(point_map, vector_map, radius_scale)
+
+    # Primitives
+
+    def CreateBox(self, parametersarray, attributesarray):
+        self._call('CreateBox')
+        f = _fields(parametersarray)
+        p = self._point(f['XPosition'], f['YPosition'], f['ZPosition'])
+        s = self._point(f['XSize'], f['YSize'], f['ZSize'])
+        if p is None or s is None:
+            faces = [_Entity(None) for k in range(6)]
+            edges = [_Entity(None) for k in range(12)]
+        else:
+            v = [_add(p, (s[0] * (i & 1), s[1] * ((i >> 1) & 1), s[2] * ((i >> 2) & 1)))
+                 for i in range(8)]
+            quads = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4),
+                     (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+            faces = []
+            for quad in quads:
+                points = [v[i] for i in quad]
+                faces.append(_Entity('polygon', points, _polygon_normal(points)))
+            edges = [_Entity('segment', (v[i], v[i | bit]))
+                     for i in range(8) for bit in (1, 2, 4) if not i & bit]
+        return self._create('Box', attributesarray, faces, edges, f)
+
+    def CreateRectangle(self, parametersarray, attributesarray):
+        self._call('CreateRectangle')
+        f = _fields(parametersarray)
+        p = self._point(f['XStart'], f['YStart'], f['ZStart'])
+        w = self._coord(f['Width'])
+        h = self._coord(f['Height'])
+        covered = f.get('IsCovered', True)
+        if p is None or w is None or h is None:
+            faces = [_Entity(None)] if covered else []
+            edges = [_Entity(None) for k in range(4)]
+        else:
+            u, v = {'X': ('Y', 'Z'), 'Y': ('Z', 'X'), 'Z': ('X', 'Y')}[f.get('WhichAxis', 'Z')]
+            du = _mul(_AXES[u], w)
+            dv = _mul(_AXES[v], h)
+            points = [p, _add(p, du), _add(_add(p, du), dv), _add(p, dv)]
+            faces = [_Entity('polygon', points, _AXES[f.get('WhichAxis', 'Z')])] if covered else []
+            edges = [_Entity('segment', (points[i], points[(i + 1) % 4])) for i in range(4)]
+        return self._create('Rectangle', attributesarray, faces, edges, f)
+
+    def _create_disk(self, kind, f, radius, attributesarray):
+        c = self._point(f['XCenter'], f['YCenter'], f['ZCenter'])
+        r = self._coord(radius)
+        if c is None or r is None:
+            faces = [_Entity(None)]
+            edges = [_Entity(None)]
+        else:
+            normal = _AXES[f.get('WhichAxis', 'Z')]
+            faces = [_Entity('disk', [c], normal, r)]
+            edges = [_Entity('circle', [c], normal, r)]
+        return self._create(kind, attributesarray, faces, edges, f)
+
+    def CreateCircle(self, parametersarray, attributesarray):
+        self._call('CreateCircle')
+        f = _fields(parametersarray)
+        return self._create_disk('Circle', f, f['Radius'], attributesarray)
+
+    def CreateEllipse(self, parametersarray, attributesarray):
+        self._call('CreateEllipse')
+        f = _fields(parametersarray)
+        return self._create_disk('Ellipse', f, f['MajRadius'], attributesarray)
+
+    def CreateSphere(self, parametersarray, attributesarray):
+        self._call('CreateSphere')
+        f = _fields(parametersarray)
+        c = self._point(f['XCenter'], f['YCenter'], f['ZCenter'])
+        r = self._coord(f['Radius'])
+        if c is None or r is None:
+            faces = [_Entity(None)]
+        else:
+            faces = [_Entity('sphere', [c], None, r)]
+        return self._create('Sphere', attributesarray, faces, [], f)
+
+    def CreatePolyline(self, parametersarray, attributesarray):
+        self._call('CreatePolyline')
+        f = _fields(parametersarray)
+        points = []
+        for item in f['PolylinePoints'][1:]:
+            # hycohanz.create_polyline() wraps every point in an extra list.
+            if isinstance(item[0], (list, tuple)):
+                item = item[0]
+            pf = _fields(item)
+            points.append(self._point(pf['X'], pf['Y'], pf['Z']))
+        nsegments = len(f['PolylineSegments']) - 1
+        closed = f.get('IsPolylineClosed', True)
+        covered = f.get('IsPolylineCovered', True) and closed
+        if None in points:
+            faces = [_Entity(None)] if covered else []
+            edges = [_Entity(None) for k in range(nsegments)]
+        else:
+            if len(points) > 1 and points[0] == points[-1]:
+                outline = points[:-1]
+            else:
+                outline = points
+            faces = []
+            if covered and len(outline) > 2:
+                faces = [_Entity('polygon', outline, _polygon_normal(outline))]
+            edges = [_Entity('segment', (points[i], points[i + 1]))
+                     for i in range(min(nsegments, len(points) - 1))]
+        return self._create('Polyline', attributesarray, faces, edges, f)
+
+    def CreateEquationCurve(self, parametersarray, attributesarray):
+        self._call('CreateEquationCurve')
+        f = _fields(parametersarray)
+        return self._create('EquationCurve', attributesarray, [], [_Entity(None)], f)
+
+    def Import(self, importparamsarray):
+        self._call('Import')
+        f = _fields(importparamsarray)
+        stem = os.path.splitext(os.path.basename(f['SourceFile']))[0]
+        stem = re.sub(r'\W', '_', stem) or 'Imported'
+        name = self._unique(stem)
+        body = _Body(name, 'Imported', [_Entity(None) for k in range(6)],
+                     [_Entity(None) for k in range(12)], {}, f)
+        self._selections = (self._add(body),)
+
+    # Queries
+
+    def GetMatchedObjectName(self, name_filter):
+        self._call('GetMatchedObjectName')
+        return tuple(name for name in self.objects if fnmatch.fnmatchcase(name, name_filter))
+
+    def GetObjectName(self, index):
+        self._call('GetObjectName')
+        return list(self.objects)[index]
+
+    def GetNumObjects(self):
+        self._call('GetNumObjects')
+        return len(self.objects)
+
+    def GetObjectIDByName(self, objname):
+        self._call('GetObjectIDByName')
+        return self._body(objname).id
+
+    def GetObjectNameByFaceID(self, faceid):
+        self._call('GetObjectNameByFaceID')
+        try:
+            return self._owner[int(faceid)]
+        except KeyError:
+            raise SimulatedComError('Face {f} does not exist'.format(f=faceid))
+
+    def GetFaceIDs(self, body_name):
+        self._call('GetFaceIDs')
+        return tuple(str(face.id) for face in self._body(body_name).faces)
+
+    def GetEdgeIDs(self, body_name):
+        self._call('GetEdgeIDs')
+        return tuple(str(edge.id) for edge in self._body(body_name).edges)
+
+    def GetSelections(self):
+        self._call('GetSelections')
+        return self._selections
+
+    def _nearest(self, bodyname, entities, f):
+        point = self._point(f['Xposition'], f['YPosition'], f['ZPosition'])
+        best = None
+        for entity in entities:
+            d = entity.distance(point) if point is not None else None
+            if d is not None and d <= 1e-9 + 1e-6 * _length(point) and (best is None or d < best[0]):
+                best = (d, entity.id)
+        if best is not None:
+            return best[1]
+        unknown = [entity for entity in entities if entity.kind is None]
+        if point is None or unknown:
+            if entities:
+                return (unknown or entities)[0].id
+        raise SimulatedComError('No face or edge of {b!r} at the given position'.format(b=bodyname))
+
+    def GetFaceByPosition(self, positionparameters):
+        self._call('GetFaceByPosition')
+        f = _fields(positionparameters)
+        return self._nearest(f['BodyName'], self._body(f['BodyName']).faces, f)
+
+    def GetEdgeByPosition(self, positionparameters):
+        self._call('GetEdgeByPosition')
+        f = _fields(positionparameters)
+        return self._nearest(f['BodyName'], self._body(f['BodyName']).edges, f)
+
+    # Operations
+
+    def AssignMaterial(self, selectionsarray, attributesarray):
+        self._call('AssignMaterial')
+        f = _fields(attributesarray)
+        for name in _selections(selectionsarray):
+            body = self._body(name)
+            if 'MaterialName' in f:
+                body.material = _material_name(f['MaterialName'])
+            if 'SolveInside' in f:
+                body.solve_inside = f['SolveInside']
+
+    def Move(self, selectionsarray, parametersarray):
+        self._call('Move')
+        f = _fields(parametersarray)
+        d = self._point(f['TranslateVectorX'], f['TranslateVectorY'], f['TranslateVectorZ'])
+        if d is not None:
+            self._transform(_selections(selectionsarray), lambda p: _add(p, d), lambda v: v)
+
+    def Rotate(self, selectionsarray, parametersarray):
+        self._call('Rotate')
+        f = _fields(parametersarray)
+        angle = to_si(f['RotateAngle'], 'deg')
+        if angle is not None:
+            rotation = _rotation(f['RotateAxis'], angle)
+            self._transform(_selections(selectionsarray), rotation, rotation)
+
+    def Mirror(self, selectionsarray, parametersarray):
+        self._call('Mirror')
+        f = _fields(parametersarray)
+        base = self._point(f['MirrorBaseX'], f['MirrorBaseY'], f['MirrorBaseZ'])
+        normal = self._point(f['MirrorNormalX'], f['MirrorNormalY'], f['MirrorNormalZ'])
+        if base is not None and normal is not None:
+            n = _unit(normal)
+            reflect = lambda v: _sub(v, _mul(n, 2 * _dot(v, n)))
+            self._transform(_selections(selectionsarray),
+                            lambda p: _add(base, reflect(_sub(p, base))), reflect)
+
+    def Scale(self, selectionsarray, parametersarray):
+        self._call('Scale')
+        f = _fields(parametersarray)
+        s = (to_si(f['ScaleX'], 'm'), to_si(f['ScaleY'], 'm'), to_si(f['ScaleZ'], 'm'))
+        if None not in s:
+            scale = lambda p: (p[0] * s[0], p[1] * s[1], p[2] * s[2])
+            inverse = lambda v: (v[0] / s[0], v[1] / s[1], v[2] / s[2])
+            self._transform(_selections(selectionsarray), scale, inverse, max(map(abs, s)))
+
+    def Copy(self, selectionsarray):
+        self._call('Copy')
+        self._design._project._desktop.clipboard = [
+            _copy.deepcopy(self._body(name)) for name in _selections(selectionsarray)]
+
+    def Paste(self):
+        self._call('Paste')
+        names = tuple(self._clone(body) for body in self._design._project._desktop.clipboard)
+        self._selections = names
+        return names
+
+    def Delete(self, selectionsarray):
+        self._call('Delete')
+        for name in _selections(selectionsarray):
+            self._remove(name)
+
+    def RenamePart(self, renameparamsarray):
+        self._call('RenamePart')
+        f = _fields(renameparamsarray)
+        old, new = f['Old Name'], f['New Name']
+        if new in self.objects and new != old:
+            raise SimulatedComError('Object {n!r} already exists'.format(n=new))
+        body = self._body(old)
+        body.name = new
+        self.objects = collections.OrderedDict(
+            (new if name == old else name, item) for name, item in self.objects.items())
+        for entity in body.faces + body.edges:
+            self._owner[entity.id] = new
+
+    def _absorb(self, names, keep_originals):
+        target = self._body(names[0])
+        for name in names[1:]:
+            body = self._body(name)
+            if keep_originals:
+                body = body.clone(name)
+                for entity in body.faces + body.edges:
+                    entity.id = self._new_id()
+            else:
+                self._remove(name)
+            target.faces.extend(body.faces)
+            target.edges.extend(body.edges)
+            for entity in body.faces + body.edges:
+                self._owner[entity.id] = target.name
+
+    def Unite(self, selectionsarray, parametersarray):
+        self._call('Unite')
+        self._absorb(_selections(selectionsarray),
+                     _fields(parametersarray).get('KeepOriginals', False))
+
+    def Connect(self, selectionsarray):
+        self._call('Connect')
+        self._absorb(_selections(selectionsarray), False)
+
+    def Subtract(self, selectionsarray, parametersarray):
+        self._call('Subtract')
+        self._subtract(selectionsarray, parametersarray)
+
+    def Imprint(self, selectionsarray, parametersarray):
+        self._call('Imprint')
+        self._subtract(selectionsarray, parametersarray)
+
+    def _subtract(self, selectionsarray, parametersarray):
+        f = _fields(selectionsarray)
+        blanks = [name.strip() for name in f['Blank Parts'].split(',') if name.strip()]
+        tools = [name.strip() for name in f['Tool Parts'].split(',') if name.strip()]
+        for name in blanks:
+            self._body(name)
+        if not _fields(parametersarray).get('KeepOriginals', False):
+            for name in tools:
+                self._remove(name)
+
+    def Split(self, selectionsarray, parametersarray):
+        self._call('Split')
+        names = _selections(selectionsarray)
+        for name in names:
+            self._body(name)
+        return tuple(names)
+
+    def SeparateBody(self, selectionsarray):
+        self._call('SeparateBody')
+        for name in _selections(selectionsarray):
+            self._body(name)
+        self._selections = ()
+
+    def SweepAlongVector(self, selectionsarray, parametersarray):
+        self._call('SweepAlongVector')
+        self._selections = tuple(_selections(selectionsarray))
+
+    def Fillet(self, selectionsarray, parametersarray):
+        self._call('Fillet')
+        for name in _selections(selectionsarray):
+            self._body(name)
+
+    def UncoverFaces(self, selectionsarray, parametersarray):
+        self._call('UncoverFaces')
+        for name, params in zip(_selections(selectionsarray), parametersarray[1:]):
+            body = self._body(name)
+            drop = set(int(faceid) for faceid in _fields(params)['FacesToUncover'])
+            for face in body.faces:
+                if face.id in drop:
+                    self._owner.pop(face.id, None)
+            body.faces = [face for face in body.faces if face.id not in drop]
+
+    def CoverLines(self, selectionsarray):
+        self._call('CoverLines')
+        for name in _selections(selectionsarray):
+            body = self._body(name)
+            if body.faces:
+                continue
+            # The edges of a united polyline are in drawing order.
+            points = [edge.points[0] for edge in body.edges if edge.kind == 'segment']
+            if len(points) == len(body.edges) and len(points) > 2:
+                face = _Entity('polygon', points, _polygon_normal(points))
+            else:
+                face = _Entity(None)
+            face.id = self._new_id()
+            self._owner[face.id] = body.name
+            body.faces.append(face)
+
+    def DuplicateAlongLine(self, selectionsarray, parametersarray, optionsarray):
+        self._call('DuplicateAlongLine')
+        f = _fields(parametersarray)
+        d = self._point(f['XComponent'], f['YComponent'], f['ZComponent'])
+        count = int(float(f['NumClones']))
+        names = []
+        for k in range(1, count):
+            for name in _selections(selectionsarray):
+                if d is None:
+                    names.append(self._clone(self._body(name)))
+                else:
+                    offset = _mul(d, k)
+                    names.append(self._clone(self._body(name),
+                                             lambda p: _add(p, offset), lambda v: v))
+        self._selections = tuple(names)
+        return tuple(names)
+
+    def DuplicateAroundAxis(self, selectionsarray, parametersarray, optionsarray):
+        self._call('DuplicateAroundAxis')
+        f = _fields(parametersarray)
+        angle = to_si(f['AngleStr'], 'deg')
+        count = int(float(f['NumClones']))
+        names = []
+        for k in range(1, count):
+            for name in _selections(selectionsarray):
+                if angle is None:
+                    names.append(self._clone(self._body(name)))
+                else:
+                    rotation = _rotation(f['WhichAxis'], angle * k)
+                    names.append(self._clone(self._body(name), rotation, rotation))
+        self._selections = tuple(names)
+        return tuple(names)
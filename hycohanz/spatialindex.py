@@ -0,0 +1,482 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial index of the parts recorded by the scene graph.
+
+get_face_by_position() and get_edge_by_position() are the hot queries when
+boundaries are assigned in dense models, and HFSS answers each of them with
+a cross-process COM call.  With the spatial index enabled, hycohanz keeps
+the recorded parts in a uniform grid of their bounding boxes and tests the
+queried point against the faces and edges of the part locally:
+
+- If the point lies on exactly one face (edge) of the part and the HFSS ID
+  of that face (edge) is known, the ID is returned without a COM call.
+- If the point lies on exactly one face (edge) whose ID is not known yet,
+  HFSS is asked, and the ID it returns is remembered for every other point
+  on the same face (edge).
+- Otherwise, e.g. for a point on the edge between two faces, for parts
+  whose geometry the scene graph does not know, or after a boolean
+  operation, the query is passed on to HFSS.
+
+locate_faces() and locate_edges() find the parts and faces (edges) of many
+points at once, given as a NumPy array.
+
+The index follows the scene graph, which it enables; see
+hycohanz.scenegraph for what the scene graph can follow.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> hfss.enable_spatial_index()
+False
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> face = hfss.get_face_by_position(oEditor, box, 0, 0.5, 0.5)
+>>> face = hfss.get_face_by_position(oEditor, box, 0, 0.25, 0.75)  # no COM call
+>>> hfss.get_spatial_index_info()
+SpatialIndexInfo(hits=1, misses=1, ambiguous=0, currsize=1)
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import math
+import threading
+from collections import namedtuple
+
+from hycohanz.backend import handle_key
+from hycohanz.scenegraph import scene_graph, enable_scene_graph
+
+SpatialIndexInfo = namedtuple('SpatialIndexInfo', ['hits', 'misses', 'ambiguous', 'currsize'])
+
+# Distance from a face or edge, relative to the bounding box diagonal of the
+# part, within which a point is taken to lie on it.
+_RTOL = 1e-6
+
+# Parts covering more grid cells than this are kept in a separate list.
+_MAX_CELLS = 512
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _segment_distance(p, a, b):
+    ab = _sub(b, a)
+    ap = _sub(p, a)
+    length2 = _dot(ab, ab)
+    s = 0.0 if length2 == 0 else min(1.0, max(0.0, _dot(ap, ab) / length2))
+    d = (ap[0] - s * ab[0], ap[1] - s * ab[1], ap[2] - s * ab[2])
+    return math.sqrt(_dot(d, d))
+
+def _on_polygon(p, points, tol):
+    normal = (0.0, 0.0, 0.0)
+    for a, b in zip(points, points[1:] + points[:1]):
+        normal = (normal[0] + (a[1] - b[1]) * (a[2] + b[2]),
+                  normal[1] + (a[2] - b[2]) * (a[0] + b[0]),
+                  normal[2] + (a[0] - b[0]) * (a[1] + b[1]))
+    size = math.sqrt(_dot(normal, normal))
+    if size == 0 or abs(_dot(normal, _sub(p, points[0]))) > tol * size:
+        return False
+    # Even-odd test in the coordinate plane closest to the polygon.
+    drop = max(range(3), key=lambda k: abs(normal[k]))
+    i, j = [k for k in range(3) if k != drop]
+    inside = False
+    for a, b in zip(points, points[1:] + points[:1]):
+        if (a[j] > p[j]) != (b[j] > p[j]):
+            if p[i] < a[i] + (p[j] - a[j]) * (b[i] - a[i]) / (b[j] - a[j]):
+                inside = not inside
+    if inside:
+        return True
+    return any(_segment_distance(p, a, b) <= tol
+               for a, b in zip(points, points[1:] + points[:1]))
+
+def _ellipse_coordinates(p, center, vectors):
+    """
+    Return the coordinates of p along the (orthogonal) semi-axis vectors,
+    and its distance from their span.
+    """
+    d = _sub(p, center)
+    coordinates = [_dot(d, v) / _dot(v, v) for v in vectors]
+    rest = d
+    for c, v in zip(coordinates, vectors):
+        rest = (rest[0] - c * v[0], rest[1] - c * v[1], rest[2] - c * v[2])
+    return coordinates, math.sqrt(_dot(rest, rest))
+
+def _on_face(p, face, tol):
+    kind = face[0]
+    if kind == 'polygon':
+        return _on_polygon(p, list(face[1:]), tol)
+    coordinates, offset = _ellipse_coordinates(p, face[1], face[2:])
+    rho = math.sqrt(sum(c * c for c in coordinates))
+    radius = min(math.sqrt(_dot(v, v)) for v in face[2:])
+    if kind == 'disk':
+        return offset <= tol and (rho - 1) * radius <= tol
+    # An ellipsoid.
+    return abs(rho - 1) * radius <= tol
+
+def _on_edge(p, edge, tol):
+    if edge[0] == 'segment':
+        return _segment_distance(p, edge[1], edge[2]) <= tol
+    coordinates, offset = _ellipse_coordinates(p, edge[1], edge[2:])
+    rho = math.sqrt(sum(c * c for c in coordinates))
+    radius = min(math.sqrt(_dot(v, v)) for v in edge[2:])
+    return offset <= tol and abs(rho - 1) * radius <= tol
+
+def _tolerance(bbox):
+    lo, hi = bbox
+    return _RTOL * math.sqrt(sum((h - l) ** 2 for l, h in zip(lo, hi))) + 1e-15
+
+def _matches(obj, point, edges=False):
+    """
+    Return the indices of the faces (edges) of a part that a point lies on,
+    or None if they are not known.
+    """
+    features = obj.edges() if edges else obj.faces()
+    bbox = obj.bounding_box()
+    if features is None or bbox is None:
+        return None
+    tol = _tolerance(bbox)
+    test = _on_edge if edges else _on_face
+    return [k for k, feature in enumerate(features) if test(point, feature, tol)]
+
+class _Grid(object):
+    """
+    Uniform grid of the bounding boxes of the parts of one scene.
+    """
+    def __init__(self, scene):
+        self.scene = scene
+        self.cell = None
+        self._cells = {}
+        self._large = set()
+        self._boxes = {}
+        self._built = 0
+
+    def _keys(self, bbox):
+        (lo, hi), tol = bbox, _tolerance(bbox)
+        first = [int(math.floor((x - tol) / self.cell)) for x in lo]
+        last = [int(math.floor((x + tol) / self.cell)) for x in hi]
+        if (last[0] - first[0] + 1) * (last[1] - first[1] + 1) * (last[2] - first[2] + 1) > _MAX_CELLS:
+            return None
+        return [(i, j, k) for i in range(first[0], last[0] + 1)
+                for j in range(first[1], last[1] + 1)
+                for k in range(first[2], last[2] + 1)]
+
+    def _insert(self, name):
+        obj = self.scene.get(name)
+        bbox = None if obj is None else obj.bounding_box()
+        if bbox is None:
+            return
+        keys = self._keys(bbox)
+        self._boxes[name] = (bbox, keys)
+        if keys is None:
+            self._large.add(name)
+        else:
+            for key in keys:
+                self._cells.setdefault(key, set()).add(name)
+
+    def _remove(self, name):
+        bbox, keys = self._boxes.pop(name, (None, None))
+        self._large.discard(name)
+        for key in keys or ():
+            names = self._cells[key]
+            names.discard(name)
+            if not names:
+                del self._cells[key]
+
+    def _rebuild(self):
+        extents = sorted(max(h - l for l, h in zip(*bbox))
+                         for bbox in (obj.bounding_box() for obj in self.scene.objects.values())
+                         if bbox is not None)
+        # Cells the size of a typical part.
+        self.cell = (extents[len(extents) // 2] if extents else 0) or 1e-3
+        self._cells = {}
+        self._large = set()
+        self._boxes = {}
+        self._built = len(self.scene)
+        for name in self.scene.objects:
+            self._insert(name)
+
+    def update(self):
+        """
+        Follow the changes of the scene since the last update.
+        """
+        changed = self.scene.take_changes()
+        if self.cell is None or len(self.scene) > 2 * self._built + 16:
+            self._rebuild()
+            return
+        for name in changed:
+            self._remove(name)
+            self._insert(name)
+
+    def candidates(self, point):
+        """
+        Return the names of the parts whose bounding box contains a point.
+        """
+        key = tuple(int(math.floor(x / self.cell)) for x in point)
+        names = []
+        for name in self._cells.get(key, set()) | self._large:
+            (lo, hi), keys = self._boxes[name]
+            tol = _tolerance((lo, hi))
+            if all(l - tol <= x <= h + tol for l, x, h in zip(lo, point, hi)):
+                names.append(name)
+        return names
+
+class SpatialIndex(object):
+    """
+    Grids of the recorded parts by editor, and the learned IDs of their
+    faces and edges.
+
+    Attributes
+    ----------
+    enabled : bool
+        If False, every query is passed on to the editor.
+    hits : int
+        Number of queries answered locally.
+    misses : int
+        Number of queries passed on to the editor.
+    ambiguous : int
+        Number of the misses for which the point did not lie on exactly one
+        face or edge of the part.
+
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.ambiguous = 0
+        self._grids = {}
+        self._lock = threading.Lock()
+
+    def grid(self, oEditor):
+        """
+        Return the up-to-date grid of the parts of an editor.
+        """
+        scene = scene_graph.scene(oEditor)
+        key = handle_key(oEditor)
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is None or grid.scene is not scene:
+                # The scene graph was cleared since.
+                grid = self._grids[key] = _Grid(scene)
+        with scene_graph._lock:
+            grid.update()
+        return grid
+
+    def lookup(self, oEditor, bodyname, position, fetch, edges=False):
+        """
+        Return the ID of the face (edge) of a body at a position, from the
+        index if possible.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor that the query is made to.
+        bodyname : str
+            Name of the body.
+        position : tuple
+            The x, y and z position as sent to HFSS.
+        fetch : callable
+            Called without arguments to obtain the ID from HFSS.
+        edges : bool
+            Whether to look up an edge rather than a face.
+
+        Returns
+        -------
+        int
+            The face (edge) ID.
+
+        """
+        if not self.enabled or not scene_graph.enabled:
+            return fetch()
+
+        scene = scene_graph.scene(oEditor)
+        obj = scene.get(bodyname)
+        point = scene._point(*position)
+        matches = None if obj is None or point is None else _matches(obj, point, edges)
+        if not matches or len(matches) > 1:
+            with self._lock:
+                self.misses += 1
+                if matches is not None:
+                    self.ambiguous += 1
+            return fetch()
+
+        ids = obj.edge_ids if edges else obj.face_ids
+        try:
+            answer = ids[matches[0]]
+        except KeyError:
+            pass
+        else:
+            with self._lock:
+                self.hits += 1
+            return answer
+        answer = fetch()
+        with self._lock:
+            self.misses += 1
+        with scene_graph._lock:
+            ids[matches[0]] = answer
+        return answer
+
+    def locate(self, oEditor, points, bodyname=None, edges=False):
+        """
+        Return the bodies and face (edge) indices at many points.
+
+        See locate_faces().
+        """
+        # Imported here so that hycohanz can be imported without NumPy.
+        import numpy as np
+
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        bodies = np.empty(len(points), dtype=object)
+        indices = np.full(len(points), -1, dtype=int)
+        if not scene_graph.enabled:
+            return bodies, indices
+
+        scene = scene_graph.scene(oEditor)
+        grid = None if bodyname is not None else self.grid(oEditor)
+        for n, point in enumerate(points.tolist()):
+            names = [bodyname] if grid is None else grid.candidates(point)
+            found = []
+            for name in names:
+                obj = scene.get(name)
+                matches = None if obj is None else _matches(obj, point, edges)
+                found += [(name, k) for k in matches or ()]
+            if len(found) == 1:
+                bodies[n], indices[n] = found[0]
+        return bodies, indices
+
+    def invalidate(self, oEditor=None):
+        """
+        Drop the grids of an editor, or of all editors.
+        """
+        with self._lock:
+            if oEditor is None:
+                self._grids.clear()
+            else:
+                self._grids.pop(handle_key(oEditor), None)
+
+    def info(self):
+        """
+        Return the hit, miss and ambiguous counts and the number of
+        learned face and edge IDs.
+
+        Returns
+        -------
+        SpatialIndexInfo
+            Named tuple (hits, misses, ambiguous, currsize).
+
+        """
+        with scene_graph._lock:
+            currsize = sum(len(obj.face_ids) + len(obj.edge_ids)
+                           for scene in scene_graph._scenes.values()
+                           for obj in scene.objects.values())
+        return SpatialIndexInfo(self.hits, self.misses, self.ambiguous, currsize)
+
+    def reset_info(self):
+        """
+        Reset the hit, miss and ambiguous counts.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.ambiguous = 0
+
+spatial_index = SpatialIndex()
+
+def enable_spatial_index(enabled=True):
+    """
+    Turn answering position queries from the spatial index on or off.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to use the index.  Turning it on also turns on the scene
+        graph, which it is built from; turning it off drops the index.
+
+    Returns
+    -------
+    bool
+        Whether the index was enabled before.
+
+    """
+    previous = spatial_index.enabled
+    spatial_index.enabled = enabled
+    if enabled:
+        enable_scene_graph()
+    else:
+        spatial_index.invalidate()
+    return previous
+
+def locate_faces(oEditor, points, bodyname=None):
+    """
+    Find the bodies and faces at many points at once, without COM calls.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    points : array_like
+        The points, shape (N, 3), in meters.
+    bodyname : str or None
+        Look at the faces of this body only.  If None, all recorded bodies
+        whose bounding box contains a point are looked at.
+
+    Returns
+    -------
+    bodies : numpy.ndarray of object
+        Name of the body at each point, or None if no face, or more than
+        one, lies at the point.
+    faces : numpy.ndarray of int
+        Index of the face in SceneObject.faces(), or -1 where bodies is
+        None.
+
+    """
+    return spatial_index.locate(oEditor, points, bodyname)
+
+def locate_edges(oEditor, points, bodyname=None):
+    """
+    Find the bodies and edges at many points at once, without COM calls.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor.
+    points : array_like
+        The points, shape (N, 3), in meters.
+    bodyname : str or None
+        Look at the edges of this body only.  If None, all recorded bodies
+        whose bounding box contains a point are looked at.
+
+    Returns
+    -------
+    bodies : numpy.ndarray of object
+        Name of the body at each point, or None if no edge, or more than
+        one, lies at the point.
+    edges : numpy.ndarray of int
+        Index of the edge in SceneObject.edges(), or -1 where bodies is
+        None.
+
+    """
+    return spatial_index.locate(oEditor, points, bodyname, edges=True)
+
+def get_spatial_index_info():
+    """
+    Return statistics of the spatial index.
+
+    The hit rate is hits / (hits + misses).
+
+    Returns
+    -------
+    SpatialIndexInfo
+        Named tuple (hits, misses, ambiguous, currsize).
+
+    """
+    return spatial_index.info()
+
+def reset_spatial_index_info():
+    """
+    Reset the hit, miss and ambiguous counts of the spatial index.
+
+    Returns
+    -------
+    None
+
+    """
+    spatial_index.reset_info()
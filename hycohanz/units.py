@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+HFSS unit handling.
+
+HFSS quantities are strings such as "1.5mm", "10GHz" or "45deg".  The
+functions in this module convert between those strings and plain floats in
+SI units, which is what the local (non-HFSS) parts of hycohanz work with.
+
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import math
+import re
+
+LENGTH_UNITS = {'fm': 1e-15,
+                'pm': 1e-12,
+                'nm': 1e-9,
+                'um': 1e-6,
+                'mm': 1e-3,
+                'cm': 1e-2,
+                'dm': 1e-1,
+                'm': 1.0,
+                'meter': 1.0,
+                'km': 1e3,
+                'uin': 2.54e-8,
+                'mil': 2.54e-5,
+                'in': 2.54e-2,
+                'ft': 0.3048,
+                'yd': 0.9144}
+
+ANGLE_UNITS = {'rad': 1.0,
+               'deg': math.pi / 180,
+               'degmin': math.pi / 180 / 60,
+               'degsec': math.pi / 180 / 3600}
+
+FREQUENCY_UNITS = {'Hz': 1.0,
+                   'kHz': 1e3,
+                   'MHz': 1e6,
+                   'GHz': 1e9,
+                   'THz': 1e12}
+
+UNITS = {}
+UNITS.update(LENGTH_UNITS)
+UNITS.update(ANGLE_UNITS)
+UNITS.update(FREQUENCY_UNITS)
+
+_QUANTITY = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]*)\s*$')
+
+def unit_scale(unit):
+    """
+    Return the factor that converts the given HFSS unit to SI.
+
+    Parameters
+    ----------
+    unit : str
+        An HFSS unit name, for example "mm", "GHz" or "deg".
+
+    Returns
+    -------
+    float
+        The SI value of one `unit`.
+
+    Raises
+    ------
+    KeyError
+        If the unit is not known.
+
+    """
+    try:
+        return UNITS[unit]
+    except KeyError:
+        return UNITS[unit.lower()]
+
+def to_si(value, default_unit='mm'):
+    """
+    Convert a number or a numeric HFSS quantity string to SI units.
+
+    Parameters
+    ----------
+    value : float, int, or str
+        The value to convert, for example 2, "2", or "2mm".
+    default_unit : str
+        The unit assumed when `value` carries none.  HFSS interprets
+        unitless lengths in the model units, which default to "mm".
+
+    Returns
+    -------
+    float or None
+        The value in SI units, or None if `value` is not a plain numeric
+        quantity (for example if it references design variables).
+
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value * unit_scale(default_unit)
+
+    match = _QUANTITY.match(str(value))
+    if match is None:
+        return None
+
+    number, unit = match.groups()
+    try:
+        return float(number) * unit_scale(unit or default_unit)
+    except KeyError:
+        return None
+
+def format_quantity(value, unit):
+    """
+    Format an SI value as an HFSS quantity string in the given unit.
+
+    Parameters
+    ----------
+    value : float
+        The value in SI units.
+    unit : str
+        The HFSS unit to express the value in.
+
+    Returns
+    -------
+    str
+        For example "1.5mm".
+
+    """
+    return '{v:.12g}{u}'.format(v=value / unit_scale(unit), u=unit)
+
+def format_values(values, unit=''):
+    """
+    Format an array of numbers as HFSS quantity strings, all at once.
+
+    Parameters
+    ----------
+    values : array_like
+        Numbers expressed in `unit`.  Arrays of strings are passed through,
+        and arrays of other objects (e.g. hycohanz Expressions) are
+        formatted element by element.
+    unit : str
+        The HFSS unit appended to the numbers, e.g. "mm".  If empty, HFSS
+        interprets the numbers in the model units.
+
+    Returns
+    -------
+    numpy.ndarray of str
+        The formatted values, with the shape of `values`.  Numbers are
+        returned in an object array.
+
+    """
+    # Imported here so that the rest of the module does not need NumPy.
+    import numpy as np
+
+    values = np.asarray(values)
+    if values.dtype.kind in 'iufb':
+        # Format every distinct number once, in a single string operation;
+        # coordinates of layout data repeat a lot.
+        unique, inverse = np.unique(values.astype(float), return_inverse=True)
+        template = '%.15g' + unit.replace('%', '%%') + '\n'
+        strings = (template * unique.size % tuple(unique.tolist())).split('\n')[:-1]
+        return np.array(strings, dtype=object)[inverse].reshape(values.shape)
+    if values.dtype.kind in 'SU':
+        return values.astype(str)
+
+    def format_value(value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return '{v:.15g}{u}'.format(v=value, u=unit)
+        return getattr(value, 'expr', None) or str(value)
+
+    return np.vectorize(format_value, otypes=[str])(values)